@@ -171,3 +171,12 @@ GHDataAPIClient.prototype.contributors = function (params) {
 GHDataAPIClient.prototype.committerLocations = function (params) {
   return this.get('commits/locations', params);
 };
+
+/**
+ * Several metrics computed in parallel by the server in a single request
+ * @param {Object} params - Query string params to pass to the API, metrics is a comma separated list of metrics
+ * @returns {Promise} Resolves with an object with data or an error for each metric
+ */
+GHDataAPIClient.prototype.report = function (params) {
+  return this.get('report', params);
+};
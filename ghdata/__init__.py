@@ -5,4 +5,8 @@ the health and sustainability of GitHub repositories.
 
 Most functions in the library return Pandas DataFrames.
 """
-from .ghdata import *
\ No newline at end of file
+from .ghdata import *
+from .cache import MetricCache
+from .resolver import IdResolver
+from .singleflight import SingleFlight
+from .timeouts import QueryTimeout, QueryBudget
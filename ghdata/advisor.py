@@ -0,0 +1,228 @@
+#SPDX-License-Identifier: MIT
+"""
+Suggests indexes for the queries GHData runs, based on the plans the database chooses for them
+"""
+
+import re
+import time
+import sqlalchemy as s
+
+# Metrics that only need a repoid, which the advisor runs against a sample repo
+REPO_METRICS = ['commits', 'forks_grouped_default', 'issues', 'issues_with_close', 'pulls', 'stargazers', 'contributors',
+                'committer_locations', 'issue_response_time', 'pull_acceptance_rate', 'average_issue_response_time',
+                'forks', 'issue_actions', 'relative_activity']
+
+# Longest identifier MySQL accepts
+MAX_NAME_LENGTH = 64
+
+# Tables in FROM and JOIN clauses, and in comma separated FROM lists
+TABLE_RE = re.compile(r'(?:\bFROM|\bJOIN|,)\s+(\w+)\b(?![.(])(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+COLUMN_RE = re.compile(r'(?<![\w.:])(?:(\w+)\.)?(\w+)\s*(=|<=|>=|<|>|\bIN\b|\bBETWEEN\b)\s*(\w+\.\w+|:\w+|"[^"]*"|\'[^\']*\'|\(|\d+)?', re.IGNORECASE)
+REFERENCE_RE = re.compile(r'\b(\w+)\.(\w+)\b')
+KEYWORDS = set(['select', 'from', 'where', 'and', 'or', 'on', 'as', 'join', 'group', 'order', 'by', 'not', 'null', 'is'])
+
+class IndexAdvisor(object):
+    """
+    Runs EXPLAIN on the queries of GHData metrics and proposes indexes for the tables they scan
+    """
+
+    def __init__(self, ghdata):
+        """
+        :param ghdata: GHData instance whose database is analyzed
+        """
+        self.ghdata = ghdata
+        self.db = ghdata.db
+        self.__columns = {}
+
+    def advise(self, repoid, methods=None, apply=False):
+        """
+        Explains the queries of each metric and suggests indexes for the problems found
+
+        :param repoid: Sample repo the metrics are run for
+        :param methods: Names of GHData methods, REPO_METRICS by default
+        :param apply: Create the suggested indexes and time the metrics again
+        :return: List of dictionaries with the method, its queries' plans and problems, suggested indexes and timings
+        """
+        reports = []
+        for method in methods or REPO_METRICS:
+            seconds, queries = self.capture(method, repoid)
+            report = {'method': method, 'before': seconds, 'plans': [], 'indexes': []}
+            for sql, params in queries:
+                plan = self.explain(sql, params)
+                report['plans'].append(plan)
+                for step in plan:
+                    if step['problems'] and step['table'] in self.columns_of_tables(sql):
+                        for statement in self.suggest(sql, step['table']):
+                            if statement not in report['indexes']:
+                                report['indexes'].append(statement)
+            reports.append(report)
+        if apply:
+            created = []
+            for report in reports:
+                for statement in report['indexes']:
+                    if statement not in created:
+                        self.db.execute(statement)
+                        created.append(statement)
+            for report in reports:
+                report['after'] = self.capture(report['method'], repoid)[0]
+        return reports
+
+    def capture(self, method, repoid):
+        """
+        Runs a metric without its cache
+
+        :return: Tuple of (seconds taken, list of (sql, params) of the queries it ran)
+        """
+        start = time.time()
+        queries = self.ghdata.capture_queries(method, repoid=repoid)
+        return time.time() - start, queries
+
+    def explain(self, sql, params):
+        """
+        The database's plan for a query
+
+        :return: List of dictionaries with the table, how it is accessed, the estimated rows and the problems found:
+                 'full scan', 'filesort' or 'temporary table'
+        """
+        aliases = self.aliases(sql)
+        text = sql if isinstance(sql, s.sql.elements.TextClause) else s.sql.text(str(sql))
+        statement, params = expand(text.text, params)
+        if self.db.dialect.name == 'sqlite':
+            return [self.__sqlite_step(row, aliases) for row in self.db.execute(s.sql.text('EXPLAIN QUERY PLAN ' + statement), params)]
+        steps = []
+        for row in self.db.execute(s.sql.text('EXPLAIN ' + statement), params):
+            row = dict((k.lower(), v) for k, v in dict(row).items())
+            extra = row.get('extra') or ''
+            problems = []
+            if row.get('type') == 'ALL':
+                problems.append('full scan')
+            if 'Using filesort' in extra:
+                problems.append('filesort')
+            if 'Using temporary' in extra:
+                problems.append('temporary table')
+            steps.append({'table': aliases.get(row.get('table'), row.get('table')), 'access': row.get('type'),
+                          'key': row.get('key'), 'rows': row.get('rows'), 'problems': problems})
+        return steps
+
+    def __sqlite_step(self, row, aliases):
+        detail = row[-1]
+        problems = []
+        match = re.match(r'(SCAN|SEARCH)\s+(?:TABLE\s+)?(\w+)', detail)
+        table = None
+        if match:
+            table = aliases.get(match.group(2), match.group(2))
+            if match.group(1) == 'SCAN' and 'INDEX' not in detail:
+                problems.append('full scan')
+        if 'TEMP B-TREE FOR ORDER BY' in detail:
+            problems.append('filesort')
+        if 'TEMP B-TREE FOR GROUP BY' in detail or 'TEMP B-TREE FOR DISTINCT' in detail:
+            problems.append('temporary table')
+        return {'table': table, 'access': detail, 'key': None, 'rows': None, 'problems': problems}
+
+    def aliases(self, sql):
+        """
+        Maps the tables and aliases named in FROM and JOIN clauses to table names
+        """
+        aliases = {}
+        for table, alias in TABLE_RE.findall(str(sql)):
+            if table.lower() in KEYWORDS:
+                continue
+            aliases.setdefault(table, table)
+            if alias and alias.lower() not in KEYWORDS:
+                aliases[alias] = table
+        return aliases
+
+    def columns(self, table):
+        if table not in self.__columns:
+            try:
+                self.__columns[table] = [c['name'] for c in s.inspect(self.db).get_columns(table)]
+            except s.exc.SQLAlchemyError:
+                self.__columns[table] = []
+        return self.__columns[table]
+
+    def columns_of_tables(self, sql):
+        return set(table for table in self.aliases(sql).values() if self.columns(table))
+
+    def suggest(self, sql, table):
+        """
+        CREATE INDEX statements for a table the query scans: one on the columns it filters and joins on, and one
+        that also covers the other columns the query reads, so the table itself needn't be read
+
+        :return: List of statements, empty if an existing index already starts with the suggested columns
+        """
+        sql = str(sql)
+        aliases = self.aliases(sql)
+        known = self.columns(table)
+        equality, joins, ranges = [], [], []
+        for qualifier, column, operator, operand in COLUMN_RE.findall(sql):
+            if operator == '=' and re.match(r'\w+\.\w+$', operand or ''):
+                # The other side of a join condition
+                other_qualifier, other_column = operand.split('.')
+                if self.__belongs(other_qualifier, other_column, table, aliases, known):
+                    joins.append(other_column)
+            if not self.__belongs(qualifier, column, table, aliases, known):
+                continue
+            operator = operator.upper()
+            if operator in ('=', 'IN') and re.match(r'\w+\.\w+$', operand or ''):
+                joins.append(column)
+            elif operator in ('=', 'IN'):
+                equality.append(column)
+            else:
+                ranges.append(column)
+        # Tables filtered by a value are read first, others are looked up by their join columns
+        key = unique((equality or joins) + ranges[:1])[:3]
+        if not key:
+            return []
+        if self.__indexed(table, key):
+            return []
+        referenced = [column for qualifier, column in REFERENCE_RE.findall(sql) if self.__belongs(qualifier, column, table, aliases, known)]
+        referenced += [column for column in re.findall(r'\b(\w+)\b', sql) if column in known and len(aliases) == 1]
+        covering = unique(key + referenced)[:6]
+        statements = [create_index(table, key)]
+        if len(covering) > len(key):
+            statements.append(create_index(table, covering, 'covering'))
+        return statements
+
+    def __belongs(self, qualifier, column, table, aliases, known):
+        if column not in known:
+            return False
+        if qualifier:
+            return aliases.get(qualifier) == table
+        return True
+
+    def __indexed(self, table, key):
+        try:
+            inspector = s.inspect(self.db)
+            indexes = [i['column_names'] for i in inspector.get_indexes(table)]
+            indexes.append(inspector.get_pk_constraint(table).get('constrained_columns') or [])
+        except s.exc.SQLAlchemyError:
+            return False
+        return any(list(columns[:len(key)]) == list(key) for columns in indexes)
+
+
+def unique(columns):
+    seen = []
+    for column in columns:
+        if column not in seen:
+            seen.append(column)
+    return seen
+
+def create_index(table, columns, suffix=None):
+    name = '_'.join(['ghdata', table] + columns + ([suffix] if suffix else []))
+    return 'CREATE INDEX {} ON {} ({})'.format(name[:MAX_NAME_LENGTH], table, ', '.join(columns))
+
+def expand(sql, params):
+    """
+    Spells out the list parameters of expanding bind parameters as one parameter per value, as SQLAlchemy
+    does when it runs the query, since they are lost when EXPLAIN is prepended to the query's text
+
+    :return: Tuple of the query's text and its parameters
+    """
+    params = dict(params or {})
+    for name, value in list(params.items()):
+        if isinstance(value, (list, tuple)):
+            names = ['{}_{}'.format(name, i) for i in range(len(value))]
+            sql = re.sub(r':{}\b'.format(name), '(' + (', '.join(':' + n for n in names) or 'NULL') + ')', sql)
+            del params[name]
+            params.update(zip(names, value))
+    return sql, params
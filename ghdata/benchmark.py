@@ -0,0 +1,147 @@
+#SPDX-License-Identifier: MIT
+"""
+Times GHData methods and HTTP routes, and compares the timings of two runs
+"""
+
+import json
+import time
+import datetime
+import sqlalchemy as s
+from .advisor import REPO_METRICS
+
+# Routes that call web services, whose timings say nothing about GHData
+EXTERNAL_ROUTES = set(['linking_websites'])
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+def busiest_repos(ghdata, count=3):
+    """
+    owner/repo of the repos with the most commits
+    """
+    rows = ghdata.db.execute(s.sql.text("""
+        SELECT users.login, projects.name, COUNT(*) AS commits
+        FROM commits
+        JOIN projects ON projects.id = commits.project_id
+        JOIN users ON users.id = projects.owner_id
+        GROUP BY users.login, projects.name
+        ORDER BY commits DESC
+        LIMIT :count"""), count=count)
+    return ['{}/{}'.format(login, name) for login, name, _ in rows]
+
+def time_call(func, repeats):
+    """
+    Calls func repeatedly
+
+    :return: Dictionary with the median, min and max seconds, or the error if func failed
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.time()
+        try:
+            func()
+        except Exception as e:
+            return {'error': '{}: {}'.format(type(e).__name__, e)}
+        timings.append(time.time() - start)
+    return {'median': median(timings), 'min': min(timings), 'max': max(timings)}
+
+def benchmark_methods(ghdata, repos, methods=None, repeats=3):
+    """
+    Times GHData methods without their cache
+
+    :param repos: List of owner/repo the methods are run for
+    :return: Dictionary of 'method owner/repo' to timings
+    """
+    results = {}
+    for repo in repos:
+        repoid = ghdata.repoid(*repo.split('/', 1))
+        for method in methods or REPO_METRICS:
+            func = getattr(type(ghdata), method)
+            func = getattr(func, 'uncached', func)
+            results['{} {}'.format(method, repo)] = time_call(lambda: func(ghdata, repoid=repoid), repeats)
+    return results
+
+def benchmark_routes(app, repos, repeats=3):
+    """
+    Times every GET route that only needs a repo, through the Flask test client
+
+    :return: Dictionary of 'route owner/repo' to timings
+    """
+    client = app.test_client()
+    results = {}
+    for rule in app.url_map.iter_rules():
+        if 'GET' not in rule.methods or set(rule.arguments) - set(['owner', 'repo', 'group_type']) or 'owner' not in rule.arguments:
+            continue
+        if rule.endpoint in EXTERNAL_ROUTES:
+            continue
+        for repo in repos:
+            owner, name = repo.split('/', 1)
+            path = rule.rule.replace('<owner>', owner).replace('<repo>', name).replace('<group_type>', 'week')
+            def request():
+                response = client.get(path)
+                if response.status_code >= 500:
+                    raise RuntimeError('{} returned {}'.format(path, response.status_code))
+            results['{} {}'.format(rule.rule, repo)] = time_call(request, repeats)
+    return results
+
+def run(dbstr, repos=3, repeats=3, methods=None, routes=True):
+    """
+    Benchmarks the methods and routes on the busiest repos of a database
+
+    :param dbstr: Database string, usually of a database filled by ghdata.synthetic
+    :param repos: Number of repos to run each method and route for
+    :return: Dictionary of results, which can be saved as JSON and compared with compare()
+    """
+    from ghdata import GHData
+    ghdata = GHData(dbstr)
+    samples = busiest_repos(ghdata, repos)
+    results = {
+        'database': ghdata.db.dialect.name,
+        'started': datetime.datetime.utcnow().isoformat(),
+        'repos': samples,
+        'repeats': repeats,
+        'methods': benchmark_methods(ghdata, samples, methods=methods, repeats=repeats)
+    }
+    if routes:
+        from ghdata import server
+        # The routes answer from server.client, which is put back for whoever else is using the server
+        previous = server.client
+        server.client = server.GHDataClient(ghdata=ghdata)
+        try:
+            results['routes'] = benchmark_routes(server.app, samples, repeats=repeats)
+        finally:
+            server.client = previous
+    return results
+
+def compare(baseline, current, threshold=0.25, min_seconds=0.005):
+    """
+    Finds what got slower between two runs
+
+    :param threshold: Fraction a median has to grow by to count as a regression
+    :param min_seconds: Differences smaller than this are noise and ignored
+    :return: List of dictionaries with the name, the baseline and current medians and their ratio, slowest first.
+             The ratio is None for things that failed in the current run but not in the baseline, with after None
+             and the error, and for things whose baseline median was 0.
+    """
+    regressions = []
+    for kind in ('methods', 'routes'):
+        for name, before in baseline.get(kind, {}).items():
+            after = current.get(kind, {}).get(name)
+            if after is None or 'error' in before:
+                continue
+            if 'error' in after:
+                regressions.append({'name': name, 'before': before['median'], 'after': None, 'ratio': None, 'error': after['error']})
+            elif after['median'] - before['median'] > min_seconds and after['median'] > before['median'] * (1 + threshold):
+                regressions.append({'name': name, 'before': before['median'], 'after': after['median'],
+                                    'ratio': after['median'] / before['median'] if before['median'] else None})
+    return sorted(regressions, key=lambda r: -(r['ratio'] or float('inf')))
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
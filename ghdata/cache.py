@@ -0,0 +1,202 @@
+#SPDX-License-Identifier: MIT
+
+import sys
+import time
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+
+class MetricCache(object):
+    """
+    Memoizes the results of GHData metric methods with TTL expiry and LRU eviction
+    """
+
+    def __init__(self, ttl=3600, max_size=256 * 1024 * 1024, exclude=None):
+        """
+        :param ttl: Seconds a result stays fresh, None to keep results until they are evicted
+        :param max_size: Approximate number of bytes the cache may hold before evicting the least recently used results
+        :param exclude: Names of GHData methods that should never be cached
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.excluded = set(exclude or [])
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.RLock()
+
+    def enabled_for(self, method):
+        """
+        Whether results of the given method are cached
+        """
+        return method not in self.excluded
+
+    def exclude(self, method):
+        """
+        Opts a method out of caching and drops its cached results
+        """
+        self.excluded.add(method)
+        self.invalidate(method=method)
+
+    @staticmethod
+    def key(method, callargs):
+        """
+        Builds a hashable cache key from a method name and its bound arguments
+
+        :param method: Name of the GHData method
+        :param callargs: Dictionary of argument names to values, as returned by inspect.getcallargs
+        :return: Tuple usable as a cache key
+        """
+        return (method, tuple(sorted((name, freeze(value)) for name, value in callargs.items())))
+
+    def get(self, key):
+        """
+        Looks up a cached result
+
+        :return: Tuple of (hit, value)
+        """
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires, size, value = entry
+            if expires is not None and expires < time.time():
+                self.size -= size
+                self.misses += 1
+                return False, None
+            # Re-inserting moves the entry to the most recently used end
+            self.__entries[key] = entry
+            self.hits += 1
+        return True, copy(value)
+
+    def set(self, key, value):
+        """
+        Stores a result, evicting the least recently used results if the cache is full
+        """
+        size = estimate_size(value)
+        if self.max_size is not None and size > self.max_size:
+            return
+        expires = time.time() + self.ttl if self.ttl is not None else None
+        with self.__lock:
+            old = self.__entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self.__entries[key] = (expires, size, copy(value))
+            self.size += size
+            while self.max_size is not None and self.size > self.max_size:
+                _, (_, evicted_size, _) = self.__entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, method=None, repoid=None):
+        """
+        Drops cached results. With no arguments the whole cache is cleared.
+
+        :param method: Only drop results of this GHData method
+        :param repoid: Only drop results computed for this repository
+        :return: Number of results dropped
+        """
+        with self.__lock:
+            if method is None and repoid is None:
+                dropped = len(self.__entries)
+                self.__entries.clear()
+                self.size = 0
+                return dropped
+            matches = []
+            for key in self.__entries:
+                if method is not None and key[0] != method:
+                    continue
+                if repoid is not None and ('repoid', freeze(repoid)) not in key[1]:
+                    continue
+                matches.append(key)
+            for key in matches:
+                self.size -= self.__entries.pop(key)[1]
+            return len(matches)
+
+    def clear(self):
+        """
+        Drops every cached result
+        """
+        self.invalidate()
+
+    def stats(self):
+        """
+        Counters describing how the cache is performing
+        """
+        with self.__lock:
+            return {
+                'entries': len(self.__entries),
+                'size': self.size,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+def freeze(value):
+    """
+    Converts an argument into a hashable, type-insensitive form so 78852 and '78852' share a key
+    """
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(freeze(v) for v in value)
+    return str(value)
+
+
+def copy(value):
+    """
+    Copies DataFrames so callers can't modify what is stored in the cache
+    """
+    if hasattr(value, 'copy'):
+        return value.copy()
+    return value
+
+
+def estimate_size(value):
+    """
+    Approximates the memory used by a result in bytes
+    """
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    return sys.getsizeof(value)
+
+
+def call_key(cache, func, self, *args, **kwargs):
+    """
+    The key a call of a GHData method is cached under
+
+    :param func: The undecorated method
+    """
+    callargs = inspect.getcallargs(func, self, *args, **kwargs)
+    callargs.pop('self', None)
+    return cache.key(func.__name__, callargs)
+
+
+def cacheable(func):
+    """
+    Decorator that serves a GHData method from self.cache when one is configured
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, 'cache', None)
+        if cache is None or not cache.enabled_for(func.__name__):
+            return func(self, *args, **kwargs)
+        key = call_key(cache, func, self, *args, **kwargs)
+        hit, value = cache.get(key)
+        if hit:
+            return value
+        value = func(self, *args, **kwargs)
+        cache.set(key, value)
+        return value
+    # Lets callers bypass the cache, e.g. when streaming results
+    wrapper.uncached = func
+    return wrapper
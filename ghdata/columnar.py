@@ -0,0 +1,147 @@
+#SPDX-License-Identifier: MIT
+"""
+Runs GHData on GHTorrent tables exported to Parquet, queried in-process with DuckDB
+
+Each table is written as a directory of Parquet files sorted by the column its metrics filter on (usually the
+repo id) and then by date. Every file and row group therefore covers a narrow range of repos and dates. DuckDB
+reads those ranges from the files' statistics and skips the files and row groups a query's repo id and date
+filters exclude.
+"""
+
+import os
+import sqlalchemy as s
+import pandas as pd
+from .ghdata import GHData
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Tables exported, and the columns their rows are sorted by
+COLUMNAR_TABLES = {
+    'users': ['id'],
+    'projects': ['forked_from', 'created_at'],
+    'commits': ['project_id', 'created_at'],
+    'project_commits': ['project_id', 'commit_id'],
+    'commit_comments': ['commit_id', 'created_at'],
+    'watchers': ['repo_id', 'created_at'],
+    'project_members': ['repo_id', 'user_id'],
+    'issues': ['repo_id', 'created_at'],
+    'issue_events': ['issue_id', 'created_at'],
+    'issue_comments': ['issue_id', 'created_at'],
+    'pull_requests': ['base_repo_id', 'id'],
+    'pull_request_history': ['pull_request_id', 'created_at'],
+    'pull_request_comments': ['pull_request_id', 'created_at']
+}
+
+def export(db, directory, tables=None, rows_per_file=1000000, row_group_size=100000):
+    """
+    Writes GHTorrent tables to Parquet files, in the layout ColumnarGHData reads
+
+    :param db: SQLAlchemy engine or database string of the GHTorrent database
+    :param directory: Directory the tables are written to, one subdirectory per table
+    :param tables: Names of the tables to export, all of COLUMNAR_TABLES by default
+    :param rows_per_file: Rows after which a new file is started
+    :param row_group_size: Rows per row group, the unit DuckDB skips with the statistics
+    :return: Dictionary of table names to the number of rows written
+    """
+    if pa is None:
+        raise ImportError('Exporting to Parquet requires pyarrow')
+    if not hasattr(db, 'execute'):
+        db = s.create_engine(db)
+    counts = {}
+    for name in (tables or sorted(COLUMNAR_TABLES)):
+        # Reflected, so dates are read as dates whatever the database stores them as
+        table = s.Table(name, s.MetaData(), autoload_with=db)
+        query = s.select([table]).order_by(*[table.c[column] for column in COLUMNAR_TABLES[name]])
+        path = os.path.join(directory, name)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        for stale in os.listdir(path):
+            if stale.endswith('.parquet'):
+                os.remove(os.path.join(path, stale))
+        counts[name] = _write_table(db, query, arrow_schema(table), path, rows_per_file, row_group_size)
+    return counts
+
+def arrow_schema(table):
+    """
+    Parquet schema of a reflected table, so every chunk is written with the same types even when a chunk's
+    values would make pandas guess others, e.g. floats for integer columns with NULLs
+    """
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, s.DateTime):
+            kind = pa.timestamp('us')
+        elif isinstance(column.type, s.Date):
+            kind = pa.date32()
+        elif isinstance(column.type, s.Integer):
+            kind = pa.int64()
+        elif isinstance(column.type, s.Boolean):
+            kind = pa.bool_()
+        elif isinstance(column.type, (s.Float, s.Numeric)):
+            kind = pa.float64()
+        else:
+            kind = pa.string()
+        fields.append(pa.field(column.name, kind))
+    return pa.schema(fields)
+
+def _write_table(db, query, schema, path, rows_per_file, row_group_size):
+    writer, part, rows, in_file = None, 0, 0, 0
+    with db.connect() as conn:
+        chunks = pd.read_sql(query, conn.execution_options(stream_results=True), chunksize=row_group_size)
+        for chunk in chunks:
+            batch = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None or in_file >= rows_per_file:
+                # Files only end between chunks, so the repos of consecutive files barely overlap
+                if writer is not None:
+                    writer.close()
+                writer = pq.ParquetWriter(os.path.join(path, 'part-{:05d}.parquet'.format(part)), schema)
+                part, in_file = part + 1, 0
+            writer.write_table(batch, row_group_size=row_group_size)
+            rows += len(chunk)
+            in_file += len(chunk)
+    if writer is not None:
+        writer.close()
+    return rows
+
+def attach(db, directory):
+    """
+    Makes the exported tables available to every connection of a DuckDB engine as views with the tables' names
+
+    :param db: SQLAlchemy engine of a duckdb:// database
+    :param directory: Directory export() wrote the tables to
+    """
+    tables = sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+
+    @s.event.listens_for(db, 'connect')
+    def create_views(connection, record):
+        cursor = connection.cursor()
+        # Keeps the files' metadata and statistics in memory between queries
+        cursor.execute('SET enable_object_cache = true')
+        for name in tables:
+            files = os.path.join(directory, name, '*.parquet').replace("'", "''")
+            cursor.execute("CREATE OR REPLACE VIEW {} AS SELECT * FROM read_parquet('{}')".format(name, files))
+        cursor.close()
+    db.dispose()
+    return tables
+
+
+class ColumnarGHData(GHData):
+    """
+    GHData reading Parquet exports of GHTorrent through DuckDB. Has the same methods, which return DataFrames
+    of the same shapes, so the server can run on either.
+
+    The files are read-only: the materialized contributors and the rollups aren't available, scans of the
+    sorted files being what they would save.
+    """
+
+    def __init__(self, directory, public_www_api_key=None, cache=None, resolver=None, pool_options=None, instruments=None):
+        """
+        :param directory: Directory ghdata.columnar.export() wrote the tables to
+        """
+        super(ColumnarGHData, self).__init__('duckdb:///:memory:', public_www_api_key=public_www_api_key, cache=cache,
+                                             resolver=resolver, pool_options=pool_options, instruments=instruments)
+        self.directory = directory
+        self.tables = attach(self.db, directory)
@@ -0,0 +1,171 @@
+#SPDX-License-Identifier: MIT
+"""
+Maintenance commands, run as `ghdata <command>`. Running `ghdata` on its own starts the server.
+"""
+
+import argparse
+from .rollups import ROLLUP_SOURCES
+from .advisor import REPO_METRICS
+from . import benchmark, synthetic
+
+def resolve_repos(client, repos):
+    """
+    Converts owner/repo strings into repoids, skipping repos that can't be found
+    """
+    repoids = []
+    for r in repos:
+        owner, repo = r.split('/', 1)
+        repoid = client.get_raw('repoid', owner=owner, repo=repo)
+        if (repoid):
+            repoids.append(repoid)
+        else:
+            print('Could not find {}'.format(r))
+    return repoids
+
+def refresh_contributors(client, args):
+    refreshed = client.get_raw('refresh_contributors', repoids=resolve_repos(client, args.repos))
+    print('Refreshed contributors of {} repos'.format(len(refreshed)))
+    return 0
+
+def refresh_rollups(client, args):
+    unknown = [event for event in args.events if event not in ROLLUP_SOURCES]
+    if (unknown):
+        print('Unknown events: {}'.format(', '.join(unknown)))
+        return 1
+    watermarks = client.get_raw('refresh_rollups', events=args.events or None)
+    for event in sorted(watermarks):
+        print('{}: rolled up to {}'.format(event, watermarks[event]))
+    return 0
+
+def advise_indexes(client, args):
+    repoids = resolve_repos(client, [args.repo])
+    if (not repoids):
+        return 1
+    methods = [m.strip() for m in args.methods.split(',') if m.strip()] if args.methods else None
+    unknown = [m for m in methods or [] if m not in REPO_METRICS]
+    if (unknown):
+        print('Unknown metrics: {}'.format(', '.join(unknown)))
+        return 1
+    reports = client.get_raw('advise_indexes', repoid=repoids[0], methods=methods, apply=args.apply)
+    for report in reports:
+        print('{}: {:.2f}s'.format(report['method'], report['before']))
+        for plan in report['plans']:
+            for step in plan:
+                if (step['problems']):
+                    print('  {} ({}, {} rows): {}'.format(step['table'], step['access'], step['rows'], ', '.join(step['problems'])))
+        for statement in report['indexes']:
+            print('  {};'.format(statement))
+        if ('after' in report):
+            print('  after: {:.2f}s'.format(report['after']))
+    return 0
+
+def generate_data(client, args):
+    counts = synthetic.generate(args.url, scale=args.scale, skew=args.skew, seed=args.seed)
+    for table in sorted(counts):
+        print('{}: {} rows'.format(table, counts[table]))
+    return 0
+
+def export_parquet(client, args):
+    from .columnar import export, COLUMNAR_TABLES
+    tables = [table.strip() for table in args.tables.split(',') if table.strip()] if args.tables else None
+    unknown = [table for table in tables or [] if table not in COLUMNAR_TABLES]
+    if (unknown):
+        print('Unknown tables: {}'.format(', '.join(unknown)))
+        return 1
+    counts = export(args.url, args.directory, tables=tables, rows_per_file=args.rows_per_file)
+    for table in sorted(counts):
+        print('{}: {} rows'.format(table, counts[table]))
+    return 0
+
+def run_benchmark(client, args):
+    methods = [m.strip() for m in args.methods.split(',') if m.strip()] if args.methods else None
+    results = benchmark.run(args.url, repos=args.repos, repeats=args.repeats, methods=methods, routes=not args.no_routes)
+    for kind in ('methods', 'routes'):
+        for name, timing in sorted(results.get(kind, {}).items()):
+            if ('error' in timing):
+                print('{}: {}'.format(name, timing['error']))
+            else:
+                print('{}: {:.4f}s'.format(name, timing['median']))
+    if (args.output):
+        benchmark.save(results, args.output)
+        print('Saved to {}'.format(args.output))
+    return 0
+
+def compare_benchmarks(client, args):
+    regressions = benchmark.compare(benchmark.load(args.baseline), benchmark.load(args.current), threshold=args.threshold)
+    for r in regressions:
+        if (r['after'] is None):
+            print('{}: now fails with {}'.format(r['name'], r['error']))
+        elif (r['ratio'] is None):
+            # Too fast to time in the baseline, so there is no ratio
+            print('{}: {:.4f}s -> {:.4f}s'.format(r['name'], r['before'], r['after']))
+        else:
+            print('{}: {:.4f}s -> {:.4f}s ({:.0%} slower)'.format(r['name'], r['before'], r['after'], r['ratio'] - 1))
+    print('{} regressions'.format(len(regressions)))
+    return 1 if regressions else 0
+
+def run(client, argv):
+    """
+    Parses the command line and runs the chosen command
+
+    :param client: GHDataClient configured from ghdata.cfg
+    :param argv: Command line arguments, without the program name
+    :return: Exit status
+    """
+    parser = argparse.ArgumentParser(prog='ghdata', description='Without a command, starts the GHData server.')
+    subparsers = parser.add_subparsers(dest='command')
+
+    contributors = subparsers.add_parser('refresh-contributors',
+        help='Materialize contributors of the given repos and refresh every materialized repo with new activity')
+    contributors.add_argument('repos', nargs='*', metavar='owner/repo')
+    contributors.set_defaults(func=refresh_contributors)
+
+    rollups = subparsers.add_parser('refresh-rollups',
+        help='Add rows created since the last refresh to the daily rollup tables')
+    rollups.add_argument('events', nargs='*', metavar='event',
+        help='One of {}, all of them by default'.format(', '.join(sorted(ROLLUP_SOURCES))))
+    rollups.set_defaults(func=refresh_rollups)
+
+    advisor = subparsers.add_parser('advise-indexes',
+        help='EXPLAIN the queries of each metric for a sample repo and suggest indexes for the tables they scan')
+    advisor.add_argument('repo', metavar='owner/repo')
+    advisor.add_argument('--methods', help='Comma separated metrics, all of {} by default'.format(', '.join(REPO_METRICS)))
+    advisor.add_argument('--apply', action='store_true', help='Create the suggested indexes and time the metrics again')
+    advisor.set_defaults(func=advise_indexes)
+
+    generator = subparsers.add_parser('generate-data',
+        help='Fill a database with synthetic GHTorrent-shaped data for benchmarks. Existing GHTorrent tables in it are dropped.')
+    generator.add_argument('url', help='Database string, e.g. sqlite:///benchmark.db')
+    generator.add_argument('--scale', type=float, default=1.0, help='1 makes 200 repos and about 50,000 commits')
+    generator.add_argument('--skew', type=float, default=1.2, help='How much busier popular repos are, 0 for none')
+    generator.add_argument('--seed', type=int, default=0)
+    generator.set_defaults(func=generate_data)
+
+    exporter = subparsers.add_parser('export-parquet',
+        help='Write GHTorrent tables to Parquet files sorted by repo, for the columnar backend ([Database] parquet)')
+    exporter.add_argument('url', help='Database string of the GHTorrent database')
+    exporter.add_argument('directory')
+    exporter.add_argument('--tables', help='Comma separated tables, all of them by default')
+    exporter.add_argument('--rows-per-file', type=int, default=1000000)
+    exporter.set_defaults(func=export_parquet)
+
+    bench = subparsers.add_parser('benchmark', help='Time every metric and route on the busiest repos of a database')
+    bench.add_argument('url', help='Database string, e.g. sqlite:///benchmark.db')
+    bench.add_argument('--repos', type=int, default=3, help='Number of repos to run each metric for')
+    bench.add_argument('--repeats', type=int, default=3)
+    bench.add_argument('--methods', help='Comma separated metrics, all of them by default')
+    bench.add_argument('--no-routes', action='store_true', help='Only time the GHData methods')
+    bench.add_argument('--output', help='Save the results as JSON, for benchmark-compare')
+    bench.set_defaults(func=run_benchmark)
+
+    compare = subparsers.add_parser('benchmark-compare', help='List what got slower between two saved benchmark runs')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.25, help='Fraction a median has to grow by to be a regression')
+    compare.set_defaults(func=compare_benchmarks)
+
+    args = parser.parse_args(argv)
+    if (not hasattr(args, 'func')):
+        parser.print_help()
+        return 1
+    return args.func(client, args)
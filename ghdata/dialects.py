@@ -0,0 +1,84 @@
+#SPDX-License-Identifier: MIT
+"""
+The parts of GHData's SQL that are spelled differently by each database it runs on
+"""
+
+class Dialect(object):
+    """
+    Expressions as MySQL spells them. Other databases override what they spell differently.
+
+    Date buckets are labelled with the first day they contain, and weeks start on Monday, so a
+    timeseries has the same dates whichever database it came from.
+    """
+
+    # Column type of timestamps in the tables GHData creates
+    TIMESTAMP = 'DATETIME'
+
+    BUCKETS = {
+        'DAY': 'DATE({0})',
+        'WEEK': 'DATE(DATE_SUB({0}, INTERVAL WEEKDAY({0}) DAY))',
+        'MONTH': 'DATE(DATE_SUB({0}, INTERVAL DAYOFMONTH({0}) - 1 DAY))',
+        'YEAR': 'MAKEDATE(YEAR({0}), 1)'
+    }
+
+    def bucket(self, column, group_type):
+        """
+        :param column: Expression of a date or datetime
+        :param group_type: Member of GROUP_TYPES, already converted with GHData.convert_group_type
+        :return: Expression of the first day of the bucket the column falls in
+        """
+        return self.BUCKETS[group_type].format(column)
+
+    def days_between(self, start, end):
+        """
+        :return: Expression of the number of calendar days from start to end
+        """
+        return 'DATEDIFF({1}, {0})'.format(start, end)
+
+
+class PostgreSQLDialect(Dialect):
+
+    TIMESTAMP = 'TIMESTAMP'
+
+    BUCKETS = {
+        'DAY': "CAST(DATE_TRUNC('day', {0}) AS DATE)",
+        'WEEK': "CAST(DATE_TRUNC('week', {0}) AS DATE)",
+        'MONTH': "CAST(DATE_TRUNC('month', {0}) AS DATE)",
+        'YEAR': "CAST(DATE_TRUNC('year', {0}) AS DATE)"
+    }
+
+    def days_between(self, start, end):
+        return '(CAST({1} AS DATE) - CAST({0} AS DATE))'.format(start, end)
+
+
+class SQLiteDialect(Dialect):
+
+    BUCKETS = {
+        'DAY': 'DATE({0})',
+        # Back six days, then forward to the next Monday unless already on one
+        'WEEK': "DATE({0}, '-6 days', 'weekday 1')",
+        'MONTH': "DATE({0}, 'start of month')",
+        'YEAR': "DATE({0}, 'start of year')"
+    }
+
+    def days_between(self, start, end):
+        return 'CAST(JULIANDAY(DATE({1})) - JULIANDAY(DATE({0})) AS INTEGER)'.format(start, end)
+
+
+# SQLAlchemy dialect names to their Dialect
+DIALECTS = {
+    'mysql': Dialect(),
+    'mariadb': Dialect(),
+    'postgresql': PostgreSQLDialect(),
+    # DuckDB spells dates the way PostgreSQL does
+    'duckdb': PostgreSQLDialect(),
+    'sqlite': SQLiteDialect()
+}
+
+def dialect_of(db):
+    """
+    The Dialect of an engine. Databases without one of their own get MySQL's spelling.
+
+    :param db: SQLAlchemy engine
+    """
+    return DIALECTS.get(db.dialect.name, DIALECTS['mysql'])
@@ -0,0 +1,128 @@
+#SPDX-License-Identifier: MIT
+"""
+Serializes GHData results into the formats the server can respond with
+"""
+
+import datetime
+import decimal
+import json
+import math
+from .timeseries import encode
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MIMETYPES = {
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+    'msgpack': 'application/msgpack',
+    'series': 'application/vnd.ghdata.series+json'
+}
+
+def available():
+    """
+    Formats whose optional dependencies are installed, in order of preference
+    """
+    formats = ['json', 'csv']
+    if pa is not None:
+        formats += ['arrow', 'parquet']
+    if msgpack is not None:
+        formats.append('msgpack')
+    # Only for gap-filled timeseries, see GHData.filled
+    formats.append('series')
+    return formats
+
+def negotiate(fmt=None, accept=None):
+    """
+    Picks the response format from a format= parameter or an Accept header, JSON by default
+
+    :param fmt: Name of a format requested explicitly
+    :param accept: werkzeug MIMEAccept of the request's Accept header
+    :return: Name of the format, or None if the requested format can't be produced
+    """
+    formats = available()
+    if fmt:
+        return fmt if fmt in formats else None
+    if not accept:
+        return 'json'
+    best = accept.best_match([MIMETYPES[f] for f in formats], default=None)
+    if best is None:
+        return None
+    return [f for f in formats if MIMETYPES[f] == best][0]
+
+def serialize(data, fmt='json'):
+    """
+    Serializes a result in the given format. Anything that isn't a DataFrame is sent as JSON.
+
+    :param data: DataFrame, or any JSON-serializable value
+    :param fmt: Member of MIMETYPES
+    :return: String or bytes
+    """
+    if not hasattr(data, 'to_json'):
+        return data if isinstance(data, str) else json.dumps(data)
+    if fmt == 'json':
+        return data.to_json(orient='records', date_format='iso', date_unit='ms')
+    if fmt == 'series':
+        if 'step' not in data.attrs:
+            raise ValueError('Only gap-filled timeseries can be serialized as series')
+        return json.dumps(encode(data, data.attrs['step']))
+    # Binary and CSV consumers get named indexes like contributors' user_id as a column
+    frame = data.reset_index() if data.index.name is not None else data
+    if fmt == 'csv':
+        return frame.to_csv(index=False)
+    if fmt in ('arrow', 'parquet'):
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        if fmt == 'arrow':
+            writer = pa.RecordBatchStreamWriter(sink, table.schema)
+            writer.write_table(table)
+            writer.close()
+        else:
+            pq.write_table(table, sink)
+        return sink.getvalue().to_pybytes()
+    if fmt == 'msgpack':
+        # Columnar, so keys aren't repeated for each row; dates become msgpack timestamps
+        columns = dict((str(column), [msgpack_value(v) for v in frame[column].tolist()]) for column in frame.columns)
+        return msgpack.packb({'columns': [str(column) for column in frame.columns], 'data': columns},
+                             use_bin_type=True, datetime=True)
+    raise ValueError('Unknown format {}'.format(fmt))
+
+def msgpack_value(value):
+    """
+    Converts the values found in DataFrames into types msgpack can pack natively
+    """
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, datetime.datetime):
+        if hasattr(value, 'to_pydatetime'):
+            # pandas.NaT is also a datetime
+            if value != value:
+                return None
+            value = value.to_pydatetime()
+        return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day, tzinfo=UTC)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
+
+class _UTC(datetime.tzinfo):
+    def utcoffset(self, dt):
+        return datetime.timedelta(0)
+    def tzname(self, dt):
+        return 'UTC'
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+UTC = _UTC()
@@ -10,19 +10,327 @@ else:
     import urllib as url
 import json
 import re
+import threading
+from .cache import cacheable, call_key
+from .resolver import IdResolver
+from .materialized import ContributorTable, CONTRIBUTOR_ACTIVITY_SQL, CONTRIBUTOR_COLUMNS
+from .rollups import DailyRollups, TABLE_EVENTS
+from .pool import PoolStats
+from .timeouts import QueryTimeout, hint_execution_time, remember_connection_ids
+from .instrumentation import Instrumentation
+from .advisor import IndexAdvisor
+from .dialects import dialect_of
+from .pagination import encode_cursor, keyset_condition, order_by, page_params
+from .timeseries import bucket_start, bucket_starts, fill_gaps, resample
 
 class GHData(object):
 
     """Uses GHTorrent and other GitHub data sources and returns dataframes with interesting GitHub indicators"""
 
-    def __init__(self, dbstr, public_www_api_key=None):
+    def __init__(self, dbstr, public_www_api_key=None, cache=None, resolver=None, materialized_contributors=False, rollups=False, pool_options=None, instruments=None):
         """
         Connect to GHTorrent
 t
         :param dbstr: The [database string](http://docs.sqlalchemy.org/en/latest/core/engines.html) to connect to the GHTorrent database
+        :param cache: Optional MetricCache that metric results are memoized in
+        :param resolver: IdResolver that remembers repo and user ids, a default one is created if not given
+        :param materialized_contributors: Serve contributors() from the ghdata_contributors table for repos that have been materialized
+        :param rollups: Serve count-by-date timeseries from the ghdata_daily_counts rollup once it has been refreshed
+        :param pool_options: Dictionary of connection pool settings (pool_size, max_overflow, pool_pre_ping, pool_recycle)
+        :param instruments: Instrumentation that query phases are timed with, a default one is created if not given
         """
-        self.db = s.create_engine(dbstr)
+        self.pool_stats = PoolStats()
+        self.db = s.create_engine(dbstr, **self.pool_stats.engine_options(pool_options))
+        self.pool_stats.listen(self.db)
+        self.dialect = dialect_of(self.db)
+        self.__kill_db = None
+        if self.db.dialect.name == 'mysql':
+            hint_execution_time(self.db)
+            remember_connection_ids(self.db)
+            # Kills get connections of their own, so they don't wait for the pool the overrunning queries hold
+            self.__kill_db = s.create_engine(dbstr, poolclass=s.pool.NullPool)
+        self.__local = threading.local()
         self.PUBLIC_WWW_API_KEY = public_www_api_key
+        self.cache = cache
+        self.resolver = resolver if resolver is not None else IdResolver()
+        self.contributor_table = ContributorTable(self.db)
+        self.materialized_contributors = materialized_contributors
+        self.rollups = DailyRollups(self.db)
+        self.use_rollups = rollups
+        self.instruments = instruments if instruments is not None else Instrumentation()
+
+    def __read_sql(self, sql, params=None, index_col=None):
+        """
+        Runs a query and returns a DataFrame. Inside stream() an iterator of DataFrame chunks read through
+        a server-side cursor is returned instead.
+
+        :param sql: SQLAlchemy text query
+        :param params: Dictionary of bind parameters
+        :param index_col: Column(s) to use as the DataFrame's index
+        """
+        chunksize = getattr(self.__local, 'chunksize', None)
+        budget = getattr(self.__local, 'budget', None)
+        if chunksize:
+            return self.__stream_sql(sql, params, index_col, chunksize, budget)
+        if budget is not None:
+            return self.__budgeted_sql(budget, sql, params, index_col)
+        return self.__query_frame(self.db, sql, params, index_col)
+
+    def __query_frame(self, connectable, sql, params, index_col):
+        """
+        Like pandas.read_sql, but times running the query and building the DataFrame separately
+        """
+        captured = getattr(self.__local, 'captured', None)
+        if captured is not None:
+            captured.append((sql, params))
+        with self.instruments.phase('sql'):
+            result = connectable.execute(sql, params) if params is not None else connectable.execute(sql)
+            columns = list(result.keys())
+            rows = result.fetchall()
+        with self.instruments.phase('frame'):
+            frame = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+            if index_col is not None:
+                frame = frame.set_index(index_col)
+        self.instruments.count_rows(len(frame))
+        return frame
+
+    # MySQL errors of queries stopped by max_execution_time and KILL QUERY
+    INTERRUPTED = (3024, 1317)
+
+    def __budgeted_sql(self, budget, sql, params, index_col):
+        """
+        Runs a query on its own connection, limited to the time left in the budget on MySQL
+        """
+        with self.db.connect() as conn:
+            remaining = budget.remaining()
+            connection_id = conn.connection.info.get('connection_id') if self.__kill_db is not None else None
+            if self.__kill_db is not None:
+                conn = conn.execution_options(max_execution_time=max(int(remaining * 1000), 1))
+            if connection_id is not None:
+                budget.running(connection_id)
+            try:
+                return self.__query_frame(conn, sql, params, index_col)
+            except s.exc.DBAPIError as e:
+                if budget.expired() or getattr(e.orig, 'args', (None,))[0] in self.INTERRUPTED:
+                    raise QueryTimeout(budget.method, budget.seconds)
+                raise
+            finally:
+                if connection_id is not None:
+                    budget.finished(connection_id)
+
+    def __stream_sql(self, sql, params, index_col, chunksize, budget=None):
+        """
+        Reads a query through a server-side cursor chunk by chunk. With a budget, the query is limited to the time
+        left in it on MySQL, and stops between chunks once it is spent.
+        """
+        with self.db.connect() as conn:
+            conn = conn.execution_options(stream_results=True)
+            connection_id = None
+            if budget is not None:
+                remaining = budget.remaining()
+                if self.__kill_db is not None:
+                    connection_id = conn.connection.info.get('connection_id')
+                    conn = conn.execution_options(max_execution_time=max(int(remaining * 1000), 1))
+                if connection_id is not None:
+                    budget.running(connection_id)
+            try:
+                for chunk in pd.read_sql(sql, conn, index_col=index_col, params=params, chunksize=chunksize):
+                    if budget is not None and budget.expired():
+                        raise QueryTimeout(budget.method, budget.seconds)
+                    yield chunk
+            except s.exc.DBAPIError as e:
+                if budget is not None and (budget.expired() or getattr(e.orig, 'args', (None,))[0] in self.INTERRUPTED):
+                    raise QueryTimeout(budget.method, budget.seconds)
+                raise
+            finally:
+                if connection_id is not None:
+                    budget.finished(connection_id)
+
+    # Methods that return their query's rows unchanged, so their results can be streamed
+    STREAMABLE = {'forks', 'contributors', 'committer_locations', 'issue_response_time', 'issues_with_close'}
+
+    # Methods that return a page of their rows when given a limit, and the page after a cursor,
+    # with the number of values in their sort key
+    PAGINATED = {'forks': 1, 'contributors': 2, 'committer_locations': 2, 'issue_response_time': 1}
+
+    # Methods that accept start and end dates
+    DATE_RANGED = {'commits', 'issues', 'stargazers', 'stargazers_grouped', 'forks_grouped', 'forks_grouped_default',
+                   'pulls', 'pulls_grouped', 'contributions', 'issues_with_close', 'issue_response_time',
+                   'issue_response_time_grouped', 'pull_acceptance_rate', 'average_issue_response_time'}
+
+    # Timeseries whose buckets can be brought up to date from a date onward with incremental()
+    INCREMENTAL = {'commits', 'issues', 'pulls_grouped'}
+
+    # Timeseries whose coarser buckets are summed from their cached daily series
+    RESAMPLED = {'stargazers_grouped', 'forks_grouped', 'pulls_grouped'}
+
+    # Timeseries with a row per bucket, and the group type of those that don't take one
+    TIMESERIES = {'commits': 'WEEK', 'issues': 'WEEK', 'stargazers': 'WEEK', 'forks_grouped_default': 'WEEK',
+                  'stargazers_grouped': None, 'forks_grouped': None, 'pulls_grouped': None}
+
+    def stream(self, method, chunksize=1000, budget=None, **kwargs):
+        """
+        Runs a row-level metric without loading all of its rows at once. Results are never cached, nor paged:
+        all of the rows are streamed.
+
+        :param method: Member of STREAMABLE
+        :param chunksize: Number of rows in each DataFrame
+        :param budget: QueryBudget limiting the time the query may run, including while its rows are read
+        :return: Iterator of DataFrames
+        """
+        if method not in self.STREAMABLE:
+            raise ValueError('{} can not be streamed'.format(method))
+        if kwargs.get('limit') is not None or kwargs.get('after') is not None:
+            raise ValueError('Streamed results can not be paged with limit or after')
+        self.__local.chunksize = chunksize
+        self.__local.budget = budget
+        try:
+            chunks = getattr(type(self), method).uncached(self, **kwargs)
+        finally:
+            self.__local.chunksize = None
+            self.__local.budget = None
+        return chunks
+
+    def incremental(self, metric, since, merge=False, **kwargs):
+        """
+        Brings a timeseries up to date from a date onward. Only the buckets from the one since falls in are
+        queried, so the query reads just the recent rows. They replace the same buckets of the full series
+        when it is cached, and the merged series is cached in its place for the next refresh.
+
+        :param metric: Member of INCREMENTAL
+        :param since: Earliest day whose bucket is queried again
+        :param merge: Return the whole series rather than just the buckets from since onward
+        :param kwargs: Arguments of the metric, e.g. repoid and group_type
+        :return: DataFrame of the buckets from since onward, or of all of them if merge is set
+        """
+        if metric not in self.INCREMENTAL:
+            raise ValueError('{} can not be queried incrementally'.format(metric))
+        func = getattr(type(self), metric).uncached
+        start = kwargs.pop('start', None)
+        group_type = self.convert_group_type(kwargs.get('group_type', 'WEEK').upper())
+        first = self.bucket_start(since, group_type)
+        if start is not None and pd.Timestamp(start).date() > first:
+            first = pd.Timestamp(start).date()
+        key, history = None, None
+        if self.cache is not None and self.cache.enabled_for(metric):
+            key = call_key(self.cache, func, self, start=start, **kwargs)
+        recent = None
+        if metric in self.RESAMPLED and group_type != 'DAY':
+            # The daily series the buckets are summed from is brought up to date first, so the cached
+            # series of every group type summed from it stay current
+            daily = self.incremental(metric, first, merge, **dict(kwargs, start=start, group_type='DAY'))
+            if merge:
+                merged = resample(daily, group_type)
+                if key is not None:
+                    self.cache.set(key, merged)
+                return merged
+            recent = resample(daily, group_type)
+        if key is not None:
+            hit, history = self.cache.get(key)
+        if history is None:
+            if merge:
+                # Nothing to merge with, so the whole series is read once and cached for the next refresh
+                return getattr(self, metric)(start=start, **kwargs)
+            return recent if recent is not None else func(self, start=first, **kwargs)
+        if recent is None:
+            recent = func(self, start=first, **kwargs)
+        # A start inside the bucket since falls in labels the bucket with its first day, as the history does
+        older = history[pd.to_datetime(history['date']).dt.date < self.bucket_start(first, group_type)]
+        merged = pd.concat([older, recent], ignore_index=True)
+        if 'repoid' in merged.columns:
+            merged = merged.sort_values(['repoid', 'date'], kind='mergesort').reset_index(drop=True)
+        self.cache.set(key, merged)
+        return merged if merge else recent
+
+    def bucket_start(self, day, group_type='WEEK'):
+        """
+        The first day of the bucket a day falls in, the date the dialects label that bucket with
+
+        :param day: Date, datetime or string
+        :param group_type: Key of member of GROUP_TYPES
+        :return: date
+        """
+        return bucket_start(pd.Timestamp(day).date(), self.convert_group_type(group_type.upper()))
+
+    def filled(self, metric, since=None, merge=False, **kwargs):
+        """
+        Runs a timeseries with a row for every bucket from its first to its last, counting zero in the
+        buckets nothing happened in. With start or end the series spans the buckets they fall in.
+
+        :param metric: Member of TIMESERIES
+        :param since: Only the buckets from the one this day falls in onward, brought up to date with incremental()
+        :param merge: With since, all of the buckets
+        :param kwargs: Arguments of the metric, e.g. repoid and group_type
+        :return: DataFrame with the group type of its buckets in attrs['step']
+        """
+        if metric not in self.TIMESERIES:
+            raise ValueError('{} is not a timeseries'.format(metric))
+        group_type = self.convert_group_type((kwargs.get('group_type') or self.TIMESERIES[metric]).upper())
+        start = kwargs.get('start')
+        if since is not None:
+            frame = self.incremental(metric, since, merge, **kwargs)
+            if not merge and (start is None or pd.Timestamp(since) > pd.Timestamp(start)):
+                start = since
+        else:
+            frame = getattr(self, metric)(**kwargs)
+        frame = fill_gaps(frame, group_type, start, kwargs.get('end'))
+        frame.attrs['step'] = group_type
+        return frame
+
+    def within(self, budget, method, **kwargs):
+        """
+        Calls a metric method, limiting the time its queries may run
+
+        :param budget: QueryBudget for the call
+        :param method: Name of the GHData method
+        """
+        self.__local.budget = budget
+        try:
+            return getattr(self, method)(**kwargs)
+        finally:
+            self.__local.budget = None
+
+    def capture_queries(self, method, **kwargs):
+        """
+        Runs a metric without its cache and records the queries it runs
+
+        :param method: Name of the GHData method
+        :return: List of (sql, params) tuples
+        """
+        self.__local.captured = []
+        try:
+            func = getattr(type(self), method)
+            getattr(func, 'uncached', func)(self, **kwargs)
+            return self.__local.captured
+        finally:
+            self.__local.captured = None
+
+    def advise_indexes(self, repoid, methods=None, apply=False):
+        """
+        Explains the queries of the metrics and suggests indexes for the tables they scan, see IndexAdvisor.advise
+        """
+        return IndexAdvisor(self).advise(repoid, methods=methods, apply=apply)
+
+    def cancel(self, budget):
+        """
+        Stops the queries still running for a budget that has run out
+        """
+        def kill(connection_id):
+            try:
+                with self.__kill_db.connect() as conn:
+                    conn.execute('KILL QUERY {}'.format(int(connection_id)))
+            except s.exc.SQLAlchemyError:
+                # The query may have finished already, the budget is spent either way
+                pass
+        budget.cancel(kill if self.__kill_db is not None else None)
+
+    def pool_status(self):
+        """
+        Statistics about the database connection pool
+
+        :return: Dictionary with counts of checkouts, waits and connections created, and the pool's current size
+        """
+        return self.pool_stats.as_dict(self.db.pool)
 
     def convert_group_type(self, group_type):
         group_types = {'DAY', 'WEEK', 'MONTH', 'YEAR'}
@@ -34,7 +342,52 @@ t
                 group_type = 'WEEK'
         return group_type
 
-    def __single_table_count_by_date(self, table, repo_col='project_id', group_type='WEEK'):
+    def __date_range(self, column, start=None, end=None):
+        """
+        Condition for a WHERE clause that keeps the rows dated from start to end. It compares the column
+        itself, not a function of it, so an index on the column can be used.
+
+        :param column: Date or datetime column the range applies to
+        :return: String starting with AND, empty if there are no bounds
+        """
+        condition = ''
+        if start is not None:
+            condition += ' AND {} >= :start'.format(column)
+        if end is not None:
+            condition += ' AND {} < :end'.format(column)
+        return condition
+
+    def __date_params(self, params, start=None, end=None):
+        """
+        Adds the bind parameters of __date_range to a query's parameters
+
+        :param start: Earliest day included, as a date, datetime or string
+        :param end: Last day included, as a date, datetime or string
+        :return: The parameters
+        """
+        if start is not None:
+            params['start'] = pd.Timestamp(start).date()
+        if end is not None:
+            # The whole of the last day is included
+            params['end'] = (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).date()
+        return params
+
+    def __page(self, frame, limit, key):
+        """
+        Stores the cursor of the page after a paginated result in frame.attrs['next_cursor']. It is None when
+        the page wasn't full, as there are no more rows.
+
+        :param frame: DataFrame of the page
+        :param limit: Number of rows asked for
+        :param key: Function from the index and the Series of the page's last row to its sort key values
+        :return: The frame
+        """
+        if limit is not None:
+            full = len(frame) > 0 and len(frame) >= int(limit)
+            frame.attrs['next_cursor'] = encode_cursor(key(frame.index[-1], frame.iloc[-1])) if full else None
+        return frame
+
+    def __single_table_count_by_date(self, table, repo_col='project_id', group_type='WEEK', batch=False, start=None, end=None):
         """
         Generates query string to count occurances of rows per date for a given table.
         External input must never be sent to this function, it is for internal use only.
@@ -42,14 +395,95 @@ t
         :param table: The table in GHTorrent to generate the string for
         :param repo_col: The column in that table with the project ids
         :param group_type: Member of GROUP_TYPES, determines grouping granularity
+        :param batch: Count for every repo in the :repoids list at once instead of just :repoid
+        :param start: Only count rows created on or after :start
+        :param end: Only count rows created before :end
         :return: Query string
         """
-        gt = group_type.upper()
+        bucket = self.dialect.bucket('created_at', self.convert_group_type(group_type.upper()))
+        dates = self.__date_range('created_at', start, end)
+        if batch:
+            return """
+                SELECT {1} AS "repoid", {2} AS "date", COUNT(*) AS "{0}"
+                FROM {0}
+                WHERE {1} IN :repoids{3}
+                GROUP BY {1}, {2}
+                ORDER BY {1}, {2}""".format(table, repo_col, bucket, dates)
         return """
-            SELECT date(created_at) AS "date", COUNT(*) AS "{0}"
+            SELECT {2} AS "date", COUNT(*) AS "{0}"
             FROM {0}
-            WHERE {1} = :repoid
-            GROUP BY {2}(created_at)""".format(table, repo_col, self.convert_group_type(gt))
+            WHERE {1} = :repoid{3}
+            GROUP BY {2}
+            ORDER BY {2}""".format(table, repo_col, bucket, dates)
+
+    def __count_by_date(self, repoid, table, repo_col='project_id', group_type='WEEK', start=None, end=None):
+        """
+        Runs the __single_table_count_by_date query for one repo, or for a list of repos as a single
+        grouped query returning a long-format DataFrame with a repoid column
+
+        :param repoid: The id of a project, or a list of them
+        :param start: Earliest day counted
+        :param end: Last day counted
+        :return: DataFrame with counts per date
+        """
+        batch = isinstance(repoid, (list, tuple))
+        event = TABLE_EVENTS.get(table)
+        if self.use_rollups and event is not None and self.rollups.available(event):
+            countSQL = s.sql.text(self.rollups.count_by_date(event, table, self.convert_group_type(group_type.upper()), batch,
+                                                             dates=self.__date_range('day', start, end)))
+        else:
+            countSQL = s.sql.text(self.__single_table_count_by_date(table, repo_col, group_type, batch, start, end))
+        if batch:
+            countSQL = countSQL.bindparams(s.bindparam('repoids', expanding=True))
+            return self.__read_sql(countSQL, params=self.__date_params({"repoids": [str(r) for r in repoid]}, start, end))
+        return self.__read_sql(countSQL, params=self.__date_params({"repoid": str(repoid)}, start, end))
+
+    def data_watermark(self):
+        """
+        When the data was last brought up to date, taken from the rollup's high-water marks
+
+        :return: datetime, or None if the rollup was never refreshed
+        """
+        watermark = self.rollups.latest_watermark()
+        return pd.Timestamp(watermark).to_pydatetime() if watermark is not None else None
+
+    # Tables whose newest rows mark the last import, found through their primary keys
+    VERSIONED_TABLES = ['projects', 'commits', 'issues', 'pull_request_history']
+
+    def data_version(self):
+        """
+        Identifies the imported data by the newest row of the main tables. It changes whenever rows are imported
+        and is the same in every process serving the data.
+
+        :return: Tuple of (version string, datetime the newest row or the rollup's watermark was created), None if the
+                 tables can't be read
+        """
+        ids, dates = [], []
+        try:
+            for table in self.VERSIONED_TABLES:
+                newest = self.db.execute('SELECT id, created_at FROM {0} WHERE id = (SELECT MAX(id) FROM {0})'.format(table)).first()
+                ids.append(str(newest[0]) if newest is not None else '0')
+                if newest is not None and newest[1] is not None:
+                    dates.append(pd.Timestamp(newest[1]).to_pydatetime())
+        except s.exc.DBAPIError:
+            return None
+        watermark = self.data_watermark()
+        if watermark is not None:
+            dates.append(watermark)
+        return '-'.join(ids), max(dates) if dates else None
+
+    def refresh_rollups(self, events=None):
+        """
+        Brings the daily rollup up to date with the rows added since the last refresh
+
+        :param events: Names of the events to refresh, all of them by default
+        :return: Dictionary of refreshed events to their new high-water marks
+        """
+        watermarks = self.rollups.refresh(events)
+        if self.cache is not None:
+            for method in ['commits', 'issues', 'stargazers', 'stargazers_grouped', 'forks_grouped', 'pulls', 'pulls_grouped']:
+                self.cache.invalidate(method=method)
+        return watermarks
 
     def repoid(self, owner, repo):
         """
@@ -60,13 +494,49 @@ t
         :param repo: The name of the repository
         :return: The repository's ID as it appears in the GHTorrent projects table
         """
+        hit, repoid = self.resolver.get_repo(owner, repo)
+        if hit:
+            return repoid
         reposql = s.sql.text('SELECT projects.id FROM projects INNER JOIN users ON projects.owner_id = users.id WHERE projects.name = :repo AND users.login = :owner')
         repoid = 0
         result = self.db.execute(reposql, repo=repo, owner=owner)
         for row in result:
             repoid = row[0]
+        self.resolver.set_repo(owner, repo, repoid)
         return repoid
 
+    def prefetch_repoids(self, repos, batch_size=500):
+        """
+        Resolves many repositories at once so later calls to repoid() don't touch the database
+
+        :param repos: List of (owner, repo) tuples or 'owner/repo' strings
+        :param batch_size: Number of repositories looked up per query
+        :return: Number of repositories that were found
+        """
+        pairs = [tuple(r) if isinstance(r, (list, tuple)) else tuple(r.split('/', 1)) for r in repos]
+        found = 0
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            conditions = []
+            params = {}
+            for i, (owner, repo) in enumerate(batch):
+                conditions.append('(users.login = :owner{0} AND projects.name = :repo{0})'.format(i))
+                params['owner{}'.format(i)] = owner
+                params['repo{}'.format(i)] = repo
+            reposql = s.sql.text("""
+                SELECT users.login, projects.name, projects.id
+                FROM projects INNER JOIN users ON projects.owner_id = users.id
+                WHERE {}""".format(' OR '.join(conditions)))
+            ids = {}
+            for row in self.db.execute(reposql, **params):
+                ids[IdResolver.repo_key(row[0], row[1])] = row[2]
+            for owner, repo in batch:
+                repoid = ids.get(IdResolver.repo_key(owner, repo), 0)
+                self.resolver.set_repo(owner, repo, repoid)
+                if repoid:
+                    found += 1
+        return found
+
     def userid(self, username):
         """
         Returns the userid given a username
@@ -74,164 +544,162 @@ t
         :param username: GitHub username to be matched against the login table in GHTorrent
         :return: The id from the users table in GHTorrent
         """
+        hit, userid = self.resolver.get_user(username)
+        if hit:
+            return userid
         reposql = s.sql.text('SELECT users.id FROM users WHERE users.login = :username')
         userid = 0
         result = self.db.execute(reposql, username=username)
         for row in result:
             userid = row[0]
+        self.resolver.set_user(username, userid)
         return userid
 
 
     # Basic timeseries queries
+    @cacheable
     def stargazers(self, repoid, start=None, end=None):
         """
         Timeseries of when people starred a repo
 
-        :param repoid: The id of the project in the projects table. Use repoid() to get this.
+        :param repoid: The id of the project in the projects table, or a list of ids. Use repoid() to get this.
+        :param start: Earliest day included, all of the history by default
+        :param end: Last day included, up to now by default
         :return: DataFrame with stargazers/day
         """
-        stargazersSQL = s.sql.text(self.__single_table_count_by_date('watchers', 'repo_id'))
-        return pd.read_sql(stargazersSQL, self.db, params={"repoid": str(repoid)})
+        return self.__count_by_date(repoid, 'watchers', 'repo_id', start=start, end=end)
 
-    def commits(self, repoid):
+    @cacheable
+    def commits(self, repoid, start=None, end=None):
         """
         Timeseries of all the commits on a repo
 
-        :param repoid: The id of the project in the projects table. Use repoid() to get this.
+        :param repoid: The id of the project in the projects table, or a list of ids. Use repoid() to get this.
+        :param start: Earliest day included, all of the history by default
+        :param end: Last day included, up to now by default
         :return: DataFrame with commits/day
         """
-        commitsSQL = s.sql.text(self.__single_table_count_by_date('commits'))
-        return pd.read_sql(commitsSQL, self.db, params={"repoid": str(repoid)})
+        return self.__count_by_date(repoid, 'commits', start=start, end=end)
 
-    def forks_grouped(self, repoid, group_type):
+    @cacheable
+    def forks_grouped(self, repoid, group_type, start=None, end=None):
         """
         Timeseries of when a repo's forks were created
 
-        :param repoid: The id of the project in the projects table. Use repoid() to get this.
+        :param repoid: The id of the project in the projects table, or a list of ids. Use repoid() to get this.
         :param group_type: Key of member of GROUP_TYPES, otherwise defaults to WEEK on failed lookup
+        :param start: Earliest day included, all of the history by default
+        :param end: Last day included, up to now by default
         :return: DataFrame with count of forks created grouped by group_type, i.e. year, month, week, or day.
         """
-        forksSQL = s.sql.text(self.__single_table_count_by_date('projects', 'forked_from', group_type))
-        return pd.read_sql(forksSQL, self.db, params={"repoid": str(repoid)})
+        group_type = self.convert_group_type(group_type.upper())
+        if group_type != 'DAY':
+            return resample(self.forks_grouped(repoid, 'DAY', start, end), group_type)
+        return self.__count_by_date(repoid, 'projects', 'forked_from', 'DAY', start, end)
 
-    def issues(self, repoid):
+    @cacheable
+    def issues(self, repoid, start=None, end=None):
         """
         Timeseries of when people starred a repo
 
-        :param repoid: The id of the project in the projects table. Use repoid() to get this.
+        :param repoid: The id of the project in the projects table, or a list of ids. Use repoid() to get this.
+        :param start: Earliest day included, all of the history by default
+        :param end: Last day included, up to now by default
         :return: DataFrame with issues/day
         """
-        issuesSQL = s.sql.text(self.__single_table_count_by_date('issues', 'repo_id'))
-        return pd.read_sql(issuesSQL, self.db, params={"repoid": str(repoid)})
+        return self.__count_by_date(repoid, 'issues', 'repo_id', start=start, end=end)
 
-    def issues_with_close(self, repoid):
+    @cacheable
+    def issues_with_close(self, repoid, start=None, end=None):
         """
         How long on average each week it takes to close an issue
 
         :param repoid: The id of the project in the projects table. Use repoid() to get this.
+        :param start: Earliest day an included issue was opened
+        :param end: Last day an included issue was opened
         :return: DataFrame with issues/day
         """
         issuesSQL = s.sql.text("""
             SELECT issues.id as "id",
                    issues.created_at as "date",
-                   DATEDIFF(closed.created_at, issues.created_at)  AS "days_to_close"
+                   {0}  AS "days_to_close"
             FROM issues
 
            JOIN
                 (SELECT * FROM issue_events
-                 WHERE issue_events.action = "closed") closed
+                 WHERE issue_events.action = 'closed') closed
             ON issues.id = closed.issue_id
 
-            WHERE issues.repo_id = :repoid""")
-        return pd.read_sql(issuesSQL, self.db, params={"repoid": str(repoid)})
+            WHERE issues.repo_id = :repoid{1}""".format(self.dialect.days_between('issues.created_at', 'closed.created_at'),
+                                                     self.__date_range('issues.created_at', start, end)))
+        return self.__read_sql(issuesSQL, params=self.__date_params({"repoid": str(repoid)}, start, end))
 
-    def pulls(self, repoid):
+    @cacheable
+    def pulls(self, repoid, start=None, end=None):
         """
         Timeseries of pull requests creation, also gives their associated activity
 
         :param repoid: The id of the project in the projects table. Use repoid() to get this.
+        :param start: Earliest day included, all of the history by default
+        :param end: Last day included, up to now by default
         :return: DataFrame with pull requests by day
         """
-        pullsSQL = s.sql.text("""
-            SELECT date(pull_request_history.created_at) AS "date",
-            (COUNT(pull_requests.id)) AS "pull_requests",
-            (SELECT COUNT(*) FROM pull_request_comments
-            WHERE pull_request_comments.pull_request_id = pull_request_history.pull_request_id) AS "comments"
-            FROM pull_request_history
-            INNER JOIN pull_requests
-            ON pull_request_history.pull_request_id = pull_requests.id
-            WHERE pull_requests.head_repo_id = :repoid
-            AND pull_request_history.action = "merged"
-            GROUP BY WEEK(pull_request_history.created_at)
-        """)
-        return pd.read_sql(pullsSQL, self.db, params={"repoid": str(repoid)})
+        return self.__pulls_by_date(repoid, 'WEEK', start, end)
 
-    def contributors(self, repoid):
+    @cacheable
+    def contributors(self, repoid, limit=None, after=None):
         """
         All the contributors to a project and the counts of their contributions
 
         :param repoid: The id of the project in the projects table. Use repoid() to get this.
-        :return: DataFrame with users id, users login, and their contributions by type
+        :param limit: Number of contributors in a page, all of them by default
+        :param after: Cursor of the previous page, from its attrs['next_cursor']
+        :return: DataFrame with users id, users login, and their contributions by type, most commits first
         """
-        contributorsSQL = s.sql.text("""
-            SELECT * FROM
-
-               (
-               SELECT   users.id        as "user_id",
-                        users.login     as "login",
-                        users.location  as "location",
-                        com.count       as "commits",
-                        pulls.count     as "pull_requests",
-                        iss.count       as "issues",
-                        comcoms.count   as "commit_comments",
-                        pullscoms.count as "pull_request_comments",
-                        isscoms.count   as "issue_comments",
-                        com.count + pulls.count + iss.count + comcoms.count + pullscoms.count + isscoms.count as "total"
-
-               FROM users
-
-               LEFT JOIN (SELECT committer_id AS id, COUNT(*) AS count FROM commits INNER JOIN project_commits ON project_commits.commit_id = commits.id WHERE project_commits.project_id = :repoid GROUP BY commits.committer_id) AS com
-               ON com.id = users.id
-
-               LEFT JOIN (SELECT pull_request_history.actor_id AS id, COUNT(*) AS count FROM pull_request_history JOIN pull_requests ON pull_requests.id = pull_request_history.pull_request_id WHERE pull_requests.base_repo_id = :repoid AND pull_request_history.action = 'merged' GROUP BY pull_request_history.actor_id) AS pulls
-               ON pulls.id = users.id
-
-               LEFT JOIN (SELECT reporter_id AS id, COUNT(*) AS count FROM issues WHERE issues.repo_id = :repoid GROUP BY issues.reporter_id) AS iss
-               ON iss.id = users.id
-
-               LEFT JOIN (SELECT commit_comments.user_id AS id, COUNT(*) AS count FROM commit_comments JOIN project_commits ON project_commits.commit_id = commit_comments.commit_id WHERE project_commits.project_id = :repoid GROUP BY commit_comments.user_id) AS comcoms
-               ON comcoms.id = users.id
-
-               LEFT JOIN (SELECT pull_request_comments.user_id AS id, COUNT(*) AS count FROM pull_request_comments JOIN pull_requests ON pull_request_comments.pull_request_id = pull_requests.id WHERE pull_requests.base_repo_id = :repoid GROUP BY pull_request_comments.user_id) AS pullscoms
-               ON pullscoms.id = users.id
-
-               LEFT JOIN (SELECT issue_comments.user_id AS id, COUNT(*) AS count FROM issue_comments JOIN issues ON issue_comments.issue_id = issues.id WHERE issues.repo_id = :repoid GROUP BY issue_comments.user_id) AS isscoms
-               ON isscoms.id = users.id
-
-               GROUP BY users.id
-               ORDER BY com.count DESC
-               ) user_activity
+        params = page_params({"repoid": str(repoid)}, after, limit, self.PAGINATED['contributors'])
+        if self.materialized_contributors and self.contributor_table.is_materialized(repoid):
+            contributorsSQL = s.sql.text(self.contributor_table.query(after is not None, limit is not None))
+        else:
+            keys = [('COALESCE(activity.commits, 0)', 'DESC'), ('activity.user_id', 'ASC')]
+            contributorsSQL = s.sql.text("""
+                SELECT users.id AS "user_id", users.login AS "login", users.location AS "location", {0}
+                FROM ({1}) AS activity
+                JOIN users ON users.id = activity.user_id{2}
+                ORDER BY {3}{4}
+            """.format(', '.join('activity.' + column for column in CONTRIBUTOR_COLUMNS), CONTRIBUTOR_ACTIVITY_SQL,
+                       ' WHERE ' + keyset_condition(keys) if after is not None else '', order_by(keys),
+                       ' LIMIT :limit' if limit is not None else ''))
+        contributors = self.__read_sql(contributorsSQL, index_col=['user_id'], params=params)
+        return self.__page(contributors, limit, lambda index, row: [int(row['commits']) if pd.notnull(row['commits']) else 0, int(index)])
+
+    def refresh_contributors(self, repoids=None):
+        """
+        Updates the materialized contributor table: materializes the given repos and refreshes
+        every materialized repo that has new activity since it was last refreshed
 
-            WHERE commits IS NOT NULL
-            OR    pull_requests IS NOT NULL
-            OR    issues IS NOT NULL
-            OR    commit_comments IS NOT NULL
-            OR    pull_request_comments IS NOT NULL
-            OR    issue_comments IS NOT NULL;
-        """)
-        return pd.read_sql(contributorsSQL, self.db, index_col=['user_id'], params={"repoid": str(repoid)})
+        :param repoids: Ids of repos to materialize or refresh unconditionally
+        :return: List of the repoids that were refreshed
+        """
+        refreshed = self.contributor_table.refresh_stale(repoids)
+        if self.cache is not None:
+            for repoid in refreshed:
+                self.cache.invalidate(method='contributors', repoid=repoid)
+        return refreshed
 
 
-    def contributions(self, repoid, userid=None):
+    @cacheable
+    def contributions(self, repoid, userid=None, start=None, end=None):
         """
         Timeseries of all the contributions to a project, optionally limited to a specific user
 
         :param repoid: The id of the project in the projects table.
         :param userid: The id of user if you want to limit the contributions to a specific user.
+        :param start: Earliest day included, all of the history by default
+        :param end: Last day included, up to now by default
         :return: DataFrame with all of the contributions seperated by day.
         """
         rawContributionsSQL = """
-            SELECT  DATE(coms.created_at) as "date",
+            SELECT  coms.day              as "date",
                     coms.count            as "commits",
                     pulls.count           as "pull_requests",
                     iss.count             as "issues",
@@ -240,45 +708,52 @@ t
                     isscoms.count         as "issue_comments",
                     coms.count + pulls.count + iss.count + comcoms.count + pullscoms.count + isscoms.count as "total"
 
-            FROM (SELECT created_at AS created_at, COUNT(*) AS count FROM commits INNER JOIN project_commits ON project_commits.commit_id = commits.id WHERE project_commits.project_id = :repoid[[ AND commits.author_id = :userid]] GROUP BY DATE(created_at)) coms
+            FROM (SELECT DATE(commits.created_at) AS day, COUNT(*) AS count FROM commits INNER JOIN project_commits ON project_commits.commit_id = commits.id WHERE project_commits.project_id = :repoid[[ AND commits.author_id = :userid]]{0} GROUP BY DATE(commits.created_at)) coms
 
-            LEFT JOIN (SELECT pull_request_history.created_at AS created_at, COUNT(*) AS count FROM pull_request_history JOIN pull_requests ON pull_requests.id = pull_request_history.pull_request_id WHERE pull_requests.base_repo_id = :repoid AND pull_request_history.action = 'merged'[[ AND pull_request_history.actor_id = :userid]] GROUP BY DATE(created_at)) AS pulls
-            ON DATE(pulls.created_at) = DATE(coms.created_at)
+            LEFT JOIN (SELECT DATE(pull_request_history.created_at) AS day, COUNT(*) AS count FROM pull_request_history JOIN pull_requests ON pull_requests.id = pull_request_history.pull_request_id WHERE pull_requests.base_repo_id = :repoid AND pull_request_history.action = 'merged'[[ AND pull_request_history.actor_id = :userid]]{1} GROUP BY DATE(pull_request_history.created_at)) AS pulls
+            ON pulls.day = coms.day
 
-            LEFT JOIN (SELECT issues.created_at AS created_at, COUNT(*) AS count FROM issues WHERE issues.repo_id = :repoid[[ AND issues.reporter_id = :userid]] GROUP BY DATE(created_at)) AS iss
-            ON DATE(iss.created_at) = DATE(coms.created_at)
+            LEFT JOIN (SELECT DATE(issues.created_at) AS day, COUNT(*) AS count FROM issues WHERE issues.repo_id = :repoid[[ AND issues.reporter_id = :userid]]{2} GROUP BY DATE(issues.created_at)) AS iss
+            ON iss.day = coms.day
 
-            LEFT JOIN (SELECT commit_comments.created_at AS created_at, COUNT(*) AS count FROM commit_comments JOIN project_commits ON project_commits.commit_id = commit_comments.commit_id WHERE project_commits.project_id = :repoid[[ AND commit_comments.user_id = :userid]] GROUP BY DATE(commit_comments.created_at)) AS comcoms
-            ON DATE(comcoms.created_at) = DATE(coms.created_at)
+            LEFT JOIN (SELECT DATE(commit_comments.created_at) AS day, COUNT(*) AS count FROM commit_comments JOIN project_commits ON project_commits.commit_id = commit_comments.commit_id WHERE project_commits.project_id = :repoid[[ AND commit_comments.user_id = :userid]]{3} GROUP BY DATE(commit_comments.created_at)) AS comcoms
+            ON comcoms.day = coms.day
 
-            LEFT JOIN (SELECT pull_request_comments.created_at AS created_at, COUNT(*) AS count FROM pull_request_comments JOIN pull_requests ON pull_request_comments.pull_request_id = pull_requests.id WHERE pull_requests.base_repo_id = :repoid[[ AND pull_request_comments.user_id = :userid]] GROUP BY DATE(pull_request_comments.created_at)) AS pullscoms
-            ON DATE(pullscoms.created_at) = DATE(coms.created_at)
+            LEFT JOIN (SELECT DATE(pull_request_comments.created_at) AS day, COUNT(*) AS count FROM pull_request_comments JOIN pull_requests ON pull_request_comments.pull_request_id = pull_requests.id WHERE pull_requests.base_repo_id = :repoid[[ AND pull_request_comments.user_id = :userid]]{4} GROUP BY DATE(pull_request_comments.created_at)) AS pullscoms
+            ON pullscoms.day = coms.day
 
-            LEFT JOIN (SELECT issue_comments.created_at AS created_at, COUNT(*) AS count FROM issue_comments JOIN issues ON issue_comments.issue_id = issues.id WHERE issues.repo_id = :repoid[[ AND issue_comments.user_id = :userid]] GROUP BY DATE(issue_comments.created_at)) AS isscoms
-            ON DATE(isscoms.created_at) = DATE(coms.created_at)
+            LEFT JOIN (SELECT DATE(issue_comments.created_at) AS day, COUNT(*) AS count FROM issue_comments JOIN issues ON issue_comments.issue_id = issues.id WHERE issues.repo_id = :repoid[[ AND issue_comments.user_id = :userid]]{5} GROUP BY DATE(issue_comments.created_at)) AS isscoms
+            ON isscoms.day = coms.day
 
-            ORDER BY DATE(coms.created_at)
-        """
+            ORDER BY coms.day
+        """.format(*[self.__date_range(column, start, end) for column in ['commits.created_at', 'pull_request_history.created_at',
+                     'issues.created_at', 'commit_comments.created_at', 'pull_request_comments.created_at', 'issue_comments.created_at']])
+        params = self.__date_params({"repoid": str(repoid)}, start, end)
 
         if (userid is not None and len(userid) > 0):
             rawContributionsSQL = rawContributionsSQL.replace('[[', '')
             rawContributionsSQL = rawContributionsSQL.replace(']]', '')
             parameterized = s.sql.text(rawContributionsSQL)
-            return pd.read_sql(parameterized, self.db, params={"repoid": str(repoid), "userid": str(userid)})
+            params["userid"] = str(userid)
+            return self.__read_sql(parameterized, params=params)
         else:
             rawContributionsSQL = re.sub(r'\[\[.+?\]\]', '', rawContributionsSQL)
             parameterized = s.sql.text(rawContributionsSQL)
-            return pd.read_sql(parameterized, self.db, params={"repoid": str(repoid)})
+            return self.__read_sql(parameterized, params=params)
 
-    def committer_locations(self, repoid):
+    @cacheable
+    def committer_locations(self, repoid, limit=None, after=None):
         """
         Return committers and their locations
 
         @todo: Group by country code instead of users, needs the new schema
 
         :param repoid: The id of the project in the projects table.
+        :param limit: Number of committers in a page, all of them by default
+        :param after: Cursor of the previous page, from its attrs['next_cursor']
         :return: DataFrame with users and locations sorted by commtis
         """
+        keys = [('COUNT(*)', 'DESC'), ('users.login', 'ASC')]
         rawContributionsSQL = s.sql.text("""
             SELECT users.login, users.location, COUNT(*) AS "commits"
             FROM commits
@@ -288,37 +763,74 @@ t
             ON users.id = commits.author_id
             WHERE project_commits.project_id = :repoid
             AND LENGTH(users.location) > 1
-            GROUP BY users.id
-            ORDER BY commits DESC
-        """)
-        return pd.read_sql(rawContributionsSQL, self.db, params={"repoid": str(repoid)})
+            GROUP BY users.id, users.login, users.location{0}
+            ORDER BY {1}{2}
+        """.format(' HAVING ' + keyset_condition(keys) if after is not None else '', order_by(keys),
+                   ' LIMIT :limit' if limit is not None else ''))
+        locations = self.__read_sql(rawContributionsSQL, params=page_params({"repoid": str(repoid)}, after, limit, self.PAGINATED['committer_locations']))
+        return self.__page(locations, limit, lambda index, row: [int(row['commits']), row['login']])
 
 
-    def issue_response_time(self, repoid):
+    @cacheable
+    def issue_response_time(self, repoid, start=None, end=None, limit=None, after=None):
         """
         How long it takes for issues to be responded to by people who have commits associate with the project
 
         :param repoid: The id of the project in the projects table.
+        :param start: Earliest day an included issue was opened
+        :param end: Last day an included issue was opened
+        :param limit: Number of issues in a page, all of them by default
+        :param after: Cursor of the previous page, from its attrs['next_cursor']
         :return: DataFrame with the issues' id the date it was
                  opened, and the date it was first responded to
         """
+        # The issue id is only read as the sort key of pages
         issuesSQL = s.sql.text("""
-            SELECT issues.created_at               AS "created_at",
+            SELECT {1}issues.created_at               AS "created_at",
                    MIN(issue_comments.created_at)  AS "responded_at"
             FROM issues
             JOIN issue_comments
             ON issue_comments.issue_id = issues.id
-            WHERE issue_comments.user_id IN
-                (SELECT users.id
-                FROM users
-                JOIN commits
-                WHERE commits.author_id = users.id
-                AND commits.project_id = :repoid)
-            AND issues.repo_id = :repoid
-            GROUP BY issues.id
-        """)
-        return pd.read_sql(issuesSQL, self.db, params={"repoid": str(repoid)})
+            WHERE issues.repo_id = :repoid
+            AND EXISTS (SELECT 1 FROM commits
+                        WHERE commits.project_id = :repoid
+                        AND commits.author_id = issue_comments.user_id){0}{2}
+            GROUP BY issues.id, issues.created_at
+            ORDER BY issues.id{3}
+        """.format(self.__date_range('issues.created_at', start, end), 'issues.id AS "issue_id", ' if limit is not None else '',
+                   ' AND ' + keyset_condition([('issues.id', 'ASC')]) if after is not None else '',
+                   ' LIMIT :limit' if limit is not None else ''))
+        params = page_params(self.__date_params({"repoid": str(repoid)}, start, end), after, limit, self.PAGINATED['issue_response_time'])
+        if limit is None:
+            return self.__read_sql(issuesSQL, params=params)
+        issues = self.__page(self.__read_sql(issuesSQL, params=params), limit, lambda index, row: [int(row['issue_id'])])
+        return issues.drop(columns=['issue_id'])
+
+    @cacheable
+    def issue_response_time_grouped(self, repoid, group_type='MONTH', start=None, end=None):
+        """
+        Percentiles of how long the issues opened in each period took to be responded to by people who have
+        commits associated with the project, computed from the cached rows of issue_response_time()
 
+        :param repoid: The id of the project in the projects table.
+        :param group_type: Key of member of GROUP_TYPES, the periods issues are grouped by when they were opened
+        :param start: Earliest day an included issue was opened
+        :param end: Last day an included issue was opened
+        :return: DataFrame with the first day of each period, the number of issues responded to, and the
+                 50th, 90th and 99th percentiles of the days they took
+        """
+        columns = ['date', 'issues', 'p50_days', 'p90_days', 'p99_days']
+        issues = self.issue_response_time(repoid, start=start, end=end)
+        if not len(issues):
+            return pd.DataFrame(columns=columns)
+        days = (pd.to_datetime(issues['responded_at']) - pd.to_datetime(issues['created_at'])).dt.total_seconds() / 86400
+        periods = days.groupby(bucket_starts(issues['created_at'], self.convert_group_type(group_type.upper())).rename('date'), sort=True)
+        percentiles = periods.quantile([0.5, 0.9, 0.99]).unstack()
+        percentiles.columns = columns[2:]
+        percentiles.insert(0, 'issues', periods.size())
+        return percentiles.reset_index()[columns]
+
+    @cacheable
     def linking_websites(self, repoid):
         """
         Finds the repo's popularity on the internet
@@ -341,44 +853,50 @@ t
         result =  pd.read_csv(r, delimiter=';', header=None, names=['url', 'rank'])
         return result
 
-    def pull_acceptance_rate(self, repoid):
+    @cacheable
+    def pull_acceptance_rate(self, repoid, start=None, end=None):
         """
         Timeseries of pull request acceptance rate (Number of pull requests merged on a date over Number of pull requests opened on a date)
 
         :param repoid: The id of the project in the projects table.
+        :param start: Earliest day included, all of the history by default
+        :param end: Last day included, up to now by default
         :return: DataFrame with the pull acceptance rate and the dates
         """
 
         pullAcceptanceSQL = s.sql.text("""
 
-        SELECT DATE(date_created) AS "date", CAST(num_approved AS DECIMAL)/CAST(num_open AS DECIMAL) AS "rate"
+        SELECT date_created AS "date", 1.0 * num_approved / num_open AS "rate"
         FROM
             (SELECT COUNT(DISTINCT pull_request_id) AS num_approved, DATE(pull_request_history.created_at) AS accepted_on
             FROM pull_request_history
             JOIN pull_requests ON pull_request_history.pull_request_id = pull_requests.id
-            WHERE action = 'merged' AND pull_requests.base_repo_id = :repoid
+            WHERE action = 'merged' AND pull_requests.base_repo_id = :repoid{0}
             GROUP BY accepted_on) accepted
         JOIN
             (SELECT count(distinct pull_request_id) AS num_open, DATE(pull_request_history.created_at) AS date_created
             FROM pull_request_history
             JOIN pull_requests ON pull_request_history.pull_request_id = pull_requests.id
             WHERE action = 'opened'
-            AND pull_requests.base_repo_id = :repoid
+            AND pull_requests.base_repo_id = :repoid{0}
             GROUP BY date_created) opened
         ON opened.date_created = accepted.accepted_on
-        """)
+        """.format(self.__date_range('pull_request_history.created_at', start, end)))
 
-        return pd.read_sql(pullAcceptanceSQL, self.db, params={"repoid": str(repoid)})
+        return self.__read_sql(pullAcceptanceSQL, params=self.__date_params({"repoid": str(repoid)}, start, end))
 
     # ----- Added endpoints -----
 
         # -- Milestone 3 endpoints --
 
-    def average_issue_response_time(self, repoid):
+    @cacheable
+    def average_issue_response_time(self, repoid, start=None, end=None):
         """
         The average time it takes for issues to be responded to by people who have commits associate with the project
 
         :param repoid: The id of the project in the projects table.
+        :param start: Earliest day an included issue was opened
+        :param end: Last day an included issue was opened
         :return: DataFrame with the issues' id the date it was
                  opened, and the date it was first responded to
         """
@@ -386,7 +904,7 @@ t
             SELECT avg(time_to_member_comment_in_days) as avg_days_to_member_comment, MAX(time_to_member_comment_in_days) as max_days_to_member_comment, MIN(time_to_member_comment_in_days) as min_days_to_member_comment, project_name, url
             FROM
             (
-            SELECT DATEDIFF(earliest_member_comment, issue_created) time_to_member_comment_in_days, project_id, issue_id, project_name, url
+            SELECT {0} time_to_member_comment_in_days, project_id, issue_id, project_name, url
             FROM
             (SELECT projects.id as project_id,
                     MIN(issue_comments.created_at) as earliest_member_comment,
@@ -397,12 +915,70 @@ t
                 join issues on issues.repo_id = projects.id
                 join issue_comments on issue_comments.issue_id = issues.id
             where issue_comments.user_id = project_members.user_id
-            and projects.id = :repoid
-            group by issues.id) as earliest_member_comments) as time_to_member_comment
-            group by project_id
-        """)
-        return pd.read_sql(avgissuesSQL, self.db, params={"repoid": str(repoid)})
+            and projects.id = :repoid{1}
+            group by issues.id, issues.created_at, projects.id, projects.name, url) as earliest_member_comments) as time_to_member_comment
+            group by project_id, project_name, url
+        """.format(self.dialect.days_between('issue_created', 'earliest_member_comment'),
+                   self.__date_range('issues.created_at', start, end)))
+        return self.__read_sql(avgissuesSQL, params=self.__date_params({"repoid": str(repoid)}, start, end))
+
+    @cacheable
+    def __relative_activity_counts(self, repoid):
+        """
+        Shared engine for the relative activity metrics. Scans each contribution table once, splitting
+        its rows between project members and everyone else with conditional aggregation.
 
+        :param repoid: The id of the project in the projects table. Use repoid() to get this.
+        :return: DataFrame indexed by contribution type (commits, issues, issue_cmnts, pullreqs,
+                 pullreq_cmnts and members) with pm and nonpm counts
+        """
+        members = "(SELECT DISTINCT user_id FROM project_members WHERE repo_id = :repoid)"
+        countsSQL = s.sql.text("""
+            SELECT 'commits' AS source,
+                   COUNT(CASE WHEN pm.user_id IS NOT NULL THEN 1 END) AS pm,
+                   COUNT(CASE WHEN pm.user_id IS NULL AND c.author_id IS NOT NULL THEN 1 END) AS nonpm
+            FROM commits AS c
+            LEFT JOIN {0} AS pm ON pm.user_id = c.author_id
+            WHERE c.project_id = :repoid
+            UNION ALL
+            SELECT 'issues',
+                   COUNT(CASE WHEN pm.user_id IS NOT NULL THEN 1 END),
+                   COUNT(CASE WHEN pm.user_id IS NULL AND i.reporter_id IS NOT NULL THEN 1 END)
+            FROM issues AS i
+            LEFT JOIN {0} AS pm ON pm.user_id = i.reporter_id
+            WHERE i.repo_id = :repoid
+            UNION ALL
+            SELECT 'issue_cmnts',
+                   COUNT(CASE WHEN pm.user_id IS NOT NULL THEN 1 END),
+                   COUNT(CASE WHEN pm.user_id IS NULL AND ic.user_id IS NOT NULL THEN 1 END)
+            FROM issue_comments AS ic
+            JOIN issues AS i ON ic.issue_id = i.id
+            LEFT JOIN {0} AS pm ON pm.user_id = ic.user_id
+            WHERE i.repo_id = :repoid
+            UNION ALL
+            SELECT 'pullreqs',
+                   COUNT(CASE WHEN pm.user_id IS NOT NULL THEN 1 END),
+                   COUNT(CASE WHEN pm.user_id IS NULL AND pr.user_id IS NOT NULL THEN 1 END)
+            FROM pull_requests AS pr
+            LEFT JOIN {0} AS pm ON pm.user_id = pr.user_id
+            WHERE (pr.base_repo_id = :repoid OR pr.head_repo_id = :repoid)
+            UNION ALL
+            SELECT 'pullreq_cmnts',
+                   COUNT(CASE WHEN pm.user_id IS NOT NULL THEN 1 END),
+                   COUNT(CASE WHEN pm.user_id IS NULL AND pc.user_id IS NOT NULL THEN 1 END)
+            FROM pull_request_comments AS pc
+            JOIN pull_requests AS pr ON pc.pull_request_id = pr.id
+            LEFT JOIN {0} AS pm ON pm.user_id = pc.user_id
+            WHERE (pr.base_repo_id = :repoid OR pr.head_repo_id = :repoid)
+            UNION ALL
+            SELECT 'members', COUNT(user_id), 0
+            FROM project_members
+            WHERE repo_id = :repoid
+        """.format(members))
+        counts = self.__read_sql(countsSQL, index_col='source', params={"repoid": str(repoid)})
+        return counts.astype('int64')
+
+    @cacheable
     def relative_activity(self, repoid):
         """
         The number of contributions from project members vs the number of contributions from other users.
@@ -413,49 +989,18 @@ t
         :return: DataFrame with number of project members, total contributions of all project members,
         total contributions of non-project members, and the ratio of pm_contributions / non-pm_contributions.
         """
-        relactSQL = s.sql.text("""
-        select
-	(select count(user_id) from project_members where repo_id = :repoid) as total_contributors
-    , ((select count(id) from commits where project_id = :repoid and author_id in (select user_id from project_members where repo_id = :repoid)) +
-	(select count(id) from issues where repo_id = :repoid and reporter_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(ic.comment_id) from issue_comments as ic, issues as i
-		where ic.issue_id = i.id and i.repo_id = :repoid and ic.user_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(id) from pull_requests where (base_repo_id = :repoid or head_repo_id = :repoid)
-		and user_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(pc.comment_id) from pull_request_comments as pc, pull_requests as pr
-		where pc.pull_request_id = pr.id and (pr.base_repo_id = :repoid or pr.head_repo_id = :repoid)
-        and pc.user_id in (select user_id from project_members where repo_id = :repoid))) as total_pm_contributions
-	, ((select count(id) from commits where project_id = :repoid and not author_id in (select user_id from project_members where repo_id = :repoid)) +
-	(select count(id) from issues where repo_id = :repoid and not reporter_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(ic.comment_id) from issue_comments as ic, issues as i
-		where ic.issue_id = i.id and i.repo_id = :repoid and not ic.user_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(id) from pull_requests where (base_repo_id = :repoid or head_repo_id = :repoid)
-		and not user_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(pc.comment_id) from pull_request_comments as pc, pull_requests as pr
-		where pc.pull_request_id = pr.id and (pr.base_repo_id = :repoid or pr.head_repo_id = :repoid)
-        and not pc.user_id in (select user_id from project_members where repo_id = :repoid))) as total_nonpm_contributions
-	, (((select count(id) from commits where project_id = :repoid and author_id in (select user_id from project_members where repo_id = :repoid)) +
-	(select count(id) from issues where repo_id = :repoid and reporter_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(ic.comment_id) from issue_comments as ic, issues as i
-		where ic.issue_id = i.id and i.repo_id = :repoid and ic.user_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(id) from pull_requests where (base_repo_id = :repoid or head_repo_id = :repoid)
-		and user_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(pc.comment_id) from pull_request_comments as pc, pull_requests as pr
-		where pc.pull_request_id = pr.id and (pr.base_repo_id = :repoid or pr.head_repo_id = :repoid)
-        and pc.user_id in (select user_id from project_members where repo_id = :repoid)))
-	/
-    ((select count(id) from commits where project_id = :repoid and not author_id in (select user_id from project_members where repo_id = :repoid)) +
-	(select count(id) from issues where repo_id = :repoid and not reporter_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(ic.comment_id) from issue_comments as ic, issues as i
-		where ic.issue_id = i.id and i.repo_id = :repoid and not ic.user_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(id) from pull_requests where (base_repo_id = :repoid or head_repo_id = :repoid)
-		and not user_id in (select user_id from project_members where repo_id = :repoid)) +
-    (select count(pc.comment_id) from pull_request_comments as pc, pull_requests as pr
-		where pc.pull_request_id = pr.id and (pr.base_repo_id = :repoid or pr.head_repo_id = :repoid)
-        and not pc.user_id in (select user_id from project_members where repo_id = :repoid)))) as pm_over_nonpm_ratio
-;""")
-        return pd.read_sql(relactSQL, self.db, params={"repoid": str(repoid)})
-
+        counts = self.__relative_activity_counts(repoid)
+        contributions = counts.drop('members')
+        pm = int(contributions['pm'].sum())
+        nonpm = int(contributions['nonpm'].sum())
+        return pd.DataFrame([{
+            'total_contributors': int(counts.loc['members', 'pm']),
+            'total_pm_contributions': pm,
+            'total_nonpm_contributions': nonpm,
+            'pm_over_nonpm_ratio': float(pm) / nonpm if nonpm else None
+        }], columns=['total_contributors', 'total_pm_contributions', 'total_nonpm_contributions', 'pm_over_nonpm_ratio'])
+
+    @cacheable
     def relative_activity_pm(self, repoid):
         """
         Breakdown of contributions by project members only.
@@ -463,36 +1008,15 @@ t
         :return: DataFrame with total commits, issues, issue comments, pull requests, and pull request commments made
         by project members.
         """
-        relact_pmSQL = s.sql.text("""
-        select
-	(select count(user_id) from project_members where repo_id = :repoid) as total_pm_contributors
-    , ((select count(id) from commits where project_id = :repoid and author_id in (select user_id from project_members where repo_id = :repoid)) +
-		(select count(id) from issues where repo_id = :repoid and reporter_id in (select user_id from project_members where repo_id = :repoid)) +
-		(select count(ic.comment_id) from issue_comments as ic, issues as i
-			where ic.issue_id = i.id and i.repo_id = :repoid and ic.user_id in (select user_id from project_members where repo_id = :repoid)) +
-		(select count(id) from pull_requests where (base_repo_id = :repoid or head_repo_id = :repoid)
-			and user_id in (select user_id from project_members where repo_id = :repoid)) +
-		(select count(pc.comment_id) from pull_request_comments as pc, pull_requests as pr
-			where pc.pull_request_id = pr.id and (pr.base_repo_id = :repoid or pr.head_repo_id = :repoid)
-			and pc.user_id in (select user_id from project_members where repo_id = :repoid)))
-	as total_pm_contributions
-	, (select count(id) from commits where project_id = :repoid and author_id in (select user_id from project_members where repo_id = :repoid))
-    as pm_commits
-	, (select count(id) from issues where repo_id = :repoid and reporter_id in (select user_id from project_members where repo_id = :repoid))
-    as pm_issues
-    , (select count(ic.comment_id) from issue_comments as ic, issues as i
-		where ic.issue_id = i.id and i.repo_id = :repoid and ic.user_id in (select user_id from project_members where repo_id = :repoid))
-	as pm_issue_cmnts
-    , (select count(id) from pull_requests where (base_repo_id = :repoid or head_repo_id = :repoid)
-		and user_id in (select user_id from project_members where repo_id = :repoid))
-	as pm_pullreqs
-    , (select count(pc.comment_id) from pull_request_comments as pc, pull_requests as pr
-		where pc.pull_request_id = pr.id and (pr.base_repo_id = :repoid or pr.head_repo_id = :repoid)
-        and pc.user_id in (select user_id from project_members where repo_id = :repoid))
-	as pm_pullreq_cmnts
-;""")
-        return pd.read_sql(relact_pmSQL, self.db, params={"repoid": str(repoid)})
-
+        counts = self.__relative_activity_counts(repoid)['pm']
+        kinds = ['commits', 'issues', 'issue_cmnts', 'pullreqs', 'pullreq_cmnts']
+        row = {'total_pm_contributors': int(counts['members']),
+               'total_pm_contributions': int(counts[kinds].sum())}
+        for kind in kinds:
+            row['pm_' + kind] = int(counts[kind])
+        return pd.DataFrame([row], columns=['total_pm_contributors', 'total_pm_contributions'] + ['pm_' + kind for kind in kinds])
+
+    @cacheable
     def relative_activity_nonpm(self, repoid):
         """
         Breakdown of contributions by non-project members only.
@@ -500,68 +1024,84 @@ t
         :return: DataFrame with total commits, issues, issue comments, pull requests, and pull request commments made
         by non-project members.
         """
-        relact_npmSQL = s.sql.text("""
-        select
-	(select count(id) from commits where project_id = :repoid and not author_id in (select user_id from project_members where repo_id = :repoid))
-    as nonpm_commits
-	, (select count(id) from issues where repo_id = :repoid and not reporter_id in (select user_id from project_members where repo_id = :repoid))
-    as nonpm_issues
-    , (select count(ic.comment_id) from issue_comments as ic, issues as i
-		where ic.issue_id = i.id and i.repo_id = :repoid and not ic.user_id in (select user_id from project_members where repo_id = :repoid))
-	as nonpm_issue_cmnts
-    , (select count(id) from pull_requests where (base_repo_id = :repoid or head_repo_id = :repoid)
-		and not user_id in (select user_id from project_members where repo_id = :repoid))
-	as nonpm_pullreqs
-    , (select count(pc.comment_id) from pull_request_comments as pc, pull_requests as pr
-		where pc.pull_request_id = pr.id and (pr.base_repo_id = :repoid or pr.head_repo_id = :repoid)
-        and not pc.user_id in (select user_id from project_members where repo_id = :repoid))
-	as nonpm_pullreq_cmnts
-;""")
-        return pd.read_sql(relact_npmSQL, self.db, params={"repoid": str(repoid)})
+        counts = self.__relative_activity_counts(repoid)['nonpm']
+        kinds = ['commits', 'issues', 'issue_cmnts', 'pullreqs', 'pullreq_cmnts']
+        return pd.DataFrame([dict(('nonpm_' + kind, int(counts[kind])) for kind in kinds)],
+                            columns=['nonpm_' + kind for kind in kinds])
 
         # -- Milestone 2 endpoints
 
+    @cacheable
     def stargazers_grouped(self, repoid, group_type='WEEK', start=None, end=None):
         """
         Timeseries of when people starred a repo
 
-        :param repoid: The id of the project in the projects table. Use repoid() to get this.
+        :param repoid: The id of the project in the projects table, or a list of ids. Use repoid() to get this.
         :param group_type: Key of member of GROUP_TYPES, otherwise defaults to WEEK on failed lookup
+        :param start: Earliest day included, all of the history by default
+        :param end: Last day included, up to now by default
         :return: DataFrame with stargazers per [group_type]
         """
-        stargazersSQL = s.sql.text(self.__single_table_count_by_date(
-            'watchers', 'repo_id', group_type))
-        return pd.read_sql(stargazersSQL, self.db, params={"repoid": str(repoid)})
+        group_type = self.convert_group_type(group_type.upper())
+        if group_type != 'DAY':
+            return resample(self.stargazers_grouped(repoid, 'DAY', start, end), group_type)
+        return self.__count_by_date(repoid, 'watchers', 'repo_id', 'DAY', start, end)
 
-    def pulls_grouped(self, repoid, group_type):
+    @cacheable
+    def pulls_grouped(self, repoid, group_type, start=None, end=None):
         """
         Timeseries of pull requests creation, also gives their associated activity
 
         :param repoid: The id of the project in the projects table. Use repoid() to get this.
         :param group_type: Member of GROUP_TYPES; specifies how granular the returned data is.
+        :param start: Earliest day included, all of the history by default
+        :param end: Last day included, up to now by default
         :return: DataFrame with pull requests grouped by group_type, i.e. year, month, week, or day.
         """
-        gt = group_type.upper()
+        group_type = self.convert_group_type(group_type.upper())
+        if group_type != 'DAY':
+            return resample(self.pulls_grouped(repoid, 'DAY', start, end), group_type)
+        return self.__pulls_by_date(repoid, 'DAY', start, end)
+
+    def __pulls_by_date(self, repoid, group_type, start=None, end=None):
+        """
+        Counts the pull requests merged in each bucket and the comments made on them
+
+        :param repoid: The id of the project in the projects table.
+        :param group_type: Member of GROUP_TYPES
+        :param start: Earliest day of a merge counted
+        :param end: Last day of a merge counted
+        :return: DataFrame with date, pull_requests and comments columns
+        """
+        gt = self.convert_group_type(group_type.upper())
+        params = self.__date_params({"repoid": str(repoid)}, start, end)
+        if self.use_rollups and self.rollups.available('pulls_merged', 'pull_comments'):
+            return self.__read_sql(s.sql.text(self.rollups.pulls_by_date(gt, dates=self.__date_range('day', start, end))), params=params)
         pullsSQL = s.sql.text("""
-                     SELECT date(pull_request_history.created_at) AS "date",
-                     (COUNT(pull_requests.id)) AS "pull_requests",
-                     (SELECT COUNT(*) FROM pull_request_comments
-                     WHERE pull_request_comments.pull_request_id = pull_request_history.pull_request_id) AS "comments"
+                     SELECT {0} AS "date",
+                     COUNT(pull_requests.id) AS "pull_requests",
+                     SUM((SELECT COUNT(*) FROM pull_request_comments
+                     WHERE pull_request_comments.pull_request_id = pull_request_history.pull_request_id)) AS "comments"
                      FROM pull_request_history
                      INNER JOIN pull_requests
                      ON pull_request_history.pull_request_id = pull_requests.id
                      WHERE pull_requests.head_repo_id = :repoid
-                     AND pull_request_history.action = "merged"
-                     GROUP BY {0}(pull_request_history.created_at)
-                 """.format(self.convert_group_type(gt)))
-        return pd.read_sql(pullsSQL, self.db, params={"repoid": str(repoid)})
-
-    def forks(self, repoid):
+                     AND pull_request_history.action = 'merged'{1}
+                     GROUP BY {0}
+                     ORDER BY {0}
+                 """.format(self.dialect.bucket('pull_request_history.created_at', gt),
+                            self.__date_range('pull_request_history.created_at', start, end)))
+        return self.__read_sql(pullsSQL, params=params)
+
+    @cacheable
+    def forks(self, repoid, limit=None, after=None):
         """
         Gets all forks for a repo.  Meant for future UI functionality and reuse within other metrics.
 
         :param repoid: The id of the project in the projects table. Use repoid() to get this.
-        :return: DataFrame with forks of the repo.
+        :param limit: Number of forks in a page, all of them by default
+        :param after: Cursor of the previous page, from its attrs['next_cursor']
+        :return: DataFrame with forks of the repo, oldest id first.
         """
         forksSQL = s.sql.text("""
         SELECT
@@ -575,19 +1115,25 @@ t
             , users AS u
         WHERE
             p.owner_id = u.id
-            AND p.forked_from = :repoid;
-        """)
-        return pd.read_sql(forksSQL, self.db, params={"repoid": str(repoid)})
-
-    def forks_grouped_default(self, repoid):
+            AND p.forked_from = :repoid{0}
+        ORDER BY p.id{1}
+        """.format(' AND ' + keyset_condition([('p.id', 'ASC')]) if after is not None else '',
+                   ' LIMIT :limit' if limit is not None else ''))
+        forks = self.__read_sql(forksSQL, params=page_params({"repoid": str(repoid)}, after, limit, self.PAGINATED['forks']))
+        return self.__page(forks, limit, lambda index, row: [int(row['id'])])
+
+    def forks_grouped_default(self, repoid, start=None, end=None):
         """
         Alias for forks_grouped(repoid, 'WEEK').
 
-        :param repoid: The id of the project in the projects table. Use repoid() to get this.
+        :param repoid: The id of the project in the projects table, or a list of ids. Use repoid() to get this.
+        :param start: Earliest day included, all of the history by default
+        :param end: Last day included, up to now by default
         :return: DataFrame with count of forks created by week.
         """
-        return self.forks_grouped(repoid, 'WEEK')
+        return self.forks_grouped(repoid, 'WEEK', start, end)
 
+    @cacheable
     def issue_actions(self, repoid):
         """
         Gets how many times an action of each type was performed on an issue in the repo.
@@ -607,4 +1153,4 @@ t
         )
         GROUP BY action;
         """)
-        return pd.read_sql(issueActionsSQL, self.db, params={"repoid": str(repoid)})
\ No newline at end of file
+        return self.__read_sql(issueActionsSQL, params={"repoid": str(repoid)})
\ No newline at end of file
@@ -0,0 +1,149 @@
+#SPDX-License-Identifier: MIT
+"""
+Latency histograms and counters, exposed in the Prometheus text exposition format
+"""
+
+import time
+import threading
+import contextlib
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+BYTE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000, 100000000)
+
+class Histogram(object):
+    """
+    Cumulative histogram of observations for each combination of label values
+    """
+
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.__series = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.__lock:
+            series = self.__series.get(label_values)
+            if series is None:
+                series = self.__series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def expose(self):
+        lines = ['# HELP {} {}'.format(self.name, self.help), '# TYPE {} histogram'.format(self.name)]
+        with self.__lock:
+            series = sorted(self.__series.items())
+            for label_values, (counts, count, total) in series:
+                labels = format_labels(self.labels, label_values)
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append('{}_bucket{} {}'.format(self.name, format_labels(self.labels + ('le',), label_values + (format_value(bound),)), bucket_count))
+                lines.append('{}_bucket{} {}'.format(self.name, format_labels(self.labels + ('le',), label_values + ('+Inf',)), count))
+                lines.append('{}_sum{} {}'.format(self.name, labels, format_value(total)))
+                lines.append('{}_count{} {}'.format(self.name, labels, count))
+        return lines
+
+
+class Instrumentation(object):
+    """
+    Times the phases of requests and GHData method calls
+
+    Request phases (resolve, compute, serialize) are collected on the thread handling the request, method phases
+    (sql, frame) on the thread running the method, so both work when methods run on a worker pool.
+    """
+
+    def __init__(self):
+        self.requests = Histogram('ghdata_request_duration_seconds', 'Time spent handling requests, by route and phase',
+                                  ('route', 'phase'), DURATION_BUCKETS)
+        self.response_bytes = Histogram('ghdata_response_bytes', 'Size of response bodies, by route',
+                                        ('route',), BYTE_BUCKETS)
+        self.methods = Histogram('ghdata_method_duration_seconds', 'Time spent in GHData methods, by method and phase',
+                                 ('method', 'phase'), DURATION_BUCKETS)
+        self.rows = Histogram('ghdata_method_rows', 'Rows returned by the queries of GHData methods',
+                              ('method',), ROW_BUCKETS)
+        self.__local = threading.local()
+
+    def begin_request(self):
+        self.__local.request = {'started': time.time(), 'phases': {}}
+
+    def end_request(self, route, size=None):
+        """
+        Records the phases of the request handled on this thread
+
+        :param route: URL rule of the request
+        :param size: Bytes in the response body, None if it was streamed
+        """
+        request = getattr(self.__local, 'request', None)
+        if request is None:
+            return
+        self.__local.request = None
+        for phase, seconds in request['phases'].items():
+            self.requests.observe(seconds, route, phase)
+        self.requests.observe(time.time() - request['started'], route, 'total')
+        if size is not None:
+            self.response_bytes.observe(size, route)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Times a phase of the current request, or of the GHData method running on this thread
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            elapsed = time.time() - start
+            method = getattr(self.__local, 'method', None)
+            request = getattr(self.__local, 'request', None)
+            if method is not None:
+                self.methods.observe(elapsed, method, name)
+            elif request is not None:
+                request['phases'][name] = request['phases'].get(name, 0) + elapsed
+
+    @contextlib.contextmanager
+    def method(self, name):
+        """
+        Attributes the phases timed inside to the given GHData method
+        """
+        outer = getattr(self.__local, 'method', None)
+        self.__local.method = name
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.methods.observe(time.time() - start, name, 'total')
+            self.__local.method = outer
+
+    def count_rows(self, rows):
+        method = getattr(self.__local, 'method', None)
+        if method is not None:
+            self.rows.observe(rows, method)
+
+    def expose(self, counters=None):
+        """
+        Renders everything in the text exposition format
+
+        :param counters: List of (name, type, help, value) of counters and gauges read from elsewhere, like cache stats
+        :return: String
+        """
+        lines = []
+        for histogram in (self.requests, self.response_bytes, self.methods, self.rows):
+            lines += histogram.expose()
+        for name, kind, help, value in counters or []:
+            lines += ['# HELP {} {}'.format(name, help), '# TYPE {} {}'.format(name, kind), '{} {}'.format(name, format_value(value))]
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(names, values):
+    return '{' + ','.join('{}="{}"'.format(n, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                          for n, v in zip(names, values)) + '}'
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
@@ -0,0 +1,194 @@
+#SPDX-License-Identifier: MIT
+
+import sqlalchemy as s
+from .dialects import dialect_of
+from .pagination import keyset_condition, order_by
+
+# Per-user contribution counts for the repo in :repoid. Starts from the six activity sources
+# instead of the users table, so its cost depends on the size of the repo, not of GHTorrent.
+# Counts are NULL when a user has no contributions of that type.
+CONTRIBUTOR_ACTIVITY_SQL = """
+    SELECT user_id,
+           SUM(CASE WHEN source = 'commits' THEN amount END)               AS "commits",
+           SUM(CASE WHEN source = 'pull_requests' THEN amount END)         AS "pull_requests",
+           SUM(CASE WHEN source = 'issues' THEN amount END)                AS "issues",
+           SUM(CASE WHEN source = 'commit_comments' THEN amount END)       AS "commit_comments",
+           SUM(CASE WHEN source = 'pull_request_comments' THEN amount END) AS "pull_request_comments",
+           SUM(CASE WHEN source = 'issue_comments' THEN amount END)        AS "issue_comments",
+           SUM(amount)                                                     AS "total"
+    FROM (
+        SELECT commits.committer_id AS user_id, 'commits' AS source, COUNT(*) AS amount
+        FROM commits INNER JOIN project_commits ON project_commits.commit_id = commits.id
+        WHERE project_commits.project_id = :repoid
+        GROUP BY commits.committer_id
+        UNION ALL
+        SELECT pull_request_history.actor_id, 'pull_requests', COUNT(*)
+        FROM pull_request_history JOIN pull_requests ON pull_requests.id = pull_request_history.pull_request_id
+        WHERE pull_requests.base_repo_id = :repoid AND pull_request_history.action = 'merged'
+        GROUP BY pull_request_history.actor_id
+        UNION ALL
+        SELECT issues.reporter_id, 'issues', COUNT(*)
+        FROM issues
+        WHERE issues.repo_id = :repoid
+        GROUP BY issues.reporter_id
+        UNION ALL
+        SELECT commit_comments.user_id, 'commit_comments', COUNT(*)
+        FROM commit_comments JOIN project_commits ON project_commits.commit_id = commit_comments.commit_id
+        WHERE project_commits.project_id = :repoid
+        GROUP BY commit_comments.user_id
+        UNION ALL
+        SELECT pull_request_comments.user_id, 'pull_request_comments', COUNT(*)
+        FROM pull_request_comments JOIN pull_requests ON pull_request_comments.pull_request_id = pull_requests.id
+        WHERE pull_requests.base_repo_id = :repoid
+        GROUP BY pull_request_comments.user_id
+        UNION ALL
+        SELECT issue_comments.user_id, 'issue_comments', COUNT(*)
+        FROM issue_comments JOIN issues ON issue_comments.issue_id = issues.id
+        WHERE issues.repo_id = :repoid
+        GROUP BY issue_comments.user_id
+    ) AS contributions
+    WHERE user_id IS NOT NULL
+    GROUP BY user_id
+"""
+
+CONTRIBUTOR_COLUMNS = ['commits', 'pull_requests', 'issues', 'commit_comments', 'pull_request_comments', 'issue_comments', 'total']
+
+# The activity sources of CONTRIBUTOR_ACTIVITY_SQL: the table whose created_at dates the activity, the tables
+# it is read from, and the column holding the repo's id
+ACTIVITY_SOURCES = [
+    ('commits', 'project_commits JOIN commits ON commits.id = project_commits.commit_id', 'project_commits.project_id'),
+    ('pull_request_history', 'pull_request_history JOIN pull_requests ON pull_requests.id = pull_request_history.pull_request_id',
+     'pull_requests.base_repo_id'),
+    ('issues', 'issues', 'issues.repo_id'),
+    ('commit_comments', 'commit_comments JOIN project_commits ON project_commits.commit_id = commit_comments.commit_id',
+     'project_commits.project_id'),
+    ('pull_request_comments', 'pull_request_comments JOIN pull_requests ON pull_request_comments.pull_request_id = pull_requests.id',
+     'pull_requests.base_repo_id'),
+    ('issue_comments', 'issue_comments JOIN issues ON issue_comments.issue_id = issues.id', 'issues.repo_id'),
+]
+
+
+class ContributorTable(object):
+    """
+    Materialized per-repo contributor counts, kept up to date by refreshing repos with new activity
+    """
+
+    TABLE = 'ghdata_contributors'
+    WATERMARK_TABLE = 'ghdata_contributors_watermarks'
+
+    def __init__(self, db):
+        """
+        :param db: SQLAlchemy engine connected to the GHTorrent database
+        """
+        self.db = db
+        self.dialect = dialect_of(db)
+
+    def create(self):
+        """
+        Creates the tables if they don't exist yet
+        """
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS {} (
+                repo_id               INTEGER NOT NULL,
+                user_id               INTEGER NOT NULL,
+                commits               INTEGER,
+                pull_requests         INTEGER,
+                issues                INTEGER,
+                commit_comments       INTEGER,
+                pull_request_comments INTEGER,
+                issue_comments        INTEGER,
+                total                 INTEGER,
+                PRIMARY KEY (repo_id, user_id)
+            )""".format(self.TABLE))
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS {} (
+                repo_id   INTEGER NOT NULL PRIMARY KEY,
+                watermark {}
+            )""".format(self.WATERMARK_TABLE, self.dialect.TIMESTAMP))
+
+    def is_materialized(self, repoid):
+        """
+        Whether the repo has been materialized at least once
+        """
+        try:
+            result = self.db.execute(s.sql.text('SELECT 1 FROM {} WHERE repo_id = :repoid'.format(self.WATERMARK_TABLE)), repoid=repoid)
+        except s.exc.DBAPIError:
+            # The refresh job hasn't created the tables yet
+            return False
+        return result.first() is not None
+
+    def query(self, after=False, limit=False):
+        """
+        Generates the query string that reads the materialized repo in :repoid in the same shape as GHData.contributors
+
+        :param after: Only read the contributors sorted after the key in :after0 and :after1
+        :param limit: Only read :limit contributors
+        """
+        keys = [('COALESCE(c.commits, 0)', 'DESC'), ('c.user_id', 'ASC')]
+        return """
+            SELECT users.id AS "user_id", users.login AS "login", users.location AS "location", {0}
+            FROM {1} AS c
+            JOIN users ON users.id = c.user_id
+            WHERE c.repo_id = :repoid{2}
+            ORDER BY {3}{4}
+        """.format(', '.join('c.' + column for column in CONTRIBUTOR_COLUMNS), self.TABLE,
+                   ' AND ' + keyset_condition(keys) if after else '', order_by(keys), ' LIMIT :limit' if limit else '')
+
+    def watermark(self, repoid):
+        """
+        The created_at of the newest activity counted when the repo was last refreshed
+
+        :return: datetime, None if the repo had no activity or was never materialized
+        """
+        try:
+            result = self.db.execute(s.sql.text('SELECT watermark FROM {} WHERE repo_id = :repoid'.format(self.WATERMARK_TABLE)), repoid=repoid)
+        except s.exc.DBAPIError:
+            return None
+        row = result.first()
+        return row[0] if row is not None else None
+
+    def refresh(self, repoid):
+        """
+        Recomputes the counts of one repo, and records the created_at of its newest activity as its watermark.
+        The watermark is read first, so activity added during the refresh makes the repo stale again rather
+        than being missed.
+        """
+        newestSQL = ' UNION ALL '.join('SELECT MAX({0}.created_at) AS created_at FROM {1} WHERE {2} = :repoid'.format(*source)
+                                       for source in ACTIVITY_SOURCES)
+        with self.db.begin() as conn:
+            conn.execute(s.sql.text('DELETE FROM {} WHERE repo_id = :repoid'.format(self.WATERMARK_TABLE)), repoid=repoid)
+            conn.execute(s.sql.text("""
+                INSERT INTO {0} (repo_id, watermark)
+                SELECT :repoid, MAX(created_at) FROM ({1}) AS newest
+            """.format(self.WATERMARK_TABLE, newestSQL)), repoid=repoid)
+            conn.execute(s.sql.text('DELETE FROM {} WHERE repo_id = :repoid'.format(self.TABLE)), repoid=repoid)
+            conn.execute(s.sql.text("""
+                INSERT INTO {0} (repo_id, user_id, {1})
+                SELECT :repoid, user_id, {1} FROM ({2}) AS activity
+            """.format(self.TABLE, ', '.join(CONTRIBUTOR_COLUMNS), CONTRIBUTOR_ACTIVITY_SQL)), repoid=repoid)
+
+    def stale(self):
+        """
+        Materialized repos with activity created after their watermark. Both sides are dates from the data, so
+        the clocks of the server and of the import don't matter.
+
+        :return: List of repoids
+        """
+        newer = ' OR '.join('EXISTS (SELECT 1 FROM {1} WHERE {2} = w.repo_id AND (w.watermark IS NULL OR {0}.created_at > w.watermark))'.format(*source)
+                            for source in ACTIVITY_SOURCES)
+        staleSQL = s.sql.text('SELECT w.repo_id FROM {} AS w WHERE {}'.format(self.WATERMARK_TABLE, newer))
+        return [row[0] for row in self.db.execute(staleSQL)]
+
+    def refresh_stale(self, repoids=None):
+        """
+        Incremental job: refreshes the given repos plus every materialized repo with new activity
+
+        :param repoids: Repos to materialize or refresh regardless of whether they are stale
+        :return: List of repoids that were refreshed
+        """
+        self.create()
+        refreshed = list(repoids or [])
+        refreshed += [repoid for repoid in self.stale() if repoid not in refreshed]
+        for repoid in refreshed:
+            self.refresh(repoid)
+        return refreshed
@@ -0,0 +1,65 @@
+#SPDX-License-Identifier: MIT
+"""
+Keyset pagination: a page starts after the sort key of the previous page's last row, so the database seeks
+to it instead of reading and skipping the rows of every earlier page as it does for OFFSET
+"""
+
+import json
+import base64
+
+def encode_cursor(values):
+    """
+    Opaque cursor for the sort key of the last row of a page
+
+    :param values: List of the key's values
+    """
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, size=None):
+    """
+    The key values of a cursor made by encode_cursor
+
+    :param size: Number of values the method's sort key has, not checked if None
+    :raises ValueError: If the cursor wasn't made for that key
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(str(cursor) + '=' * (-len(cursor) % 4)).decode('utf-8'))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor: {}'.format(cursor))
+    if not isinstance(values, list) or (size is not None and len(values) != size):
+        raise ValueError('Invalid cursor: {}'.format(cursor))
+    return values
+
+def keyset_condition(keys):
+    """
+    Condition that keeps the rows sorted after the key in the :after0, :after1, ... parameters. Spelled out
+    with OR rather than as a row comparison, which not every database can use an index for.
+
+    :param keys: List of (expression, 'ASC' or 'DESC') the rows are ordered by
+    :return: SQL string
+    """
+    alternatives = []
+    for i, (expression, direction) in enumerate(keys):
+        equal = ['{} = :after{}'.format(previous, j) for j, (previous, _) in enumerate(keys[:i])]
+        after = '{} {} :after{}'.format(expression, '<' if direction.upper() == 'DESC' else '>', i)
+        alternatives.append('(' + ' AND '.join(equal + [after]) + ')' if equal else after)
+    return '(' + ' OR '.join(alternatives) + ')'
+
+def order_by(keys):
+    return ', '.join('{} {}'.format(expression, direction) for expression, direction in keys)
+
+def page_params(params, after, limit, size):
+    """
+    Adds the bind parameters of a page to a query's parameters
+
+    :param after: Cursor of the previous page, or None for the first page
+    :param limit: Number of rows in a page, or None for all of them
+    :param size: Number of values in the sort key
+    :return: The parameters
+    """
+    if after is not None:
+        for i, value in enumerate(decode_cursor(after, size)):
+            params['after{}'.format(i)] = value
+    if limit is not None:
+        params['limit'] = int(limit)
+    return params
@@ -0,0 +1,85 @@
+#SPDX-License-Identifier: MIT
+
+import time
+import threading
+import sqlalchemy as s
+from sqlalchemy.pool import QueuePool
+
+class PoolStats(object):
+    """
+    Counts checkouts, waits and new connections of an engine's connection pool
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.connections_created = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.__lock = threading.Lock()
+
+    def engine_options(self, pool_options=None):
+        """
+        Keyword arguments for create_engine that set up an instrumented QueuePool
+
+        :param pool_options: Dictionary of QueuePool settings like pool_size, max_overflow, pool_pre_ping and pool_recycle.
+                             Without it the dialect's default pool is used and waits aren't measured.
+        """
+        if not pool_options:
+            return {}
+        options = dict(pool_options)
+        # A subclass per engine, so the stats survive the pool being recreated by engine.dispose()
+        options['poolclass'] = type('StatsQueuePool', (StatsQueuePool,), {'stats': self})
+        return options
+
+    def listen(self, engine):
+        """
+        Registers the event handlers that count checkouts and new connections
+        """
+        s.event.listen(engine, 'connect', self.__on_connect)
+        s.event.listen(engine, 'checkout', self.__on_checkout)
+
+    def record_wait(self, seconds):
+        with self.__lock:
+            self.waits += 1
+            self.wait_time += seconds
+
+    def as_dict(self, pool=None):
+        """
+        The counters, plus the current state of the pool if one is given
+        """
+        with self.__lock:
+            stats = {
+                'checkouts': self.checkouts,
+                'connections_created': self.connections_created,
+                'waits': self.waits,
+                'wait_time': self.wait_time
+            }
+        if isinstance(pool, QueuePool):
+            stats['size'] = pool.size()
+            stats['checked_out'] = pool.checkedout()
+            stats['overflow'] = pool.overflow()
+        return stats
+
+    def __on_connect(self, dbapi_connection, connection_record):
+        with self.__lock:
+            self.connections_created += 1
+
+    def __on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self.__lock:
+            self.checkouts += 1
+
+
+class StatsQueuePool(QueuePool):
+    """
+    QueuePool that reports the checkouts that had to wait for a connection to be returned
+    """
+
+    stats = None
+
+    def _do_get(self):
+        saturated = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        start = time.time()
+        connection = super(StatsQueuePool, self)._do_get()
+        if saturated and self.stats is not None:
+            self.stats.record_wait(time.time() - start)
+        return connection
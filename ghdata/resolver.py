@@ -0,0 +1,85 @@
+#SPDX-License-Identifier: MIT
+
+import time
+import threading
+from collections import OrderedDict
+
+class IdResolver(object):
+    """
+    Bounded in-process map of owner/repo names and logins to their GHTorrent ids
+    """
+
+    def __init__(self, max_entries=100000, negative_ttl=300):
+        """
+        :param max_entries: Most names remembered for each kind of id, least recently used names are forgotten first
+        :param negative_ttl: Seconds to remember that a name doesn't exist, so new imports are eventually found
+        """
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.__repos = OrderedDict()
+        self.__users = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def repo_key(owner, repo):
+        # GitHub names are case insensitive, as is GHTorrent's default collation
+        return (owner.lower(), repo.lower())
+
+    @staticmethod
+    def user_key(login):
+        return login.lower()
+
+    def get_repo(self, owner, repo):
+        """
+        :return: Tuple of (hit, repoid), repoid is 0 for known missing repos
+        """
+        return self.__get(self.__repos, self.repo_key(owner, repo))
+
+    def set_repo(self, owner, repo, repoid):
+        self.__set(self.__repos, self.repo_key(owner, repo), repoid)
+
+    def get_user(self, login):
+        """
+        :return: Tuple of (hit, userid), userid is 0 for known missing users
+        """
+        return self.__get(self.__users, self.user_key(login))
+
+    def set_user(self, login, userid):
+        self.__set(self.__users, self.user_key(login), userid)
+
+    def clear(self):
+        with self.__lock:
+            self.__repos.clear()
+            self.__users.clear()
+
+    def stats(self):
+        with self.__lock:
+            return {
+                'repos': len(self.__repos),
+                'users': len(self.__users),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def __get(self, entries, key):
+        with self.__lock:
+            entry = entries.pop(key, None)
+            if entry is None or (entry[1] is not None and entry[1] < time.time()):
+                self.misses += 1
+                return False, None
+            entries[key] = entry
+            self.hits += 1
+            return True, entry[0]
+
+    def __set(self, entries, key, value):
+        if self.max_entries <= 0:
+            return
+        # Ids never change, only misses expire
+        expires = time.time() + self.negative_ttl if not value else None
+        with self.__lock:
+            entries.pop(key, None)
+            entries[key] = (value, expires)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
@@ -0,0 +1,227 @@
+#SPDX-License-Identifier: MIT
+
+import datetime
+import sqlalchemy as s
+import pandas as pd
+from .dialects import dialect_of
+
+# Days pull requests were merged on whose comment counts changed: the merge days of the pull requests
+# commented on between :since and :until
+PULL_COMMENT_DAYS = """
+        SELECT DATE(merged.created_at)
+        FROM pull_request_comments
+        INNER JOIN pull_request_history AS merged ON merged.pull_request_id = pull_request_comments.pull_request_id
+        WHERE merged.action = 'merged'
+        AND pull_request_comments.created_at >= :since AND pull_request_comments.created_at <= :until"""
+
+# Daily counts kept for each event type. Every query returns repo_id, day and count for the rows
+# created between :since and :until, and for the days of ROLLUP_RECOUNTS.
+ROLLUP_SOURCES = {
+    'commits': """
+        SELECT project_id AS repo_id, DATE(created_at) AS day, COUNT(*) AS count
+        FROM commits
+        WHERE created_at >= :since AND created_at <= :until
+        GROUP BY project_id, DATE(created_at)""",
+    'issues': """
+        SELECT repo_id AS repo_id, DATE(created_at) AS day, COUNT(*) AS count
+        FROM issues
+        WHERE created_at >= :since AND created_at <= :until
+        GROUP BY repo_id, DATE(created_at)""",
+    'stargazers': """
+        SELECT repo_id AS repo_id, DATE(created_at) AS day, COUNT(*) AS count
+        FROM watchers
+        WHERE created_at >= :since AND created_at <= :until
+        GROUP BY repo_id, DATE(created_at)""",
+    'forks': """
+        SELECT forked_from AS repo_id, DATE(created_at) AS day, COUNT(*) AS count
+        FROM projects
+        WHERE forked_from IS NOT NULL AND created_at >= :since AND created_at <= :until
+        GROUP BY forked_from, DATE(created_at)""",
+    'pulls_merged': """
+        SELECT pull_requests.head_repo_id AS repo_id, DATE(pull_request_history.created_at) AS day, COUNT(*) AS count
+        FROM pull_request_history
+        INNER JOIN pull_requests ON pull_request_history.pull_request_id = pull_requests.id
+        WHERE pull_request_history.action = 'merged'
+        AND pull_request_history.created_at >= :since AND pull_request_history.created_at <= :until
+        GROUP BY pull_requests.head_repo_id, DATE(pull_request_history.created_at)""",
+    # Comments on the pull requests merged that day, counted again for every day merged on since :since
+    # and every day a pull request commented on since :since was merged on
+    'pull_comments': """
+        SELECT pull_requests.head_repo_id AS repo_id, DATE(pull_request_history.created_at) AS day,
+               SUM((SELECT COUNT(*) FROM pull_request_comments
+                    WHERE pull_request_comments.pull_request_id = pull_request_history.pull_request_id)) AS count
+        FROM pull_request_history
+        INNER JOIN pull_requests ON pull_request_history.pull_request_id = pull_requests.id
+        WHERE pull_request_history.action = 'merged'
+        AND (pull_request_history.created_at >= :since OR DATE(pull_request_history.created_at) IN ({}))
+        GROUP BY pull_requests.head_repo_id, DATE(pull_request_history.created_at)""".format(PULL_COMMENT_DAYS)
+}
+
+# Events whose rows created since the watermark can change the count of older days, and the query of those days
+ROLLUP_RECOUNTS = {
+    'pull_comments': PULL_COMMENT_DAYS
+}
+
+# The table and column each event's high-water mark is read from
+ROLLUP_WATERMARKS = {
+    'commits': ('commits', 'created_at'),
+    'issues': ('issues', 'created_at'),
+    'stargazers': ('watchers', 'created_at'),
+    'forks': ('projects', 'created_at'),
+    'pulls_merged': ('pull_request_history', 'created_at'),
+    'pull_comments': ('pull_request_comments', 'created_at')
+}
+
+# Tables counted by GHData.__single_table_count_by_date and the events that replace them
+TABLE_EVENTS = {
+    'commits': 'commits',
+    'issues': 'issues',
+    'watchers': 'stargazers',
+    'projects': 'forks'
+}
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class DailyRollups(object):
+    """
+    Summary table of daily counts per (repo, event type), refreshed incrementally from per-event high-water marks
+    """
+
+    TABLE = 'ghdata_daily_counts'
+    WATERMARK_TABLE = 'ghdata_rollup_watermarks'
+
+    def __init__(self, db):
+        """
+        :param db: SQLAlchemy engine connected to the GHTorrent database
+        """
+        self.db = db
+        self.dialect = dialect_of(db)
+        self.__available = set()
+
+    def create(self):
+        """
+        Creates the tables if they don't exist yet
+        """
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS {} (
+                repo_id INTEGER NOT NULL,
+                event   VARCHAR(32) NOT NULL,
+                day     DATE NOT NULL,
+                count   INTEGER NOT NULL,
+                PRIMARY KEY (repo_id, event, day)
+            )""".format(self.TABLE))
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS {} (
+                event     VARCHAR(32) NOT NULL PRIMARY KEY,
+                watermark {} NOT NULL
+            )""".format(self.WATERMARK_TABLE, self.dialect.TIMESTAMP))
+
+    def watermark(self, event):
+        """
+        The created_at of the newest row included in the rollup of an event, None if it was never refreshed
+        """
+        try:
+            result = self.db.execute(s.sql.text('SELECT watermark FROM {} WHERE event = :event'.format(self.WATERMARK_TABLE)), event=event)
+        except s.exc.DBAPIError:
+            return None
+        row = result.first()
+        return row[0] if row is not None else None
+
+    def latest_watermark(self):
+        """
+        The newest watermark of any event, None if the rollup was never refreshed
+        """
+        try:
+            return self.db.execute('SELECT MAX(watermark) FROM {}'.format(self.WATERMARK_TABLE)).scalar()
+        except s.exc.DBAPIError:
+            return None
+
+    def available(self, *events):
+        """
+        Whether all of the events have been rolled up at least once
+        """
+        for event in events:
+            if event not in self.__available:
+                if self.watermark(event) is None:
+                    return False
+                self.__available.add(event)
+        return True
+
+    def refresh(self, events=None):
+        """
+        Adds the rows created since each event's watermark to the rollup. The day the watermark falls
+        on is recounted in full, so rows sharing its timestamp are never missed or counted twice, as are
+        the older days of ROLLUP_RECOUNTS the new rows count on.
+
+        :param events: Events to refresh, all of ROLLUP_SOURCES by default
+        :return: Dictionary of event to its new watermark
+        """
+        self.create()
+        watermarks = {}
+        for event in (events or sorted(ROLLUP_SOURCES)):
+            table, column = ROLLUP_WATERMARKS[event]
+            until = self.db.execute('SELECT MAX({}) FROM {}'.format(column, table)).scalar()
+            if until is None:
+                continue
+            watermark = self.watermark(event)
+            since = pd.Timestamp(watermark).normalize().to_pydatetime() if watermark is not None else EPOCH
+            recounted = ' OR day IN ({})'.format(ROLLUP_RECOUNTS[event]) if event in ROLLUP_RECOUNTS else ''
+            with self.db.begin() as conn:
+                conn.execute(s.sql.text('DELETE FROM {} WHERE event = :event AND (day >= :day{})'.format(self.TABLE, recounted)),
+                             event=event, day=since.date(), since=since, until=until)
+                conn.execute(s.sql.text("""
+                    INSERT INTO {} (repo_id, event, day, count)
+                    SELECT repo_id, :event, day, count FROM ({}) AS counts
+                    WHERE repo_id IS NOT NULL""".format(self.TABLE, ROLLUP_SOURCES[event])),
+                             event=event, since=since, until=until)
+                conn.execute(s.sql.text('DELETE FROM {} WHERE event = :event'.format(self.WATERMARK_TABLE)), event=event)
+                conn.execute(s.sql.text('INSERT INTO {} (event, watermark) VALUES (:event, :watermark)'.format(self.WATERMARK_TABLE)),
+                             event=event, watermark=until)
+            watermarks[event] = until
+        return watermarks
+
+    def count_by_date(self, event, column, group_type, batch=False, dates=''):
+        """
+        Generates a query string in the shape of GHData.__single_table_count_by_date that reads the rollup,
+        deriving coarser granularities from the daily rows
+
+        :param event: Member of ROLLUP_SOURCES
+        :param column: Name of the count column in the result
+        :param group_type: Member of GROUP_TYPES, already converted with GHData.convert_group_type
+        :param batch: Count for every repo in the :repoids list at once instead of just :repoid
+        :param dates: Condition on the day column added to the WHERE clause, starting with AND
+        :return: Query string
+        """
+        bucket = self.dialect.bucket('day', group_type)
+        if batch:
+            return """
+                SELECT repo_id AS "repoid", {2} AS "date", SUM(count) AS "{1}"
+                FROM {3}
+                WHERE repo_id IN :repoids AND event = '{0}'{4}
+                GROUP BY repo_id, {2}
+                ORDER BY repo_id, {2}""".format(event, column, bucket, self.TABLE, dates)
+        return """
+            SELECT {2} AS "date", SUM(count) AS "{1}"
+            FROM {3}
+            WHERE repo_id = :repoid AND event = '{0}'{4}
+            GROUP BY {2}
+            ORDER BY {2}""".format(event, column, bucket, self.TABLE, dates)
+
+    def pulls_by_date(self, group_type, dates=''):
+        """
+        Generates a query string in the shape of GHData.pulls_grouped that reads the rollup
+
+        :param group_type: Member of GROUP_TYPES, already converted with GHData.convert_group_type
+        :param dates: Condition on the day column added to the WHERE clause, starting with AND
+        :return: Query string
+        """
+        bucket = self.dialect.bucket('day', group_type)
+        return """
+            SELECT {0} AS "date",
+                   SUM(CASE WHEN event = 'pulls_merged' THEN count ELSE 0 END) AS "pull_requests",
+                   SUM(CASE WHEN event = 'pull_comments' THEN count ELSE 0 END) AS "comments"
+            FROM {1}
+            WHERE repo_id = :repoid AND event IN ('pulls_merged', 'pull_comments'){2}
+            GROUP BY {0}
+            ORDER BY {0}""".format(bucket, self.TABLE, dates)
@@ -1,16 +1,26 @@
 #SPDX-License-Identifier: MIT
 
-from flask import Flask, request, Response, json, send_from_directory
+from flask import Flask, request, Response, json, send_from_directory, stream_with_context, g
 from flask_cors import CORS, cross_origin
 import os
 import sys
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 if (sys.version_info > (3, 0)):
     import configparser as configparser
 else:
     import ConfigParser as configparser
 from dateutil import parser, tz
-from ghdata import GHData
+import dateutil.parser
+from ghdata import GHData, MetricCache, IdResolver, SingleFlight, QueryTimeout, QueryBudget
+from ghdata.cache import freeze
+from ghdata.instrumentation import Instrumentation
+from ghdata import commands, formats
+from ghdata.pagination import decode_cursor
 
 GHDATA_API_VERSION = 'unstable'
 
@@ -20,9 +30,17 @@ class GHDataClient:
     Reads the configuration file, creates an instance of GHData, serializes dataframes into JSON
     """
 
-    def __init__(self, db_host='127.0.0.1', db_port=3306, db_user='root', db_pass='', db_name='ghtorrent', public_www_api_key=None, file=None, connect=False, debug=False):
+    def __init__(self, db_host='127.0.0.1', db_port=3306, db_user='root', db_pass='', db_name='ghtorrent', public_www_api_key=None, file=None, connect=False, debug=False, cache=None, resolver=None, materialized_contributors=False, rollups=False, pool_options=None, driver='pymysql', workers=None, singleflight=None, timeouts=None, instruments=None, ghdata=None, parquet=None):
         """
         Stores configuration, optionally connects to the database
+
+        :param driver: SQLAlchemy MySQL driver, e.g. pymysql or mysqldb
+        :param workers: Number of GHData calls that may run at once, unlimited if None
+        :param singleflight: SingleFlight that coalesces identical concurrent calls
+        :param timeouts: Dictionary of GHData method names to the seconds their queries may take, 'default' for the rest
+        :param instruments: Instrumentation that requests and GHData calls are timed with
+        :param ghdata: GHData instance to use instead of connecting to the configured database, e.g. for benchmarks
+        :param parquet: Directory of GHTorrent tables exported with ghdata.columnar.export, read instead of the database
         """
         self.__db_host = db_host
         self.__db_port = db_port
@@ -31,6 +49,27 @@ class GHDataClient:
         self.__db_name = db_name
         self.__public_www_api_key = public_www_api_key
         self.__file = file
+        self.__cache = cache
+        self.__resolver = resolver
+        self.__materialized_contributors = materialized_contributors
+        self.__rollups = rollups
+        self.__pool_options = pool_options
+        self.__driver = driver
+        self.__singleflight = singleflight
+        self.__timeouts = timeouts or {}
+        if (instruments is None):
+            instruments = ghdata.instruments if ghdata is not None else Instrumentation()
+        self.instruments = instruments
+        self.__ghdata = ghdata
+        self.__parquet = parquet
+        # Concurrent first requests would each create a GHData, and an engine, without it
+        self.__connect_lock = threading.Lock()
+        # Requests queue here for a worker instead of holding a thread while they wait for a connection
+        self.__executor = ThreadPoolExecutor(max_workers=workers) if workers else None
+        # Held by each running call and each stream, so streams count against the workers too
+        self.__slots = threading.BoundedSemaphore(workers) if workers else None
+        # Threads that wait on calls coalesced by singleflight, so several can be started at once
+        self.__waiters = ThreadPoolExecutor(max_workers=workers) if (workers and singleflight is not None) else None
 
         if (debug == '1'):
             self.DEBUG = True
@@ -42,21 +81,161 @@ class GHDataClient:
 
     def __connect(self):
         """
-        Generates the dbstr from the configuration loaded earlier, opens the connection
+        Generates the dbstr from the configuration loaded earlier, opens the connection. Only the first call
+        connects, the others wait for it.
+        """
+        if (self.__ghdata is not None):
+            return
+        with self.__connect_lock:
+            try:
+                if (self.__ghdata is None and self.__parquet):
+                    from .columnar import ColumnarGHData
+                    self.__dbstr = self.__parquet
+                    self.__ghdata = ColumnarGHData(self.__parquet, public_www_api_key=self.__public_www_api_key, cache=self.__cache, resolver=self.__resolver, pool_options=self.__pool_options, instruments=self.instruments)
+                elif (self.__ghdata is None):
+                    self.__dbstr = 'mysql+{}://{}:{}@{}:{}/{}'.format(self.__driver, self.__db_user, self.__db_pass, self.__db_host, self.__db_port, self.__db_name)
+                    self.__ghdata = GHData(dbstr=self.__dbstr, public_www_api_key=self.__public_www_api_key, cache=self.__cache, resolver=self.__resolver, materialized_contributors=self.__materialized_contributors, rollups=self.__rollups, pool_options=self.__pool_options, instruments=self.instruments)
+            except:
+                print('Failed to connect to database using:')
+                print(self.__dbstr)
+
+
+    # Methods that turn names from the URL into ids
+    RESOLVERS = set(['repoid', 'userid'])
+
+    def get_raw(self, key, **args):
+        # Interact with ghdata without serializing the result
+        with self.instruments.phase('resolve' if key in self.RESOLVERS else 'compute'):
+            if (self.__singleflight is None):
+                return self.result(self.submit(key, **args))
+            return self.__singleflight.do((key, freeze(args)), lambda: self.result(self.submit(key, **args)))
+
+    # Maintenance methods that run as long as they need unless they have a budget of their own
+    UNBUDGETED = set(['refresh_contributors', 'refresh_rollups', 'prefetch_repoids', 'advise_indexes'])
+
+    def budget(self, key):
+        """
+        The QueryBudget for a call of the given GHData method, None if its time is unlimited
+        """
+        seconds = self.__timeouts.get(key)
+        if (seconds is None and key not in self.UNBUDGETED):
+            seconds = self.__timeouts.get('default')
+        return QueryBudget(key, seconds) if seconds else None
+
+    def submit(self, key, **args):
+        """
+        Starts a GHData call on the worker pool
+
+        :return: Future of the result, wait for it with result()
+        """
+        self.__connect()
+        budget = self.budget(key)
+        method = getattr(self.__ghdata, key)
+        if (budget is not None):
+            method = self.__ghdata.within
+            args = dict(args, budget=budget, method=key)
+        def call():
+            with self.instruments.method(key):
+                if (self.__slots is None):
+                    return method(**args)
+                with self.__slots:
+                    return method(**args)
+        if (self.__executor is not None):
+            future = self.__executor.submit(call)
+        else:
+            future = Future()
+            try:
+                future.set_result(call())
+            except Exception as e:
+                future.set_exception(e)
+        future.budget = budget
+        return future
+
+    def submit_shared(self, key, **args):
+        """
+        Starts a GHData call like submit, but shares the result of an identical call in flight as get_raw does
+
+        :return: Future of the result, wait for it with result()
         """
+        if (self.__singleflight is None):
+            return self.submit(key, **args)
+        if (self.__waiters is not None):
+            return self.__waiters.submit(self.get_raw, key, **args)
+        future = Future()
         try:
-            if (hasattr(self, '__ghdata') == False):
-                self.__dbstr = 'mysql+pymysql://{}:{}@{}:{}/{}'.format(self.__db_user, self.__db_pass, self.__db_host, self.__db_port, self.__db_name)
-                self.__ghdata = GHData(dbstr=self.__dbstr, public_www_api_key=self.__public_www_api_key)
-        except:
-            print('Failed to connect to database using:')
-            print(self.__dbstr)
+            future.set_result(self.get_raw(key, **args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
 
+    def status(self):
+        """
+        Counters of the cache, connection pool and request coalescing, for the metrics endpoint
+        """
+        self.__connect()
+        status = {'pool': self.__ghdata.pool_status()}
+        if (self.__cache is not None):
+            status['cache'] = self.__cache.stats()
+        if (self.__singleflight is not None):
+            status['singleflight'] = self.__singleflight.stats()
+        return status
+
+    def result(self, future):
+        """
+        Waits for a submitted call. If it runs out of time its queries are killed and QueryTimeout is raised.
+        """
+        budget = getattr(future, 'budget', None)
+        if (budget is None):
+            return future.result()
+        try:
+            return future.result(timeout=max(budget.deadline - time.time(), 0))
+        except FutureTimeoutError:
+            self.__ghdata.cancel(budget)
+            raise QueryTimeout(budget.method, budget.seconds)
 
     def get(self, key, **args):
         # Interact with ghdata and convert dataframes to JSON
+        return self.serialize(self.get_raw(key, **args))
+
+    def stream(self, key, fmt='ndjson', chunksize=1000, **args):
+        """
+        Serializes a row-level metric chunk by chunk, so memory use stays bounded however many rows there are.
+        The query runs within the method's time budget and holds one of the workers until the last row is sent.
+
+        :param fmt: 'ndjson' for one JSON object per line, 'json' for a JSON array sent in pieces
+        :return: Iterator of strings
+        """
         self.__connect()
-        data = getattr(self.__ghdata, key)(**args)
+        if (self.__slots is not None):
+            self.__slots.acquire()
+        try:
+            for piece in self.__serialize_chunks(self.__ghdata.stream(key, chunksize=chunksize, budget=self.budget(key), **args), fmt):
+                yield piece
+        finally:
+            if (self.__slots is not None):
+                self.__slots.release()
+
+    @staticmethod
+    def __serialize_chunks(chunks, fmt):
+        """
+        Turns an iterator of DataFrames into ndjson lines or the pieces of a JSON array
+        """
+        if (fmt == 'ndjson'):
+            for chunk in chunks:
+                if (len(chunk)):
+                    # Newer pandas end the lines with a newline already
+                    yield chunk.to_json(orient='records', lines=True, date_format='iso', date_unit='ms').rstrip('\n') + '\n'
+        else:
+            first = True
+            yield '['
+            for chunk in chunks:
+                if (len(chunk)):
+                    yield ('' if first else ',') + chunk.to_json(orient='records', date_format='iso', date_unit='ms')[1:-1]
+                    first = False
+            yield ']'
+
+    @staticmethod
+    def serialize(data):
         if (hasattr(data, 'to_json')):
             return data.to_json(orient='records', date_format='iso', date_unit='ms')
         else:
@@ -64,24 +243,272 @@ class GHDataClient:
 
 
 
+def response_format():
+    """
+    The format asked for with ?format= or the Accept header, JSON by default, None if it can't be produced
+    """
+    return formats.negotiate(request.args.get('format'), request.accept_mimetypes if 'Accept' in request.headers else None)
+
+def respond(data):
+    """
+    Serializes a result in the format asked for with ?format= or the Accept header, JSON by default
+    """
+    fmt = response_format()
+    if (fmt == 'series' and 'step' not in getattr(data, 'attrs', {})):
+        # Only gap-filled timeseries have a step
+        fmt = None
+    if (fmt is None):
+        return Response(response=json.dumps({'error': 'Not Acceptable', 'formats': formats.available()}),
+                        status=406,
+                        mimetype="application/json")
+    with client.instruments.phase('serialize'):
+        body = formats.serialize(data, fmt)
+    response = Response(response=body,
+                        status=200,
+                        mimetype=formats.MIMETYPES[fmt])
+    cursor = getattr(data, 'attrs', {}).get('next_cursor')
+    if (cursor):
+        # Pass it back as ?after= for the next page
+        response.headers['X-Next-Cursor'] = cursor
+    return response
+
+STREAM_MIMETYPES = {'ndjson': 'application/x-ndjson', 'json': 'application/json'}
+
+def streamed_response(key, **args):
+    """
+    Streams a row-level metric if the request asks for it with ?stream=ndjson or ?stream=json
+
+    :return: A streaming Response, or None if the request doesn't ask for one or the metric can't be streamed
+    """
+    fmt = request.args.get('stream')
+    if (fmt not in STREAM_MIMETYPES or key not in GHData.STREAMABLE):
+        return None
+    if (request.args.get('limit') or request.args.get('after')):
+        raise InvalidArgument('limit and after can not be used with stream, which sends all of the rows')
+    return Response(response=stream_with_context(client.stream(key, fmt=fmt, **args)),
+                    status=200,
+                    mimetype=STREAM_MIMETYPES[fmt])
+
+def timed_out(error):
+    """
+    Tells the client which metric ran out of time instead of hanging up on it
+    """
+    return Response(response=json.dumps({'error': 'Query timed out', 'method': error.method, 'budget': error.seconds}),
+                    status=504,
+                    mimetype="application/json")
+
+class InvalidArgument(ValueError):
+    """
+    A query parameter that can't be used, reported to the client instead of failing the request
+    """
+
+def invalid_argument(error):
+    return Response(response=json.dumps({'error': str(error)}),
+                    status=400,
+                    mimetype="application/json")
+
+def date_range(key):
+    """
+    The ?start= and ?end= dates of the request, as keyword arguments for the GHData methods that accept them
+
+    :param key: Name of the GHData method
+    :return: Dictionary with the start and end dates given, empty if the method doesn't take a date range
+    """
+    args = {}
+    if (key not in GHData.DATE_RANGED):
+        return args
+    for bound in ('start', 'end'):
+        value = request.args.get(bound)
+        if (value):
+            try:
+                args[bound] = dateutil.parser.parse(value).date()
+            except (ValueError, OverflowError):
+                raise InvalidArgument('{} is not a date: {}'.format(bound, value))
+    return args
+
+# Most rows a page may have
+MAX_PAGE_SIZE = 10000
+
+def page(key):
+    """
+    The ?limit= and ?after= of the request, as keyword arguments for the GHData methods that return pages
+
+    :param key: Name of the GHData method
+    :return: Dictionary with the limit and cursor given, empty if the method isn't paginated
+    """
+    args = {}
+    if (key not in GHData.PAGINATED):
+        return args
+    limit = request.args.get('limit')
+    after = request.args.get('after')
+    if (limit):
+        if (not limit.isdigit() or not 0 < int(limit) <= MAX_PAGE_SIZE):
+            raise InvalidArgument('limit must be a number from 1 to {}'.format(MAX_PAGE_SIZE))
+        args['limit'] = int(limit)
+    if (after):
+        try:
+            decode_cursor(after, GHData.PAGINATED[key])
+        except ValueError as e:
+            raise InvalidArgument(str(e))
+        args['after'] = after
+    return args
+
+def timeseries(key, **args):
+    """
+    Runs a GHData method. For the timeseries that can be brought up to date only the buckets from the
+    request's ?since= date onward are computed, and merged with the cached series if ?merge=true. With
+    ?fill=true, or when asked for in the compact series format, timeseries have a row for every bucket.
+
+    :param key: Name of the GHData method
+    :return: The method's result
+    """
+    since = request.args.get('since')
+    fill = (key in GHData.TIMESERIES and (request.args.get('fill', '').lower() in ('1', 'true') or response_format() == 'series'))
+    if (since and key in GHData.INCREMENTAL):
+        try:
+            args['since'] = dateutil.parser.parse(since).date()
+        except (ValueError, OverflowError):
+            raise InvalidArgument('since is not a date: {}'.format(since))
+        args['merge'] = request.args.get('merge', '').lower() in ('1', 'true')
+        if (not fill):
+            return client.get_raw('incremental', metric=key, **args)
+    if (fill):
+        return client.get_raw('filled', metric=key, **args)
+    return client.get_raw(key, **args)
+
 def basic_endpoint(flaskapp, table):
     """
-    Simplifies API endpoints that just accept owner and repo
+    Simplifies API endpoints that just accept owner and repo, and a date range or page for the metrics that take one
     """
     def generated_function(owner, repo):
         repoid = client.get('repoid', owner=owner, repo=repo)
-        return Response(response=client.get(table, repoid=repoid),
-                status=200,
-                mimetype="application/json")
+        dates = date_range(table)
+        streamed = streamed_response(table, repoid=repoid, **dates)
+        if (streamed is not None):
+            return streamed
+        return respond(timeseries(table, repoid=repoid, **dict(dates, **page(table))))
     generated_function.__name__ = table
     return generated_function
 
+class DataVersion(object):
+    """
+    Identifies the current state of the GHTorrent data, which only changes when a dump is imported
+    """
+
+    def __init__(self, version=None, last_modified=None, check_interval=60):
+        """
+        :param version: Version string set in ghdata.cfg, e.g. the date of the imported dump
+        :param last_modified: datetime the data was imported, in UTC
+        :param check_interval: Seconds between reading the version from the data when none is configured
+        """
+        self.version = version
+        self.last_modified = last_modified
+        self.check_interval = check_interval
+        self.__data = None
+        self.__checked = 0
+
+    def data(self):
+        """
+        The version read from the data with GHData.data_version, looked up again every check_interval seconds
+        """
+        if (time.time() - self.__checked > self.check_interval):
+            self.__checked = time.time()
+            try:
+                self.__data = client.get_raw('data_version')
+            except Exception:
+                self.__data = None
+        return self.__data
+
+    def current(self):
+        """
+        The configured version, otherwise the one read from the data. Without either, no validators are sent rather
+        than ones that could outlive the data.
+
+        :return: Tuple of (version string, last modified datetime or None), None if there is no version
+        """
+        if (self.version and self.last_modified):
+            return self.version, self.last_modified.replace(microsecond=0)
+        data = self.data()
+        if (data is None and not self.version):
+            return None
+        version = self.version or data[0]
+        last_modified = self.last_modified or (data[1] if data is not None else None)
+        return version, last_modified.replace(microsecond=0) if last_modified is not None else None
+
 # Globals
 client = None # Initalized in the base group function below
+data_version = DataVersion()
+cache_control = 'public, max-age=3600'
+# Most repos a batch request may ask for, each of them is a bind parameter of the batch query
+max_batch_repos = 100
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
+app.register_error_handler(QueryTimeout, timed_out)
+app.register_error_handler(InvalidArgument, invalid_argument)
+
+@app.before_request
+def begin_instrumentation():
+    if (client is not None):
+        client.instruments.begin_request()
+
+# Endpoints that don't serve metrics, so their responses always reflect the current state of the server
+UNVERSIONED_ENDPOINTS = set(['api_root', 'pool_status', 'metrics', 'root', 'send_scripts', 'send_styles', 'static'])
+
+def http_date(value):
+    """Converts a datetime to naive UTC so it compares with the dates of conditional headers"""
+    if (value.tzinfo is not None):
+        value = value.astimezone(tz.tzutc()).replace(tzinfo=None)
+    return value
+
+@app.before_request
+def conditional_request():
+    """
+    Answers If-None-Match and If-Modified-Since with 304 Not Modified before any metric SQL runs
+    """
+    if (request.method not in ('GET', 'HEAD') or request.endpoint is None or request.endpoint in UNVERSIONED_ENDPOINTS):
+        return None
+    current = data_version.current()
+    if (current is None):
+        return None
+    version, last_modified = current
+    # Each representation gets its own strong ETag, so the format asked for is part of it
+    representation = '{}\n{}\n{}'.format(version, request.full_path, request.headers.get('Accept', ''))
+    g.etag = hashlib.sha1(representation.encode('utf-8')).hexdigest()
+    g.last_modified = last_modified
+    if (request.if_none_match):
+        if (not request.if_none_match.contains(g.etag)):
+            return None
+    elif (request.if_modified_since is None or last_modified is None or last_modified > http_date(request.if_modified_since)):
+        return None
+    return Response(status=304)
+
+@app.after_request
+def end_instrumentation(response):
+    if (client is not None and request.url_rule is not None):
+        client.instruments.end_request(request.url_rule.rule, None if response.is_streamed else response.calculate_content_length())
+    return response
+
+@app.after_request
+def cache_headers(response):
+    """
+    Adds validators and Cache-Control to metric responses
+    """
+    if ('etag' in g and response.status_code in (200, 304)):
+        response.set_etag(g.etag)
+        if (g.last_modified is not None):
+            response.last_modified = g.last_modified
+        response.headers['Cache-Control'] = cache_control
+        response.vary.add('Accept')
+    return response
 # Flags and Initialization
 
+def read_config(parser, section, name, default=None):
+    """Reads an optional setting, falling back to the default if it is missing"""
+    try:
+        return parser.get(section, name)
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return default
+
 def init():
     """Reads the config file"""
     try:
@@ -93,11 +520,62 @@ def init():
         user = parser.get('Database', 'user')
         password = parser.get('Database', 'pass')
         db = parser.get('Database', 'name')
+        pool_options = {
+            'pool_size': int(read_config(parser, 'Database', 'pool_size', '5')),
+            'max_overflow': int(read_config(parser, 'Database', 'max_overflow', '10')),
+            'pool_pre_ping': read_config(parser, 'Database', 'pool_pre_ping', '1') == '1',
+            'pool_recycle': int(read_config(parser, 'Database', 'pool_recycle', '3600'))
+        }
         public_www_api_key = parser.get('PublicWWW', 'APIKey')
         debug = parser.get('Development', 'developer')
+        cache = None
+        if (read_config(parser, 'Cache', 'enabled', '1') == '1'):
+            ttl = int(read_config(parser, 'Cache', 'ttl', '3600'))
+            cache = MetricCache(ttl=ttl if ttl > 0 else None,
+                                max_size=int(read_config(parser, 'Cache', 'max_size_mb', '256')) * 1024 * 1024,
+                                exclude=[m.strip() for m in read_config(parser, 'Cache', 'exclude', '').split(',') if m.strip()])
+        resolver = IdResolver(max_entries=int(read_config(parser, 'Resolver', 'max_entries', '100000')),
+                              negative_ttl=int(read_config(parser, 'Resolver', 'negative_ttl', '300')))
+        prefetch = [r.strip() for r in read_config(parser, 'Resolver', 'prefetch', '').split(',') if r.strip()]
+        prefetch_file = read_config(parser, 'Resolver', 'prefetch_file', '')
+        if (prefetch_file):
+            with open(prefetch_file) as repos:
+                prefetch += [r.strip() for r in repos if r.strip()]
+        global data_version, cache_control, max_batch_repos
+        last_modified = read_config(parser, 'HTTP', 'last_modified', '')
+        data_version = DataVersion(version=read_config(parser, 'HTTP', 'data_version', '') or None,
+                                   last_modified=http_date(dateutil.parser.parse(last_modified)) if last_modified else None,
+                                   check_interval=int(read_config(parser, 'HTTP', 'watermark_check_interval', '60')))
+        cache_control = read_config(parser, 'HTTP', 'cache_control', cache_control)
+        max_batch_repos = int(read_config(parser, 'Server', 'max_batch_repos', str(max_batch_repos)))
+        # By default as many metrics run at once as the pool has connections
+        workers = int(read_config(parser, 'Server', 'workers', '0')) or pool_options['pool_size'] + max(pool_options['max_overflow'], 0)
+        timeouts = {}
+        if (parser.has_section('Timeouts')):
+            timeouts = dict((method, float(seconds)) for method, seconds in parser.items('Timeouts'))
+        singleflight = None
+        if (read_config(parser, 'SingleFlight', 'enabled', '1') == '1'):
+            singleflight = SingleFlight(lock_dir=read_config(parser, 'SingleFlight', 'lock_dir', '') or None,
+                                        result_ttl=int(read_config(parser, 'SingleFlight', 'result_ttl', '5')))
+        server = {
+            'server': read_config(parser, 'Server', 'server', 'threaded'),
+            'host': read_config(parser, 'Server', 'host', '127.0.0.1'),
+            'port': int(read_config(parser, 'Server', 'port', '5000')),
+            'threads': int(read_config(parser, 'Server', 'threads', '32'))
+        }
         try:
             global client
-            client = GHDataClient(db_host=host, db_port=port, db_user=user, db_pass=password, db_name=db, public_www_api_key=public_www_api_key, debug=debug)
+            client = GHDataClient(db_host=host, db_port=port, db_user=user, db_pass=password, db_name=db, public_www_api_key=public_www_api_key, debug=debug, cache=cache, resolver=resolver,
+                                  materialized_contributors=read_config(parser, 'Materialized', 'contributors', '0') == '1',
+                                  rollups=read_config(parser, 'Materialized', 'rollups', '0') == '1',
+                                  pool_options=pool_options,
+                                  driver=read_config(parser, 'Database', 'driver', 'pymysql'),
+                                  parquet=read_config(parser, 'Database', 'parquet', '') or None,
+                                  workers=workers,
+                                  singleflight=singleflight,
+                                  timeouts=timeouts)
+            if (prefetch):
+                print('Resolved {} of {} popular repos'.format(client.get('prefetch_repoids', repos=prefetch), len(prefetch)))
         except:
             print('Couldn\'t start. Double check ghdata.cfg for errors.')
 
@@ -111,16 +589,57 @@ def init():
         config.set('Database', 'user', 'root')
         config.set('Database', 'pass', 'root')
         config.set('Database', 'name', 'ghtorrent')
+        config.set('Database', 'pool_size', '5')
+        config.set('Database', 'max_overflow', '10')
+        config.set('Database', 'pool_pre_ping', '1')
+        config.set('Database', 'pool_recycle', '3600')
+        config.set('Database', 'driver', 'pymysql')
+        config.set('Database', 'parquet', '')
+        config.add_section('Server')
+        config.set('Server', 'server', 'threaded')
+        config.set('Server', 'host', '127.0.0.1')
+        config.set('Server', 'port', '5000')
+        config.set('Server', 'threads', '32')
+        config.set('Server', 'workers', '0')
+        config.set('Server', 'max_batch_repos', '100')
         config.add_section('PublicWWW')
         config.set('PublicWWW', 'APIKey', '0')
         config.add_section('Development')
         config.set('Development', 'developer', '0')
+        config.add_section('Cache')
+        config.set('Cache', 'enabled', '1')
+        config.set('Cache', 'ttl', '3600')
+        config.set('Cache', 'max_size_mb', '256')
+        config.set('Cache', 'exclude', '')
+        config.add_section('Resolver')
+        config.set('Resolver', 'max_entries', '100000')
+        config.set('Resolver', 'negative_ttl', '300')
+        config.set('Resolver', 'prefetch', '')
+        config.set('Resolver', 'prefetch_file', '')
+        config.add_section('Materialized')
+        config.set('Materialized', 'contributors', '0')
+        config.set('Materialized', 'rollups', '0')
+        config.add_section('SingleFlight')
+        config.set('SingleFlight', 'enabled', '1')
+        config.set('SingleFlight', 'lock_dir', '')
+        config.set('SingleFlight', 'result_ttl', '5')
+        config.add_section('Timeouts')
+        config.set('Timeouts', 'default', '60')
+        config.set('Timeouts', 'contributors', '120')
+        config.set('Timeouts', 'relative_activity', '120')
+        config.add_section('HTTP')
+        config.set('HTTP', 'cache_control', 'public, max-age=3600')
+        config.set('HTTP', 'data_version', '')
+        config.set('HTTP', 'last_modified', '')
+        config.set('HTTP', 'watermark_check_interval', '60')
         # Writing our configuration file to 'example.cfg'
         with open('ghdata.cfg', 'w') as configfile:
             config.write(configfile)
         print('Default config saved to ghdata.cfg')
         sys.exit()
 
+    if (len(sys.argv) > 1):
+        sys.exit(commands.run(client, sys.argv[1:]))
 
     if (client.DEBUG):
         # Serve the front-end files in debug mode to make it easier for developers to work on the interface
@@ -139,13 +658,31 @@ def init():
 
         app.debug = True
 
-    app.run(debug=client.DEBUG)
+    if (server['server'] == 'waitress' and not client.DEBUG):
+        try:
+            import waitress
+        except ImportError:
+            print('waitress is not installed, falling back to the threaded Flask server')
+        else:
+            waitress.serve(app, host=server['host'], port=server['port'], threads=server['threads'])
+            return
+
+    # Each request gets its own thread, so one slow metric doesn't hold up the others
+    app.run(host=server['host'], port=server['port'], debug=client.DEBUG, threaded=True)
 
 
 """
 @api {get} / API Status
 @apiName Status
 @apiGroup Misc
+@apiDescription Metric endpoints respond with JSON by default. CSV, Arrow IPC streams, Parquet and MessagePack
+                can be requested with ?format=csv|arrow|parquet|msgpack or an Accept header of text/csv,
+                application/vnd.apache.arrow.stream, application/vnd.apache.parquet or application/msgpack.
+                Arrow and Parquet need pyarrow installed, MessagePack needs msgpack.
+                Timeseries can also be sent as ?format=series (application/vnd.ghdata.series+json): the first
+                bucket, the bucket size and an array of the counts of every bucket, zero where nothing happened.
+                Metric responses carry an ETag and Last-Modified derived from the version of the imported data,
+                so clients sending If-None-Match or If-Modified-Since get 304 Not Modified until the data changes.
 """
 @app.route('/{}/'.format(GHDATA_API_VERSION))
 def api_root():
@@ -156,6 +693,66 @@ def api_root():
                     mimetype="application/json")
     return info
 
+"""
+@api {get} /status/pool Database Connection Pool
+@apiName PoolStatus
+@apiGroup Misc
+
+@apiSuccessExample {json} Success-Response:
+                    {
+                        "checkouts": 1520,
+                        "connections_created": 7,
+                        "waits": 3,
+                        "wait_time": 0.42,
+                        "size": 5,
+                        "checked_out": 2,
+                        "overflow": -3
+                    }
+"""
+@app.route('/{}/status/pool'.format(GHDATA_API_VERSION))
+def pool_status():
+    return Response(response=json.dumps(client.get_raw('pool_status')),
+                    status=200,
+                    mimetype="application/json")
+
+"""
+@api {get} /metrics Prometheus Metrics
+@apiName Metrics
+@apiGroup Misc
+@apiDescription Histograms of request latency by route and phase (resolve, compute, serialize, total), latency of
+                GHData methods by phase (sql, frame, total), rows returned and response sizes, along with cache,
+                connection pool and request coalescing counters, in the Prometheus text exposition format.
+"""
+@app.route('/{}/metrics'.format(GHDATA_API_VERSION))
+def metrics():
+    status = client.status()
+    pool = status['pool']
+    counters = [
+        ('ghdata_pool_checkouts_total', 'counter', 'Connections checked out of the pool', pool['checkouts']),
+        ('ghdata_pool_connections_created_total', 'counter', 'Connections opened to the database', pool['connections_created']),
+        ('ghdata_pool_waits_total', 'counter', 'Checkouts that waited for a connection to be returned', pool['waits']),
+        ('ghdata_pool_wait_seconds_total', 'counter', 'Time spent waiting for connections', pool['wait_time'])
+    ]
+    if ('checked_out' in pool):
+        counters.append(('ghdata_pool_checked_out', 'gauge', 'Connections currently checked out', pool['checked_out']))
+    if ('cache' in status):
+        cache = status['cache']
+        counters += [
+            ('ghdata_cache_hits_total', 'counter', 'Metric results served from the cache', cache['hits']),
+            ('ghdata_cache_misses_total', 'counter', 'Metric results that had to be computed', cache['misses']),
+            ('ghdata_cache_evictions_total', 'counter', 'Results evicted to stay within the size limit', cache['evictions']),
+            ('ghdata_cache_entries', 'gauge', 'Results in the cache', cache['entries']),
+            ('ghdata_cache_size_bytes', 'gauge', 'Approximate memory used by the cache', cache['size'])
+        ]
+    if ('singleflight' in status):
+        counters += [
+            ('ghdata_coalesced_leaders_total', 'counter', 'Calls that ran their own computation', status['singleflight']['leaders']),
+            ('ghdata_coalesced_followers_total', 'counter', 'Calls that waited for an identical call in flight', status['singleflight']['followers'])
+        ]
+    return Response(response=client.instruments.expose(counters),
+                    status=200,
+                    mimetype="text/plain; version=0.0.4")
+
 #######################
 #     Timeseries      #
 #######################
@@ -167,6 +764,12 @@ def api_root():
 
 @apiParam {String} owner Username of the owner of the GitHub repository
 @apiParam {String} repo Name of the GitHub repository
+@apiParam {String} [start] Leave out what happened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out what happened after this date
+@apiParam {String} [since] Only send the buckets from the one this date falls in onward, e.g. to refresh a chart
+@apiParam {Boolean} [merge] With since, send the whole series with those buckets brought up to date
+@apiParam {Boolean} [fill] Send a row for every week, with zeros for the weeks nothing happened in
+@apiParam {String} [format] series for the first week and an array of the counts, e.g. {"start": "2015-01-05", "step": "week", "values": {"commits": [153, 0, 192]}}
 
 @apiSuccessExample {json} Success-Response:
                     [
@@ -189,6 +792,8 @@ app.route('/{}/<owner>/<repo>/timeseries/commits'.format(GHDATA_API_VERSION))(ba
 
 @apiParam {String} owner Username of the owner of the GitHub repository
 @apiParam {String} repo Name of the GitHub repository
+@apiParam {String} [start] Leave out what happened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out what happened after this date
 
 @apiSuccessExample {json} Success-Response:
                     [
@@ -211,6 +816,12 @@ app.route('/{}/<owner>/<repo>/timeseries/forks'.format(GHDATA_API_VERSION))(basi
 
 @apiParam {String} owner Username of the owner of the GitHub repository
 @apiParam {String} repo Name of the GitHub repository
+@apiParam {String} [start] Leave out what happened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out what happened after this date
+@apiParam {String} [since] Only send the buckets from the one this date falls in onward, e.g. to refresh a chart
+@apiParam {Boolean} [merge] With since, send the whole series with those buckets brought up to date
+@apiParam {Boolean} [fill] Send a row for every week, with zeros for the weeks nothing happened in
+@apiParam {String} [format] series for the first week and an array of the counts, e.g. {"start": "2015-01-05", "step": "week", "values": {"issues": [153, 0, 192]}}
 
 @apiSuccessExample {json} Success-Response:
                     [
@@ -233,6 +844,11 @@ app.route('/{}/<owner>/<repo>/timeseries/issues'.format(GHDATA_API_VERSION))(bas
 
 @apiParam {String} owner Username of the owner of the GitHub repository
 @apiParam {String} repo Name of the GitHub repository
+@apiParam {String} [stream] Send rows as they are read from the database, as ndjson or as a json array. Not with limit or after
+@apiParam {String} [start] Leave out what happened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out what happened after this date
+@apiParam {Number} [limit] Return at most this many rows, and the cursor of the next page in the X-Next-Cursor header
+@apiParam {String} [after] Cursor from the X-Next-Cursor header of the previous page
 
 @apiSuccessExample {json} Success-Response:
                     [
@@ -248,6 +864,35 @@ app.route('/{}/<owner>/<repo>/timeseries/issues'.format(GHDATA_API_VERSION))(bas
 """
 app.route('/{}/<owner>/<repo>/timeseries/issues/response_time'.format(GHDATA_API_VERSION))(basic_endpoint(app, 'issue_response_time'))
 
+"""
+@api {get} /:owner/:repo/issues/response_time/:group_type Response Time Percentiles for Issues
+@apiDescription Percentiles of the days the issues opened in each period took to get their first response from a committer
+@apiName IssueResponseTimeGrouped
+@apiGroup Timeseries
+
+@apiParam {String} owner Username of the owner of the GitHub repository
+@apiParam {String} repo Name of the GitHub repository
+@apiParam {String} group_type day, week, month or year
+@apiParam {String} [start] Leave out issues opened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out issues opened after this date
+
+@apiSuccessExample {json} Success-Response:
+                    [
+                        {
+                            "date": "2013-09-01T00:00:00.000Z",
+                            "issues": 42,
+                            "p50_days": 0.2,
+                            "p90_days": 3.5,
+                            "p99_days": 20.1
+                        }
+                    ]
+"""
+@app.route('/{}/<owner>/<repo>/timeseries/issues/response_time/<group_type>'.format(GHDATA_API_VERSION))
+def issue_response_time_grouped(owner, repo, group_type):
+    repoid = client.get('repoid', owner=owner, repo=repo)
+    percentiles = client.get_raw('issue_response_time_grouped', repoid=repoid, group_type=group_type, **date_range('issue_response_time_grouped'))
+    return respond(percentiles)
+
 """
 @api {get} /:owner/:repo/pulls Pull Requests by Week
 @apiName PullRequestsByWeek
@@ -255,6 +900,8 @@ app.route('/{}/<owner>/<repo>/timeseries/issues/response_time'.format(GHDATA_API
 
 @apiParam {String} owner Username of the owner of the GitHub repository
 @apiParam {String} repo Name of the GitHub repository
+@apiParam {String} [start] Leave out what happened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out what happened after this date
 
 @apiSuccessExample {json} Success-Response:
                     [
@@ -279,6 +926,8 @@ app.route('/{}/<owner>/<repo>/timeseries/pulls'.format(GHDATA_API_VERSION))(basi
 
 @apiParam {String} owner Username of the owner of the GitHub repository
 @apiParam {String} repo Name of the GitHub repository
+@apiParam {String} [start] Leave out what happened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out what happened after this date
 
 @apiSuccessExample {json} Success-Response:
                     [
@@ -302,6 +951,8 @@ app.route('/{}/<owner>/<repo>/timeseries/stargazers'.format(GHDATA_API_VERSION))
 
 @apiParam {String} owner Username of the owner of the GitHub repository
 @apiParam {String} repo Name of the GitHub repository
+@apiParam {String} [start] Leave out what happened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out what happened after this date
 
 @apiSuccessExample {json} Success-Response:
                     [
@@ -325,6 +976,9 @@ app.route('/{}/<owner>/<repo>/pulls/acceptance_rate'.format(GHDATA_API_VERSION))
 
 @apiParam {String} owner Username of the owner of the GitHub repository
 @apiParam {String} repo Name of the GitHub repository
+@apiParam {String} [stream] Send rows as they are read from the database, as ndjson or as a json array. Not with limit or after
+@apiParam {Number} [limit] Return at most this many rows, and the cursor of the next page in the X-Next-Cursor header
+@apiParam {String} [after] Cursor from the X-Next-Cursor header of the previous page
 
 @apiSuccessExample {json} Success-Response:
                    [
@@ -364,6 +1018,8 @@ app.route('/{}/<owner>/<repo>/contributors'.format(GHDATA_API_VERSION))(basic_en
 @apiParam {String} owner Username of the owner of the GitHub repository
 @apiParam {String} repo Name of the GitHub repository
 @apiParam (String) user Limit results to the given user's contributions
+@apiParam {String} [start] Leave out what happened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out what happened after this date
 
 @apiSuccessExample {json} Success-Response:
                    [
@@ -391,14 +1047,13 @@ app.route('/{}/<owner>/<repo>/contributors'.format(GHDATA_API_VERSION))(basic_en
 def contributions(owner, repo):
     repoid = client.get('repoid', owner=owner, repo=repo)
     user = request.args.get('user')
+    dates = date_range('contributions')
     if (user):
         userid = client.get('userid', username=user)
-        contribs = client.get('contributions', repoid=repoid, userid=userid)
+        contribs = client.get_raw('contributions', repoid=repoid, userid=userid, **dates)
     else:
-        contribs = client.get('contributions', repoid=repoid)
-    return Response(response=contribs,
-                    status=200,
-                    mimetype="application/json")
+        contribs = client.get_raw('contributions', repoid=repoid, **dates)
+    return respond(contribs)
 
 # Diversity
 
@@ -409,6 +1064,9 @@ def contributions(owner, repo):
 
 @apiParam {String} owner Username of the owner of the GitHub repository
 @apiParam {String} repo Name of the GitHub repository
+@apiParam {String} [stream] Send rows as they are read from the database, as ndjson or as a json array. Not with limit or after
+@apiParam {Number} [limit] Return at most this many rows, and the cursor of the next page in the X-Next-Cursor header
+@apiParam {String} [after] Cursor from the X-Next-Cursor header of the previous page
 
 @apiSuccessExample {json} Success-Response:
                     [
@@ -469,27 +1127,173 @@ app.route('/{}/<owner>/<repo>/relative_activity_nonpm'.format(GHDATA_API_VERSION
 @app.route('/{}/<owner>/<repo>/timeseries/stargazers/<group_type>'.format(GHDATA_API_VERSION))
 def stargazers_grouped(owner, repo, group_type):
     repoid = client.get('repoid', owner=owner, repo=repo)
-    watchers = client.get('stargazers_grouped', repoid=repoid, group_type=group_type)
-    return Response(response=watchers,
-                    status=200,
-                    mimetype="application/json")
+    watchers = timeseries('stargazers_grouped', repoid=repoid, group_type=group_type, **date_range('stargazers_grouped'))
+    return respond(watchers)
 
 @app.route('/{}/<owner>/<repo>/timeseries/pulls/<group_type>'.format(GHDATA_API_VERSION))
 def pulls_grouped(owner, repo, group_type):
     repoid = client.get('repoid', owner=owner, repo=repo)
-    pulls = client.get('pulls_grouped', repoid=repoid, group_type=group_type)
-    return Response(response=pulls,
-                    status=200,
-                    mimetype="application/json")
+    pulls = timeseries('pulls_grouped', repoid=repoid, group_type=group_type, **date_range('pulls_grouped'))
+    return respond(pulls)
 
 @app.route('/{}/<owner>/<repo>/timeseries/forks/<group_type>'.format(GHDATA_API_VERSION))
 def forks_grouped(owner, repo, group_type):
     repoid = client.get('repoid', owner=owner, repo=repo)
-    forks_grouped = client.get('forks_grouped', repoid=repoid, group_type=group_type)
-    return Response(response=forks_grouped,
-                    status=200,
-                    mimetype="application/json")
+    forks_grouped = timeseries('forks_grouped', repoid=repoid, group_type=group_type, **date_range('forks_grouped'))
+    return respond(forks_grouped)
+
+
+# Batch
 
+# Maps batch timeseries names to the GHData methods used with and without a group_type
+BATCH_TIMESERIES = {
+    'commits': ('commits', None),
+    'issues': ('issues', None),
+    'stargazers': ('stargazers', 'stargazers_grouped'),
+    'forks': ('forks_grouped_default', 'forks_grouped')
+}
+
+"""
+@api {get} /batch/timeseries/:metric Timeseries for Many Repositories
+@apiDescription Runs a single grouped query for all the requested repositories. Repositories can be given
+                as repeated repo query parameters or POSTed as a JSON object like {"repos": ["owner/repo"]}.
+                Repositories that can't be found are left out. More than max_batch_repos (100 by default)
+                repositories are rejected with a 400.
+@apiName BatchTimeseries
+@apiGroup Timeseries
+
+@apiParam {String} metric One of commits, issues, stargazers or forks
+@apiParam {String} repo owner/repo of a GitHub repository, can be repeated
+@apiParam {String} [group_type] Granularity for stargazers and forks, one of day, week, month or year
+@apiParam {String} [start] Leave out what happened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out what happened after this date
+
+@apiSuccessExample {json} Success-Response:
+                    [
+                        {
+                            "repo": "rails/rails",
+                            "repoid": 78852,
+                            "date": "2015-01-01T00:00:00.000Z",
+                            "commits": 153
+                        },
+                        {
+                            "repo": "akka/akka",
+                            "repoid": 1334,
+                            "date": "2015-01-01T00:00:00.000Z",
+                            "commits": 41
+                        }
+                    ]
+"""
+@app.route('/{}/batch/timeseries/<metric>'.format(GHDATA_API_VERSION), methods=['GET', 'POST'])
+def batch_timeseries(metric):
+    if (metric not in BATCH_TIMESERIES):
+        return Response(response='{"error": "Unknown metric"}', status=404, mimetype="application/json")
+    repos = request.args.getlist('repo')
+    if (request.method == 'POST'):
+        repos += (request.get_json(force=True, silent=True) or {}).get('repos', [])
+    repos = [r for r in repos if '/' in r]
+    if (len(repos) > max_batch_repos):
+        raise InvalidArgument('At most {} repos can be asked for at once'.format(max_batch_repos))
+    client.get_raw('prefetch_repoids', repos=repos)
+    names = {}
+    for r in repos:
+        owner, name = r.split('/', 1)
+        repoid = client.get_raw('repoid', owner=owner, repo=name)
+        if (repoid):
+            names[repoid] = r
+    method, grouped_method = BATCH_TIMESERIES[metric]
+    group_type = request.args.get('group_type')
+    if (not names):
+        return respond([])
+    if (group_type and grouped_method):
+        data = client.get_raw(grouped_method, repoid=sorted(names), group_type=group_type, **date_range(grouped_method))
+    else:
+        data = client.get_raw(method, repoid=sorted(names), **date_range(method))
+    data.insert(0, 'repo', data['repoid'].map(lambda repoid: names.get(int(repoid))))
+    return respond(data)
+
+# Report names of the metrics of a single repository, and the GHData methods that compute them
+REPORT_METRICS = {
+    'commits': 'commits',
+    'forks': 'forks_grouped_default',
+    'issues': 'issues',
+    'pulls': 'pulls',
+    'stargazers': 'stargazers',
+    'issue_response_time': 'issue_response_time',
+    'average_issue_response_time': 'average_issue_response_time',
+    'pull_acceptance_rate': 'pull_acceptance_rate',
+    'contributors': 'contributors',
+    'committer_locations': 'committer_locations',
+    'linking_websites': 'linking_websites',
+    'issue_actions': 'issue_actions',
+    'relative_activity': 'relative_activity'
+}
+DEFAULT_REPORT = ['commits', 'forks', 'issues', 'pulls', 'stargazers']
+
+"""
+@api {get} /:owner/:repo/report Health Report
+@apiDescription Resolves the repository once and computes the metrics in parallel, so the report takes about as
+                long as its slowest metric. Each metric has the seconds from the start of the report until it
+                was finished, and an error instead of data if it failed: "Timed out", or "Internal error" with the
+                details in the log. Metrics already being computed for another request are shared with it.
+@apiName Report
+@apiGroup Misc
+
+@apiParam {String} owner Username of the owner of the GitHub repository
+@apiParam {String} repo Name of the GitHub repository
+@apiParam {String} [metrics] Comma separated metrics, defaults to commits,forks,issues,pulls,stargazers. Repeated
+                            metrics are reported once.
+@apiParam {String} [start] Leave out what happened before this date, e.g. 2017-01-01
+@apiParam {String} [end] Leave out what happened after this date
+
+@apiSuccessExample {json} Success-Response:
+                    {
+                        "repo": "rails/rails",
+                        "repoid": 78852,
+                        "elapsed": 0.84,
+                        "metrics": {
+                            "commits": {
+                                "finished": 0.84,
+                                "data": [{"date": "2015-01-01T00:00:00.000Z", "commits": 153}]
+                            },
+                            "stargazers": {
+                                "finished": 0.31,
+                                "data": [{"date": "2015-01-01T00:00:00.000Z", "watchers": 133}]
+                            }
+                        }
+                    }
+"""
+@app.route('/{}/<owner>/<repo>/report'.format(GHDATA_API_VERSION))
+def report(owner, repo):
+    metrics = list(OrderedDict.fromkeys(m.strip() for m in request.args.get('metrics', ','.join(DEFAULT_REPORT)).split(',') if m.strip()))
+    unknown = [m for m in metrics if m not in REPORT_METRICS]
+    if (unknown):
+        return Response(response=json.dumps({'error': 'Unknown metrics', 'metrics': unknown}), status=400, mimetype="application/json")
+    start = time.time()
+    repoid = client.get_raw('repoid', owner=owner, repo=repo)
+    if (not repoid):
+        return Response(response='{"error": "Repository not found"}', status=404, mimetype="application/json")
+    finished = {}
+    futures = {}
+    for metric in metrics:
+        futures[metric] = client.submit_shared(REPORT_METRICS[metric], repoid=repoid, **date_range(REPORT_METRICS[metric]))
+        futures[metric].add_done_callback(lambda future, metric=metric: finished.setdefault(metric, time.time()))
+    # Metrics are serialized as they are, so their JSON is pieced together instead of parsed and dumped again
+    pieces = []
+    for metric in metrics:
+        try:
+            data = GHDataClient.serialize(client.result(futures[metric]))
+            body = '"data": {}'.format(data if isinstance(data, str) else json.dumps(data))
+        except QueryTimeout:
+            body = '"error": "Timed out"'
+        except Exception:
+            # The exception's text can hold SQL and connection details, so it is only logged
+            app.logger.exception('{} of the {}/{} report failed'.format(metric, owner, repo))
+            body = '"error": "Internal error"'
+        pieces.append('{}: {{"finished": {}, {}}}'.format(json.dumps(metric), round(finished.get(metric, time.time()) - start, 3), body))
+    payload = '{{"repo": {}, "repoid": {}, "elapsed": {}, "metrics": {{{}}}}}'.format(
+        json.dumps('{}/{}'.format(owner, repo)), int(repoid), round(time.time() - start, 3), ', '.join(pieces))
+    return Response(response=payload, status=200, mimetype="application/json")
 
 
 if __name__ == '__main__':
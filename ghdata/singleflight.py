@@ -0,0 +1,169 @@
+#SPDX-License-Identifier: MIT
+
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+from .cache import copy
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class SingleFlight(object):
+    """
+    Lets concurrent identical calls wait on one computation and share its result
+    """
+
+    def __init__(self, lock_dir=None, result_ttl=5):
+        """
+        :param lock_dir: Directory shared by the server's worker processes. When set, calls are also coalesced
+                         across processes with file locks, and results are handed over through pickles. Needs fcntl.
+        :param result_ttl: Seconds a result handed over between processes is reused
+        """
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.result_ttl = result_ttl
+        self.leaders = 0
+        self.followers = 0
+        self.__calls = {}
+        self.__lock = threading.Lock()
+        self.__swept = 0
+        if (self.lock_dir and not os.path.isdir(self.lock_dir)):
+            os.makedirs(self.lock_dir)
+        if (self.lock_dir):
+            self.sweep()
+
+    def do(self, key, func):
+        """
+        Calls func, unless a call with the same key is already in flight, in which case its result is shared
+
+        :param key: Hashable identifying the call
+        :param func: Function without arguments computing the result
+        :return: The result, copied for every caller so they can't modify each other's DataFrames
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if (leader):
+                call = _Call()
+                self.__calls[key] = call
+                self.leaders += 1
+            else:
+                self.followers += 1
+        if (not leader):
+            call.done.wait()
+            if (call.error is not None):
+                raise call.error
+            return copy(call.result)
+        try:
+            call.result = self.__run(key, func)
+            return copy(call.result)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self.__lock:
+            return {'leaders': self.leaders, 'followers': self.followers, 'in_flight': len(self.__calls)}
+
+    def __run(self, key, func):
+        if (not self.lock_dir):
+            return func()
+        path = os.path.join(self.lock_dir, hashlib.sha1(repr(key).encode('utf-8')).hexdigest())
+        while (True):
+            lock = open(path + '.lock', 'a')
+            # Blocks while another process computes the same result
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if (same_file(lock, path + '.lock')):
+                break
+            # Swept while waiting for it, so lock the file that replaced it
+            lock.close()
+        try:
+            try:
+                if (time.time() - os.path.getmtime(path + '.pickle') < self.result_ttl):
+                    with open(path + '.pickle', 'rb') as shared:
+                        return pickle.load(shared)
+            except (OSError, IOError, EOFError, pickle.UnpicklingError):
+                pass
+            result = func()
+            handle, temp = tempfile.mkstemp(dir=self.lock_dir, suffix='.tmp')
+            with os.fdopen(handle, 'wb') as shared:
+                pickle.dump(result, shared, pickle.HIGHEST_PROTOCOL)
+            os.rename(temp, path + '.pickle')
+            return result
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+            if (time.time() - self.__swept >= self.result_ttl):
+                self.sweep()
+
+    def sweep(self):
+        """
+        Deletes the results handed over between processes once they are older than result_ttl, and the lock files
+        no process is using, so the lock directory only holds the calls of the last few seconds
+
+        :return: Number of files deleted
+        """
+        self.__swept = time.time()
+        deleted = 0
+        for name in os.listdir(self.lock_dir):
+            path = os.path.join(self.lock_dir, name)
+            try:
+                age = self.__swept - os.path.getmtime(path)
+                if (name.endswith('.pickle') and age >= self.result_ttl):
+                    os.remove(path)
+                    deleted += 1
+                # Left by a process that died while writing its result
+                elif (name.endswith('.tmp') and age >= max(self.result_ttl, 60)):
+                    os.remove(path)
+                    deleted += 1
+                elif (name.endswith('.lock') and age >= self.result_ttl and remove_unlocked(path)):
+                    deleted += 1
+            except (OSError, IOError):
+                # Deleted by another process meanwhile
+                pass
+        return deleted
+
+
+def same_file(handle, path):
+    """
+    Whether an open file is still the one at path
+    """
+    try:
+        return os.fstat(handle.fileno()).st_ino == os.stat(path).st_ino
+    except (OSError, IOError):
+        return False
+
+def remove_unlocked(path):
+    """
+    Deletes a lock file unless a process holds or waits for its lock. Processes that opened it meanwhile notice it
+    was deleted once they get the lock, see SingleFlight.__run.
+
+    :return: Whether it was deleted
+    """
+    with open(path, 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (OSError, IOError):
+            return False
+        try:
+            if (not same_file(lock, path)):
+                return False
+            os.remove(path)
+            return True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
@@ -0,0 +1,228 @@
+#SPDX-License-Identifier: MIT
+"""
+Fills a database with synthetic data in the shape of the GHTorrent schema, for benchmarks and tests
+
+Activity is spread over repos with a Zipf-like skew, so a few repos are as busy as the popular repos of the real
+dump and most have hardly any activity.
+"""
+
+import bisect
+import random
+import datetime
+import sqlalchemy as s
+
+metadata = s.MetaData()
+
+Column, Integer, String, DateTime = s.Column, s.Integer, s.String, s.DateTime
+
+def _table(name, *columns):
+    return s.Table(name, metadata, *columns)
+
+TABLES = [
+    _table('users', Column('id', Integer, primary_key=True), Column('login', String(255)), Column('company', String(255)),
+           Column('location', String(255)), Column('created_at', DateTime), Column('type', String(255))),
+    _table('projects', Column('id', Integer, primary_key=True), Column('url', String(255)), Column('owner_id', Integer),
+           Column('name', String(255)), Column('description', String(255)), Column('language', String(255)),
+           Column('created_at', DateTime), Column('forked_from', Integer), Column('deleted', Integer)),
+    _table('commits', Column('id', Integer, primary_key=True), Column('sha', String(40)), Column('author_id', Integer),
+           Column('committer_id', Integer), Column('project_id', Integer), Column('created_at', DateTime)),
+    _table('project_commits', Column('project_id', Integer), Column('commit_id', Integer)),
+    _table('commit_comments', Column('id', Integer, primary_key=True), Column('commit_id', Integer), Column('user_id', Integer),
+           Column('body', String(255)), Column('created_at', DateTime)),
+    _table('watchers', Column('repo_id', Integer), Column('user_id', Integer), Column('created_at', DateTime)),
+    _table('project_members', Column('repo_id', Integer), Column('user_id', Integer), Column('created_at', DateTime)),
+    _table('issues', Column('id', Integer, primary_key=True), Column('repo_id', Integer), Column('reporter_id', Integer),
+           Column('assignee_id', Integer), Column('pull_request', Integer), Column('pull_request_id', Integer),
+           Column('created_at', DateTime), Column('issue_id', Integer)),
+    _table('issue_events', Column('event_id', Integer, primary_key=True), Column('issue_id', Integer), Column('actor_id', Integer),
+           Column('action', String(255)), Column('created_at', DateTime)),
+    _table('issue_comments', Column('issue_id', Integer), Column('user_id', Integer), Column('comment_id', Integer),
+           Column('created_at', DateTime)),
+    _table('pull_requests', Column('id', Integer, primary_key=True), Column('head_repo_id', Integer), Column('base_repo_id', Integer),
+           Column('user_id', Integer), Column('pullreq_id', Integer), Column('intra_branch', Integer)),
+    _table('pull_request_history', Column('id', Integer, primary_key=True), Column('pull_request_id', Integer),
+           Column('created_at', DateTime), Column('action', String(255)), Column('actor_id', Integer)),
+    _table('pull_request_comments', Column('pull_request_id', Integer), Column('user_id', Integer), Column('comment_id', Integer),
+           Column('body', String(255)), Column('created_at', DateTime)),
+]
+
+START = datetime.datetime(2012, 1, 1)
+DAYS = 5 * 365
+LOCATIONS = ['Berlin', 'San Francisco', 'Bangalore', 'Sao Paulo', 'Tokyo', 'Lagos', None, '']
+
+class Generator(object):
+    """
+    Generates GHTorrent-shaped rows
+
+    At scale 1 there are 200 repos, 2,000 users and about 50,000 commits. Every other table grows in proportion.
+    """
+
+    def __init__(self, db, scale=1.0, skew=1.2, seed=0, batch_size=5000):
+        """
+        :param db: SQLAlchemy engine of the database to fill
+        :param scale: Multiplies the number of rows of every table
+        :param skew: Exponent of the Zipf-like distribution of activity over repos, 0 spreads it evenly
+        :param seed: Seed of the random generator, so runs can be repeated
+        :param batch_size: Rows inserted at a time
+        """
+        self.db = db
+        self.scale = scale
+        self.skew = skew
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.counts = {}
+
+    def create(self, drop=False):
+        """
+        Creates the tables, dropping existing ones first if asked to
+        """
+        if drop:
+            metadata.drop_all(self.db)
+        metadata.create_all(self.db)
+
+    def generate(self):
+        """
+        Creates the tables and fills them
+
+        :return: Dictionary of table names to the number of rows inserted
+        """
+        self.create(drop=True)
+        users = max(int(2000 * self.scale), 10)
+        repos = max(int(200 * self.scale), 2)
+        self.__users(users)
+        self.__projects(repos, users)
+        weights = self.__weights(repos)
+        self.__commits(int(50000 * self.scale), weights, users)
+        self.__watchers(int(20000 * self.scale), weights, users)
+        self.__members(repos, users)
+        self.__issues(int(10000 * self.scale), weights, users)
+        self.__pulls(int(8000 * self.scale), weights, users)
+        return self.counts
+
+    def __insert(self, table, rows):
+        batch = []
+        count = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.db.execute(metadata.tables[table].insert(), batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.db.execute(metadata.tables[table].insert(), batch)
+            count += len(batch)
+        self.counts[table] = count
+
+    def __date(self, after=None):
+        start = after or START
+        return start + datetime.timedelta(seconds=self.random.randint(0, max(int((START + datetime.timedelta(days=DAYS) - start).total_seconds()), 1)))
+
+    def __user(self, users):
+        # Some users are far more active than others too
+        return min(int(self.random.paretovariate(1.16)), users)
+
+    def __repo(self, cumulative):
+        """
+        Picks a repo id, repo 1 being the most likely
+
+        :param cumulative: Running totals of the repos' weights
+        """
+        return min(bisect.bisect_left(cumulative, self.random.uniform(0, cumulative[-1])), len(cumulative) - 1) + 1
+
+    def __weights(self, repos):
+        # Repo ids are ranked by popularity, repo 1 gets the most activity
+        cumulative, total = [], 0.0
+        for rank in range(1, repos + 1):
+            total += 1.0 / (rank ** self.skew)
+            cumulative.append(total)
+        return cumulative
+
+    def __users(self, users):
+        self.__insert('users', ({'id': i, 'login': 'user{}'.format(i), 'company': None,
+                                 'location': self.random.choice(LOCATIONS), 'created_at': self.__date(), 'type': 'USR'}
+                                for i in range(1, users + 1)))
+
+    def __projects(self, repos, users):
+        self.repos = repos
+        rows = [{'id': i, 'url': 'https://api.github.com/repos/user{}/repo{}'.format(i, i), 'owner_id': min(i, users),
+                 'name': 'repo{}'.format(i), 'description': None, 'language': 'Python', 'created_at': self.__date(),
+                 'forked_from': None, 'deleted': 0} for i in range(1, repos + 1)]
+        # Forks of the popular repos
+        weights = self.__weights(repos)
+        forks = int(2000 * self.scale)
+        for i in range(repos + 1, repos + forks + 1):
+            owner = self.__user(users)
+            rows.append({'id': i, 'url': 'https://api.github.com/repos/user{}/repo{}'.format(owner, i), 'owner_id': owner,
+                         'name': 'repo{}'.format(i), 'description': None, 'language': 'Python', 'created_at': self.__date(),
+                         'forked_from': self.__repo(weights), 'deleted': 0})
+        self.__insert('projects', rows)
+
+    def __commits(self, count, weights, users):
+        commits, project_commits, comments = [], [], []
+        for i in range(1, count + 1):
+            repo = self.__repo(weights)
+            author = self.__user(users)
+            created = self.__date()
+            commits.append({'id': i, 'sha': '{:040x}'.format(i), 'author_id': author, 'committer_id': author,
+                            'project_id': repo, 'created_at': created})
+            project_commits.append({'project_id': repo, 'commit_id': i})
+            if self.random.random() < 0.05:
+                comments.append({'id': len(comments) + 1, 'commit_id': i, 'user_id': self.__user(users), 'body': '',
+                                 'created_at': self.__date(created)})
+        self.__insert('commits', commits)
+        self.__insert('project_commits', project_commits)
+        self.__insert('commit_comments', comments)
+
+    def __watchers(self, count, weights, users):
+        self.__insert('watchers', ({'repo_id': self.__repo(weights), 'user_id': self.__user(users), 'created_at': self.__date()}
+                                   for _ in range(count)))
+
+    def __members(self, repos, users):
+        self.__insert('project_members', ({'repo_id': repo, 'user_id': self.__user(users), 'created_at': self.__date()}
+                                          for repo in range(1, repos + 1) for _ in range(self.random.randint(1, 5))))
+
+    def __issues(self, count, weights, users):
+        issues, events, comments = [], [], []
+        for i in range(1, count + 1):
+            created = self.__date()
+            issues.append({'id': i, 'repo_id': self.__repo(weights), 'reporter_id': self.__user(users), 'assignee_id': None,
+                           'pull_request': 0, 'pull_request_id': None, 'created_at': created, 'issue_id': i})
+            for _ in range(self.random.randint(0, 4)):
+                comments.append({'issue_id': i, 'user_id': self.__user(users), 'comment_id': len(comments) + 1,
+                                 'created_at': self.__date(created)})
+            if self.random.random() < 0.7:
+                events.append({'event_id': len(events) + 1, 'issue_id': i, 'actor_id': self.__user(users), 'action': 'closed',
+                               'created_at': self.__date(created)})
+        self.__insert('issues', issues)
+        self.__insert('issue_events', events)
+        self.__insert('issue_comments', comments)
+
+    def __pulls(self, count, weights, users):
+        pulls, history, comments = [], [], []
+        for i in range(1, count + 1):
+            repo = self.__repo(weights)
+            user = self.__user(users)
+            opened = self.__date()
+            pulls.append({'id': i, 'head_repo_id': repo, 'base_repo_id': repo, 'user_id': user, 'pullreq_id': i, 'intra_branch': 0})
+            history.append({'id': len(history) + 1, 'pull_request_id': i, 'created_at': opened, 'action': 'opened', 'actor_id': user})
+            closed = self.__date(opened)
+            history.append({'id': len(history) + 1, 'pull_request_id': i, 'created_at': closed,
+                            'action': 'merged' if self.random.random() < 0.6 else 'closed', 'actor_id': self.__user(users)})
+            for _ in range(self.random.randint(0, 3)):
+                comments.append({'pull_request_id': i, 'user_id': self.__user(users), 'comment_id': len(comments) + 1,
+                                 'body': '', 'created_at': self.__date(opened)})
+        self.__insert('pull_requests', pulls)
+        self.__insert('pull_request_history', history)
+        self.__insert('pull_request_comments', comments)
+
+
+def generate(db, scale=1.0, skew=1.2, seed=0):
+    """
+    Creates GHTorrent-shaped tables in a database and fills them, see Generator
+
+    :param db: SQLAlchemy engine or database string
+    :return: Dictionary of table names to the number of rows inserted
+    """
+    if not hasattr(db, 'execute'):
+        db = s.create_engine(db)
+    return Generator(db, scale=scale, skew=skew, seed=seed).generate()
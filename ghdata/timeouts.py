@@ -0,0 +1,116 @@
+#SPDX-License-Identifier: MIT
+
+import re
+import time
+import threading
+import sqlalchemy as s
+
+class QueryTimeout(Exception):
+    """
+    Raised when a GHData call runs out of its time budget
+    """
+
+    def __init__(self, method, seconds):
+        super(QueryTimeout, self).__init__('{} did not finish within {} seconds'.format(method, seconds))
+        self.method = method
+        self.seconds = seconds
+
+
+class QueryBudget(object):
+    """
+    Time a GHData call may spend in the database, and the connections its queries are running on
+    """
+
+    def __init__(self, method, seconds):
+        """
+        :param method: Name of the GHData method the budget is for
+        :param seconds: Time allowed from now
+        """
+        self.method = method
+        self.seconds = seconds
+        self.deadline = time.time() + seconds
+        self.cancelled = False
+        self.connection_ids = set()
+        # Connections whose query is being killed, they may not go back to the pool until it is
+        self.killing = set()
+        self.__lock = threading.Lock()
+        self.__killed = threading.Condition(self.__lock)
+
+    def remaining(self):
+        """
+        Seconds left, raises QueryTimeout if there are none
+        """
+        remaining = self.deadline - time.time()
+        if (self.cancelled or remaining <= 0):
+            raise QueryTimeout(self.method, self.seconds)
+        return remaining
+
+    def expired(self):
+        return self.cancelled or time.time() >= self.deadline
+
+    def running(self, connection_id):
+        with self.__lock:
+            self.connection_ids.add(connection_id)
+
+    def finished(self, connection_id):
+        """
+        Called when a query is done with its connection, waits if the query is being killed so the connection isn't
+        returned to the pool, and another request's query on it killed
+        """
+        with self.__lock:
+            self.connection_ids.discard(connection_id)
+            while (connection_id in self.killing):
+                self.__killed.wait()
+
+    def cancel(self, kill=None):
+        """
+        Marks the budget as spent
+
+        :param kill: Called with the id of each connection still running one of the budget's queries. It is called
+                     without holding the budget's lock, so the budget's other queries can finish meanwhile.
+        """
+        with self.__lock:
+            self.cancelled = True
+            connection_ids = sorted(self.connection_ids) if kill is not None else []
+            self.connection_ids = set()
+            self.killing.update(connection_ids)
+        for connection_id in connection_ids:
+            try:
+                kill(connection_id)
+            finally:
+                with self.__lock:
+                    self.killing.discard(connection_id)
+                    self.__killed.notify_all()
+
+
+# The start of a statement, where MySQL reads optimizer hints
+SELECT_RE = re.compile(r'^\s*SELECT\b', re.IGNORECASE)
+
+def hint_execution_time(db):
+    """
+    Limits the SELECTs run on a MySQL engine with the max_execution_time execution option, in milliseconds, by
+    adding a MAX_EXECUTION_TIME optimizer hint to the statement. No extra round trips are needed, unlike setting the
+    session variable before and after each query.
+
+    :param db: SQLAlchemy engine
+    """
+    @s.event.listens_for(db, 'before_cursor_execute', retval=True)
+    def add_hint(conn, cursor, statement, parameters, context, executemany):
+        milliseconds = conn.get_execution_options().get('max_execution_time')
+        if milliseconds:
+            statement = SELECT_RE.sub('SELECT /*+ MAX_EXECUTION_TIME({}) */'.format(int(milliseconds)), statement, count=1)
+        return statement, parameters
+
+def remember_connection_ids(db):
+    """
+    Reads the server's id of each connection of a MySQL engine once, when it is opened, into the pool's
+    connection_id info of the connection so a query running on it can be killed
+
+    :param db: SQLAlchemy engine
+    """
+    @s.event.listens_for(db, 'connect')
+    def read_id(dbapi_connection, record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('SELECT CONNECTION_ID()')
+        record.info['connection_id'] = cursor.fetchone()[0]
+        cursor.close()
@@ -0,0 +1,111 @@
+#SPDX-License-Identifier: MIT
+"""
+Calendar buckets of timeseries computed in pandas: summing daily counts into coarser buckets, filling the
+buckets nothing happened in with zeros, and encoding a series as its first bucket and an array of values
+
+Buckets are labelled with their first day and weeks start on Monday, as in the SQL of ghdata.dialects.
+Group types are the converted members of GROUP_TYPES, e.g. 'WEEK'.
+"""
+
+import datetime
+import pandas as pd
+
+# pandas periods that start on the first day of each bucket
+PERIODS = {'DAY': 'D', 'WEEK': 'W-SUN', 'MONTH': 'M', 'YEAR': 'Y'}
+
+def bucket_start(day, group_type):
+    """
+    The first day of the bucket a day falls in
+
+    :param day: date
+    :return: date
+    """
+    if group_type == 'WEEK':
+        return day - datetime.timedelta(days=day.weekday())
+    if group_type == 'MONTH':
+        return day.replace(day=1)
+    if group_type == 'YEAR':
+        return day.replace(month=1, day=1)
+    return day
+
+def bucket_starts(dates, group_type):
+    """
+    Vectorized bucket_start
+
+    :param dates: Series of dates, datetimes or date strings
+    :return: Series of dates
+    """
+    return pd.to_datetime(dates).dt.to_period(PERIODS[group_type]).dt.start_time.dt.date
+
+def resample(daily, group_type):
+    """
+    Sums a daily timeseries into coarser buckets. Only buckets that have days are returned, as when the
+    database groups the rows.
+
+    :param daily: DataFrame with a date column, optionally a repoid column, and count columns
+    :return: DataFrame with the same columns, one row per bucket
+    """
+    if group_type == 'DAY' or daily.empty:
+        return daily
+    keys = [bucket_starts(daily['date'], group_type).rename('date')]
+    if 'repoid' in daily.columns:
+        keys.insert(0, 'repoid')
+    resampled = daily.drop(columns='date').groupby(keys, sort=True).sum().reset_index()
+    return resampled[list(daily.columns)]
+
+def fill_gaps(frame, group_type, start=None, end=None):
+    """
+    Adds a row of zeros for every bucket missing from a timeseries, so it has one row per bucket
+
+    :param frame: DataFrame with one row per bucket that has counts, dated with the first day of the bucket
+    :param start: First day of the series, the first bucket with counts by default
+    :param end: Last day of the series, the last bucket with counts by default
+    :return: DataFrame with the same columns and every bucket from start to end, in order
+    """
+    values = [column for column in frame.columns if column not in ('date', 'repoid')]
+    dates = bucket_starts(frame['date'], group_type) if len(frame) else pd.Series([], dtype=object)
+    first = bucket_start(pd.Timestamp(start).date(), group_type) if start is not None else (dates.min() if len(dates) else None)
+    last = bucket_start(pd.Timestamp(end).date(), group_type) if end is not None else (dates.max() if len(dates) else None)
+    if first is None or last is None or first > last:
+        return frame.iloc[0:0]
+    buckets = pd.period_range(first, last, freq=PERIODS[group_type]).start_time.date
+    frame = frame.assign(date=dates.values)
+    if 'repoid' not in frame.columns:
+        filled = frame.set_index('date')[values].reindex(buckets, fill_value=0)
+        return filled.rename_axis('date').reset_index()[list(frame.columns)]
+    parts = []
+    for repoid, rows in frame.groupby('repoid', sort=True):
+        filled = rows.set_index('date')[values].reindex(buckets, fill_value=0).rename_axis('date').reset_index()
+        parts.append(filled.assign(repoid=repoid)[list(frame.columns)])
+    return pd.concat(parts, ignore_index=True) if parts else frame.iloc[0:0]
+
+def encode(frame, step):
+    """
+    Compact form of a gap-filled timeseries: the first bucket, the bucket size and the counts in order,
+    rather than an object with a date for each bucket
+
+    :param frame: DataFrame returned by fill_gaps
+    :param step: Group type of its buckets
+    :return: Dictionary with start, step and values, an array per count column. Timeseries of several repos
+        are a list of those, each with its repoid.
+    """
+    values = [column for column in frame.columns if column not in ('date', 'repoid')]
+    def series(rows):
+        return {
+            'start': pd.Timestamp(rows['date'].iloc[0]).date().isoformat() if len(rows) else None,
+            'step': step.lower(),
+            'values': dict((str(column), [number(v) for v in rows[column].tolist()]) for column in values)
+        }
+    if 'repoid' not in frame.columns:
+        return series(frame)
+    return [dict(series(rows), repoid=number(repoid)) for repoid, rows in frame.groupby('repoid', sort=True)]
+
+def number(value):
+    """
+    Makes a count JSON-serializable, None for missing values
+    """
+    if value is None or value != value:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    return int(value) if float(value).is_integer() else float(value)
@@ -39,10 +39,13 @@ setup(
         'Programming Language :: Python :: 3.5',
     ],
     keywords='ghtorrent github api data',
-    install_requires=['flask', 'flask-cors', 'PyMySQL', 'requests', 'python-dateutil', 'sqlalchemy', 'pandas', 'pytest'],
+    install_requires=['flask', 'flask-cors', 'PyMySQL', 'requests', 'python-dateutil', 'sqlalchemy', 'pandas', 'pytest', 'futures; python_version < "3.0"'],
     extras_require={
         'dev': ['check-manifest'],
         'test': ['coverage'],
+        'formats': ['pyarrow', 'msgpack>=1.0'],
+        'server': ['waitress'],
+        'columnar': ['duckdb', 'duckdb_engine', 'pyarrow'],
     },
     entry_points={
         'console_scripts': [
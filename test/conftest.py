@@ -0,0 +1,24 @@
+import pytest
+import sqlalchemy as s
+from ghdata import server, synthetic
+
+@pytest.fixture
+def ghtorrent(tmpdir):
+    """
+    Database string of a SQLite database with the GHTorrent tables, holding only the rails/rails repo with id 1
+    """
+    dbstr = 'sqlite:///' + str(tmpdir.join('ghtorrent.db'))
+    db = s.create_engine(dbstr)
+    synthetic.metadata.create_all(db)
+    db.execute("INSERT INTO users (id, login) VALUES (1, 'rails')")
+    db.execute("INSERT INTO projects (id, name, owner_id, created_at) VALUES (1, 'rails', 1, '2015-01-01 00:00:00')")
+    db.dispose()
+    return dbstr
+
+@pytest.fixture
+def app(gh, monkeypatch):
+    """
+    Test client of the server, answering from the test module's gh fixture. server.client is restored afterwards.
+    """
+    monkeypatch.setattr(server, 'client', server.GHDataClient(ghdata=gh))
+    return server.app.test_client()
@@ -0,0 +1,28 @@
+import pytest
+from ghdata import GHData
+from ghdata.advisor import IndexAdvisor
+
+@pytest.fixture
+def gh(tmpdir):
+    gh = GHData('sqlite:///' + str(tmpdir.join('ghtorrent.db')))
+    gh.db.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, login TEXT, location TEXT)')
+    gh.db.execute('CREATE TABLE projects (id INTEGER PRIMARY KEY, name TEXT, owner_id INTEGER, forked_from INTEGER, created_at TEXT)')
+    gh.db.execute("INSERT INTO users VALUES (1, 'rails', NULL)")
+    gh.db.execute("INSERT INTO projects VALUES (78852, 'rails', 1, NULL, '2017-01-01'), (3, 'fork', 1, 78852, '2017-01-02')")
+    return gh
+
+def test_captures_queries(gh):
+    queries = gh.capture_queries('forks', repoid=78852)
+    assert len(queries) == 1
+    assert 'forked_from' in str(queries[0][0])
+
+def test_suggests_index_for_full_scan(gh):
+    report = IndexAdvisor(gh).advise(78852, methods=['forks'])[0]
+    assert any('full scan' in step['problems'] for plan in report['plans'] for step in plan)
+    assert 'CREATE INDEX ghdata_projects_forked_from ON projects (forked_from)' in report['indexes']
+
+def test_apply_creates_indexes(gh):
+    report = IndexAdvisor(gh).advise(78852, methods=['forks'], apply=True)[0]
+    assert 'after' in report
+    # Once the index exists it isn't suggested again
+    assert 'CREATE INDEX ghdata_projects_forked_from ON projects (forked_from)' not in IndexAdvisor(gh).advise(78852, methods=['forks'])[0]['indexes']
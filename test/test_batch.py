@@ -0,0 +1,46 @@
+import json
+import pytest
+from ghdata import GHData, server
+
+URL = '/{}/batch/timeseries/'.format(server.GHDATA_API_VERSION)
+
+@pytest.fixture
+def gh(ghtorrent):
+    gh = GHData(ghtorrent)
+    gh.db.execute("INSERT INTO users (id, login) VALUES (2, 'akka')")
+    gh.db.execute("INSERT INTO projects (id, name, owner_id, created_at) VALUES (2, 'akka', 2, '2015-01-01 00:00:00')")
+    gh.db.execute("""INSERT INTO commits (project_id, created_at) VALUES (1, '2017-01-02 00:00:00'), (1, '2017-01-03 00:00:00'),
+                     (2, '2017-01-10 00:00:00')""")
+    gh.db.execute("""INSERT INTO watchers VALUES (1, 1, '2017-01-02 00:00:00'), (1, 2, '2017-02-02 00:00:00'),
+                     (2, 3, '2017-01-05 00:00:00')""")
+    return gh
+
+def rows(response):
+    assert response.status_code == 200
+    return [(row['repo'], row['date'][:10], row.get('commits', row.get('watchers'))) for row in json.loads(response.data)]
+
+def test_one_query_for_many_repos(gh):
+    df = gh.commits([1, 2])
+    assert list(df['repoid']) == [1, 2]
+    assert list(df['commits']) == [2, 1]
+    assert list(gh.stargazers_grouped([1, 2], 'month')['watchers']) == [1, 1, 1]
+
+def test_repos_as_parameters(app):
+    assert rows(app.get(URL + 'commits?repo=rails/rails&repo=akka/akka&repo=nobody/nothing')) == [
+        ('rails/rails', '2017-01-02', 2), ('akka/akka', '2017-01-09', 1)]
+
+def test_repos_posted_as_json(app):
+    response = app.post(URL + 'stargazers?group_type=month', data=json.dumps({'repos': ['rails/rails', 'akka/akka']}),
+                        content_type='application/json')
+    assert rows(response) == [('rails/rails', '2017-01-01', 1), ('rails/rails', '2017-02-01', 1), ('akka/akka', '2017-01-01', 1)]
+
+def test_unknown_repos_and_metrics(app):
+    assert json.loads(app.get(URL + 'commits?repo=nobody/nothing').data) == []
+    assert app.get(URL + 'bogus?repo=rails/rails').status_code == 404
+
+def test_number_of_repos_is_capped(app, monkeypatch):
+    monkeypatch.setattr(server, 'max_batch_repos', 2)
+    assert app.get(URL + 'commits?repo=rails/rails&repo=akka/akka').status_code == 200
+    response = app.post(URL + 'commits?repo=rails/rails', data=json.dumps({'repos': ['akka/akka', 'nobody/nothing']}),
+                        content_type='application/json')
+    assert response.status_code == 400
@@ -0,0 +1,51 @@
+import argparse
+import pytest
+import sqlalchemy
+from ghdata import benchmark, commands, server, synthetic
+
+@pytest.fixture(scope='module')
+def dbstr(tmpdir_factory):
+    dbstr = 'sqlite:///' + str(tmpdir_factory.mktemp('benchmark').join('ghtorrent.db'))
+    synthetic.generate(dbstr, scale=0.05)
+    return dbstr
+
+def test_generated_data_is_skewed(dbstr):
+    db = sqlalchemy.create_engine(dbstr)
+    counts = [count for _, count in db.execute('SELECT project_id, COUNT(*) FROM commits GROUP BY project_id ORDER BY project_id')]
+    assert sum(counts) == 2500
+    assert counts[0] > counts[1] > counts[-1]
+    assert db.execute("SELECT COUNT(*) FROM pull_request_history WHERE action = 'merged'").scalar() > 0
+
+def test_benchmark_methods(dbstr):
+    results = benchmark.run(dbstr, repos=1, repeats=1, methods=['commits', 'forks', 'contributors'], routes=False)
+    assert results['repos'] == ['user1/repo1']
+    assert all('median' in timing for timing in results['methods'].values())
+
+def test_compare_flags_regressions():
+    baseline = {'methods': {'commits user1/repo1': {'median': 0.1}, 'forks user1/repo1': {'median': 0.1}}}
+    current = {'methods': {'commits user1/repo1': {'median': 0.2}, 'forks user1/repo1': {'median': 0.101}}}
+    regressions = benchmark.compare(baseline, current)
+    assert [r['name'] for r in regressions] == ['commits user1/repo1']
+    assert regressions[0]['ratio'] == pytest.approx(2)
+
+def test_compare_benchmarks_prints_regressions(tmpdir, capsys):
+    baseline, current = str(tmpdir.join('baseline.json')), str(tmpdir.join('current.json'))
+    benchmark.save({'methods': {'commits user1/repo1': {'median': 0.1}, 'forks user1/repo1': {'median': 0.0},
+                                'issues user1/repo1': {'median': 0.1}}}, baseline)
+    benchmark.save({'methods': {'commits user1/repo1': {'median': 0.2}, 'forks user1/repo1': {'median': 0.01},
+                                'issues user1/repo1': {'error': 'OperationalError: no such table'}}}, current)
+    args = argparse.Namespace(baseline=baseline, current=current, threshold=0.25)
+    assert commands.compare_benchmarks(None, args) == 1
+    printed = capsys.readouterr().out.splitlines()
+    assert 'commits user1/repo1: 0.1000s -> 0.2000s (100% slower)' in printed
+    assert 'forks user1/repo1: 0.0000s -> 0.0100s' in printed
+    assert 'issues user1/repo1: now fails with OperationalError: no such table' in printed
+    assert printed[-1] == '3 regressions'
+
+def test_benchmark_routes_restores_the_server_client(dbstr, monkeypatch):
+    client = server.GHDataClient()
+    monkeypatch.setattr(server, 'client', client)
+    results = benchmark.run(dbstr, repos=1, repeats=1, methods=['commits'])
+    assert server.client is client
+    assert '/{}/<owner>/<repo>/timeseries/commits user1/repo1'.format(server.GHDATA_API_VERSION) in results['routes']
+    assert all('median' in timing for timing in results['routes'].values())
@@ -0,0 +1,68 @@
+import time
+import pandas
+from ghdata.cache import MetricCache, cacheable
+
+class FakeGHData(object):
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.calls = 0
+
+    @cacheable
+    def commits(self, repoid, group_type='WEEK'):
+        self.calls += 1
+        return pandas.DataFrame({'date': ['2017-01-01'], 'commits': [repoid]})
+
+def test_cache_hit():
+    gh = FakeGHData(MetricCache())
+    gh.commits(78852)
+    gh.commits('78852')
+    gh.commits(repoid=78852, group_type='WEEK')
+    assert gh.calls == 1
+    gh.commits(78852, 'YEAR')
+    assert gh.calls == 2
+
+def test_cache_returns_copies():
+    gh = FakeGHData(MetricCache())
+    gh.commits(1)['commits'] = 5
+    assert gh.commits(1)['commits'][0] == 1
+
+def test_cache_ttl():
+    gh = FakeGHData(MetricCache(ttl=0.01))
+    gh.commits(1)
+    time.sleep(0.02)
+    gh.commits(1)
+    assert gh.calls == 2
+
+def test_cache_lru_eviction():
+    cache = MetricCache()
+    gh = FakeGHData(cache)
+    gh.commits(1)
+    cache.max_size = cache.size * 2
+    gh.commits(2)
+    gh.commits(1)
+    gh.commits(3)
+    assert cache.stats()['evictions'] == 1
+    gh.commits(1)
+    assert gh.calls == 3
+    gh.commits(2)
+    assert gh.calls == 4
+
+def test_cache_exclude():
+    gh = FakeGHData(MetricCache(exclude=['commits']))
+    gh.commits(1)
+    gh.commits(1)
+    assert gh.calls == 2
+
+def test_cache_invalidate():
+    cache = MetricCache()
+    gh = FakeGHData(cache)
+    gh.commits(1)
+    gh.commits(2)
+    assert cache.invalidate(repoid=1) == 1
+    gh.commits(1)
+    gh.commits(2)
+    assert gh.calls == 3
+    cache.invalidate(method='commits')
+    gh.commits(2)
+    assert gh.calls == 4
@@ -0,0 +1,42 @@
+import time
+import threading
+import pytest
+from ghdata import GHData, server
+
+@pytest.fixture
+def gh(ghtorrent):
+    return GHData(ghtorrent)
+
+def test_workers_cap_the_calls_running_at_once(gh, monkeypatch):
+    lock = threading.Lock()
+    running = {'now': 0, 'most': 0}
+    def slow(repoid):
+        with lock:
+            running['now'] += 1
+            running['most'] = max(running['most'], running['now'])
+        time.sleep(0.05)
+        with lock:
+            running['now'] -= 1
+        return repoid
+    monkeypatch.setattr(gh, 'commits', slow)
+    client = server.GHDataClient(ghdata=gh, workers=2)
+    futures = [client.submit('commits', repoid=repoid) for repoid in range(6)]
+    assert [client.result(future) for future in futures] == list(range(6))
+    assert running['most'] == 2
+
+def test_concurrent_first_requests_connect_once(monkeypatch):
+    created = []
+    class Connecting(object):
+        def __init__(self, **args):
+            time.sleep(0.05)
+            created.append(self)
+        def pool_status(self):
+            return {}
+    monkeypatch.setattr(server, 'GHData', Connecting)
+    client = server.GHDataClient()
+    threads = [threading.Thread(target=client.status) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
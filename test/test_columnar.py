@@ -0,0 +1,38 @@
+import os
+import pytest
+from ghdata import GHData, synthetic
+
+pytest.importorskip('duckdb')
+pytest.importorskip('duckdb_engine')
+pytest.importorskip('pyarrow')
+from ghdata.columnar import ColumnarGHData, export
+
+@pytest.fixture(scope='module')
+def backends(tmpdir_factory):
+    directory = tmpdir_factory.mktemp('columnar')
+    dbstr = 'sqlite:///' + str(directory.join('ghtorrent.db'))
+    synthetic.generate(dbstr, scale=0.02)
+    export(dbstr, str(directory.join('parquet')), rows_per_file=200, row_group_size=50)
+    return GHData(dbstr), ColumnarGHData(str(directory.join('parquet')))
+
+def test_export_sorts_and_splits_files(backends):
+    files = sorted(os.listdir(os.path.join(backends[1].directory, 'commits')))
+    assert len(files) > 1
+    project_ids = [row[0] for row in backends[1].db.execute('SELECT project_id FROM commits')]
+    assert project_ids == sorted(project_ids)
+
+@pytest.mark.parametrize('method,kwargs', [
+    ('commits', {}),
+    ('stargazers_grouped', {'group_type': 'month'}),
+    ('pulls_grouped', {'group_type': 'year'}),
+    ('contributors', {}),
+    ('committer_locations', {}),
+    ('relative_activity', {})
+])
+def test_same_results_as_the_database(backends, method, kwargs):
+    rows, columnar = backends
+    expected = getattr(rows, method)(rows.repoid('user1', 'repo1'), **kwargs)
+    actual = getattr(columnar, method)(columnar.repoid('user1', 'repo1'), **kwargs)
+    assert list(actual.columns) == list(expected.columns)
+    # Rows tied on the sort column may come in any order
+    assert sorted(actual.astype(str).values.tolist()) == sorted(expected.astype(str).values.tolist())
@@ -0,0 +1,33 @@
+import json
+import pytest
+from ghdata import GHData, server
+
+@pytest.fixture
+def gh(ghtorrent):
+    gh = GHData(ghtorrent)
+    gh.db.execute("""INSERT INTO watchers VALUES (1, 1, '2016-12-31 23:59:59'), (1, 2, '2017-01-01 00:00:00'),
+                     (1, 3, '2017-06-30 23:59:59'), (1, 4, '2017-07-01 00:00:00')""")
+    return gh
+
+def test_range_includes_whole_days(gh):
+    df = gh.stargazers_grouped(1, 'day', start='2017-01-01', end='2017-06-30')
+    assert [str(date) for date in df['date']] == ['2017-01-01', '2017-06-30']
+
+def test_open_ended_ranges(gh):
+    assert gh.stargazers(1, start='2017-01-01')['watchers'].sum() == 3
+    assert gh.stargazers(1, end='2016-12-31')['watchers'].sum() == 1
+
+def test_range_is_pushed_into_the_query(gh):
+    queries = gh.capture_queries('stargazers', repoid=1, start='2017-01-01')
+    assert 'created_at >= :start' in str(queries[0][0])
+
+def test_rollups_honour_the_range(gh):
+    gh.refresh_rollups(['stargazers'])
+    gh.use_rollups = True
+    assert gh.stargazers.uncached(gh, 1, start='2017-01-01', end='2017-06-30')['watchers'].sum() == 2
+
+def test_route_parameters(app):
+    url = '/{}/rails/rails/timeseries/stargazers'.format(server.GHDATA_API_VERSION)
+    response = app.get(url + '?start=2017-01-01&end=2017-06-30')
+    assert sum(row['watchers'] for row in json.loads(response.data)) == 2
+    assert app.get(url + '?start=yesterdayish').status_code == 400
@@ -0,0 +1,51 @@
+import datetime
+import pytest
+import sqlalchemy as s
+from ghdata import GHData
+from ghdata.dialects import DIALECTS, dialect_of
+from ghdata.timeseries import bucket_start
+
+@pytest.fixture
+def gh(tmpdir):
+    gh = GHData('sqlite:///' + str(tmpdir.join('ghtorrent.db')))
+    gh.db.execute('CREATE TABLE watchers (repo_id INTEGER, user_id INTEGER, created_at DATETIME)')
+    gh.db.execute("""INSERT INTO watchers VALUES (1, 1, '2017-03-05 23:00:00'), (1, 2, '2017-03-06 01:00:00'),
+                     (1, 3, '2017-03-12 12:00:00'), (1, 4, '2018-01-31 08:00:00'), (2, 5, '2017-03-06 02:00:00')""")
+    return gh
+
+@pytest.mark.parametrize('group_type,expected', [
+    ('day', [('2017-03-05', 1), ('2017-03-06', 1), ('2017-03-12', 1), ('2018-01-31', 1)]),
+    # Weeks start on Monday whatever the database
+    ('week', [('2017-02-27', 1), ('2017-03-06', 2), ('2018-01-29', 1)]),
+    ('month', [('2017-03-01', 3), ('2018-01-01', 1)]),
+    ('year', [('2017-01-01', 3), ('2018-01-01', 1)])
+])
+def test_buckets_start_on_their_first_day(gh, group_type, expected):
+    df = gh.stargazers_grouped(1, group_type)
+    assert [(str(date), count) for date, count in zip(df['date'], df['watchers'])] == expected
+
+# Days around the edges of weeks, months and years
+DAYS = ['2016-02-29 12:00:00', '2017-01-01 00:00:00', '2017-03-05 23:00:00', '2017-03-06 01:00:00', '2017-12-31 23:59:59']
+
+@pytest.mark.parametrize('dbstr,literal', [
+    ('sqlite://', "'{}'"),
+    # Spelled as PostgreSQL spells it
+    ('duckdb:///:memory:', "TIMESTAMP '{}'")
+])
+@pytest.mark.parametrize('group_type', ['DAY', 'WEEK', 'MONTH', 'YEAR'])
+def test_sql_buckets_match_the_pandas_buckets(dbstr, literal, group_type):
+    if dbstr.startswith('duckdb'):
+        pytest.importorskip('duckdb_engine')
+    db = s.create_engine(dbstr)
+    for day in DAYS:
+        bucket = db.execute('SELECT {}'.format(dialect_of(db).bucket(literal.format(day), group_type))).scalar()
+        assert str(bucket) == str(bucket_start(datetime.datetime.strptime(day, '%Y-%m-%d %H:%M:%S').date(), group_type)), day
+
+def test_days_between(gh):
+    sql = 'SELECT {}'.format(gh.dialect.days_between("'2017-03-05 23:00:00'", "'2017-03-06 01:00:00'"))
+    assert gh.db.execute(sql).scalar() == 1
+
+def test_every_dialect_spells_every_bucket():
+    for dialect in DIALECTS.values():
+        assert set(dialect.BUCKETS) == set(['DAY', 'WEEK', 'MONTH', 'YEAR'])
+        assert 'created_at' in dialect.bucket('created_at', 'WEEK')
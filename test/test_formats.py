@@ -0,0 +1,32 @@
+import io
+import pandas
+import pytest
+from werkzeug.datastructures import MIMEAccept
+from ghdata import formats
+
+@pytest.fixture
+def frame():
+    return pandas.DataFrame({'date': pandas.to_datetime(['2017-01-01', '2017-01-08']), 'commits': [153, 192]})
+
+def test_negotiate():
+    assert formats.negotiate() == 'json'
+    assert formats.negotiate('csv') == 'csv'
+    assert formats.negotiate('xml') is None
+    assert formats.negotiate(accept=MIMEAccept([('text/csv', 1)])) == 'csv'
+    assert formats.negotiate(accept=MIMEAccept([('*/*', 1)])) == 'json'
+    assert formats.negotiate(accept=MIMEAccept([('image/png', 1)])) is None
+
+def test_serialize_csv(frame):
+    assert formats.serialize(frame, 'csv').splitlines()[1] == '2017-01-01,153'
+
+def test_serialize_parquet(frame):
+    pytest.importorskip('pyarrow')
+    result = pandas.read_parquet(io.BytesIO(formats.serialize(frame, 'parquet')))
+    assert str(result['date'].dtype).startswith('datetime64')
+    assert result['commits'].tolist() == [153, 192]
+
+def test_serialize_msgpack(frame):
+    msgpack = pytest.importorskip('msgpack')
+    result = msgpack.unpackb(formats.serialize(frame, 'msgpack'), raw=False)
+    assert result['columns'] == ['date', 'commits']
+    assert result['data']['commits'] == [153, 192]
@@ -26,9 +26,15 @@ def test_stargazers(gh):
 def test_commits(gh):
     assert gh.commits(gh.repoid('facebook', 'folly')).isin(["2013-01-07"]).any
 
+def test_commits_batch(gh):
+    assert gh.commits([gh.repoid('facebook', 'folly'), gh.repoid('rails', 'rails')]).isin([78852]).any().any()
+
 def test_forks(gh):
     assert gh.forks(gh.repoid('facebook', 'hiphop-php')).isin(["2012-01-08"]).any
 
+def test_forks_stream(gh):
+    assert pandas.concat(gh.stream('forks', chunksize=100, repoid=gh.repoid('facebook', 'hiphop-php'))).isin(["2012-01-08"]).any().any()
+
 def test_issues(gh):
     assert gh.issues(gh.repoid('mongodb', 'mongo')).isin(["2013-01-05"]).any
 
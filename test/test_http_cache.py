@@ -0,0 +1,50 @@
+import pytest
+from ghdata import GHData, server
+
+URL = '/{}/rails/rails/timeseries/commits'.format(server.GHDATA_API_VERSION)
+
+@pytest.fixture
+def gh(ghtorrent):
+    gh = GHData(ghtorrent)
+    gh.db.execute("INSERT INTO commits (id, project_id, created_at) VALUES (1, 1, '2017-01-02 10:00:00'), (2, 1, '2017-01-03 09:30:00')")
+    return gh
+
+@pytest.fixture
+def versioned(app, monkeypatch):
+    monkeypatch.setattr(server, 'data_version', server.DataVersion(check_interval=-1))
+    return app
+
+def test_version_comes_from_the_data(gh):
+    version, last_modified = gh.data_version()
+    assert version == '1-2-0-0'
+    assert str(last_modified) == '2017-01-03 09:30:00'
+
+def test_validators(versioned):
+    response = versioned.get(URL)
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified'] == 'Tue, 03 Jan 2017 09:30:00 GMT'
+    assert response.headers['Cache-Control'] == server.cache_control
+    assert 'Accept' in response.headers['Vary']
+
+def test_not_modified(versioned):
+    etag = versioned.get(URL).headers['ETag']
+    assert versioned.get(URL, headers={'If-None-Match': etag}).status_code == 304
+    assert versioned.get(URL, headers={'If-Modified-Since': 'Tue, 03 Jan 2017 09:30:00 GMT'}).status_code == 304
+    assert versioned.get(URL, headers={'If-Modified-Since': 'Tue, 03 Jan 2017 09:00:00 GMT'}).status_code == 200
+    # Another representation of the same metric has its own ETag
+    assert versioned.get(URL, headers={'If-None-Match': etag, 'Accept': 'text/csv'}).status_code == 200
+
+def test_imported_rows_change_the_etag(gh, versioned):
+    etag = versioned.get(URL).headers['ETag']
+    gh.db.execute("INSERT INTO commits (id, project_id, created_at) VALUES (3, 1, '2017-01-04 00:00:00')")
+    response = versioned.get(URL, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_no_validators_without_a_version(versioned, monkeypatch):
+    monkeypatch.setattr(server.client, 'get_raw', lambda key, **args: None if key == 'data_version' else [])
+    response = versioned.get(URL)
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    assert 'Last-Modified' not in response.headers
@@ -0,0 +1,72 @@
+import json
+import datetime
+import pytest
+import pandas as pd
+from ghdata import GHData, MetricCache, server
+
+@pytest.fixture
+def gh(ghtorrent):
+    gh = GHData(ghtorrent, cache=MetricCache())
+    # One commit a day from Monday 2017-01-02 for eight weeks
+    for day in range(56):
+        created_at = datetime.datetime(2017, 1, 2) + datetime.timedelta(days=day)
+        gh.db.execute('INSERT INTO commits (project_id, created_at) VALUES (1, ?)', str(created_at))
+    return gh
+
+def dates(frame):
+    return [str(date) for date in frame['date']]
+
+def test_bucket_start(gh):
+    assert gh.bucket_start('2017-06-15', 'week') == datetime.date(2017, 6, 12)
+    assert gh.bucket_start('2017-06-15', 'month') == datetime.date(2017, 6, 1)
+    assert gh.bucket_start('2017-06-15', 'year') == datetime.date(2017, 1, 1)
+    assert gh.bucket_start('2017-06-15', 'day') == datetime.date(2017, 6, 15)
+
+def test_delta_starts_at_the_bucket_since_falls_in(gh):
+    delta = gh.incremental('commits', '2017-02-15', repoid=1)
+    assert dates(delta) == ['2017-02-13', '2017-02-20']
+    assert list(delta['commits']) == [7, 7]
+
+def test_merge_replaces_the_recent_buckets_of_the_cached_series(gh):
+    assert gh.commits(1)['commits'].sum() == 56
+    gh.db.execute("INSERT INTO commits (project_id, created_at) VALUES (1, '2017-02-26 12:00:00'), (1, '2017-01-03 12:00:00')")
+    queries = gh.capture_queries('incremental', metric='commits', since='2017-02-20', repoid=1)
+    assert queries[0][1]['start'] == datetime.date(2017, 2, 20)
+    merged = gh.incremental('commits', '2017-02-20', merge=True, repoid=1)
+    # Only the buckets from since onward were read again
+    assert merged['commits'].sum() == 57
+    assert dates(merged) == dates(gh.commits(1))
+    assert gh.commits(1)['commits'].iloc[-1] == 8
+
+def test_merge_without_a_cached_series_reads_all_of_it(gh):
+    merged = gh.incremental('commits', '2017-02-20', merge=True, repoid=1)
+    pd.testing.assert_frame_equal(merged, gh.commits.uncached(gh, 1))
+
+def test_route_parameters(app):
+    url = '/{}/rails/rails/timeseries/commits'.format(server.GHDATA_API_VERSION)
+    assert len(json.loads(app.get(url + '?since=2017-02-15').data)) == 2
+    assert len(json.loads(app.get(url + '?since=2017-02-15&merge=true').data)) == 8
+    assert app.get(url + '?since=soon').status_code == 400
+
+def merge_pull(gh, id, merged_at):
+    gh.db.execute('INSERT INTO pull_requests (id, head_repo_id, base_repo_id) VALUES (?, 1, 1)', id)
+    gh.db.execute("INSERT INTO pull_request_history (pull_request_id, action, created_at) VALUES (?, 'merged', ?)", id, merged_at)
+
+def test_resampled_series_keep_their_daily_series_current(gh):
+    for id, merged_at in enumerate(['2017-01-02 10:00:00', '2017-01-20 10:00:00', '2017-02-06 10:00:00']):
+        merge_pull(gh, id + 1, merged_at)
+    assert list(gh.pulls_grouped(1, 'month')['pull_requests']) == [2, 1]
+    merge_pull(gh, 4, '2017-02-08 10:00:00')
+    merged = gh.incremental('pulls_grouped', '2017-02-07', merge=True, repoid=1, group_type='week')
+    assert dates(merged) == ['2017-01-02', '2017-01-16', '2017-02-06']
+    assert list(merged['pull_requests']) == [1, 1, 2]
+    # The other group types are summed from the daily series, which was brought up to date in the cache
+    assert list(gh.pulls_grouped(1, 'day')['pull_requests']) == [1, 1, 1, 1]
+    assert list(gh.pulls_grouped(1, 'month')['pull_requests']) == [2, 1]
+
+def test_resampled_delta(gh):
+    merge_pull(gh, 1, '2017-01-02 10:00:00')
+    merge_pull(gh, 2, '2017-01-04 10:00:00')
+    delta = gh.incremental('pulls_grouped', '2017-01-03', repoid=1, group_type='week')
+    assert dates(delta) == ['2017-01-02']
+    assert list(delta['pull_requests']) == [2]
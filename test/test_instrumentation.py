@@ -0,0 +1,30 @@
+from ghdata.instrumentation import Instrumentation, Histogram
+
+def test_histogram_is_cumulative():
+    histogram = Histogram('ghdata_test_seconds', 'Test', ('method',), (0.1, 1))
+    histogram.observe(0.05, 'commits')
+    histogram.observe(0.5, 'commits')
+    lines = histogram.expose()
+    assert 'ghdata_test_seconds_bucket{method="commits",le="0.1"} 1' in lines
+    assert 'ghdata_test_seconds_bucket{method="commits",le="1"} 2' in lines
+    assert 'ghdata_test_seconds_bucket{method="commits",le="+Inf"} 2' in lines
+    assert 'ghdata_test_seconds_count{method="commits"} 2' in lines
+
+def test_phases_are_attributed():
+    instruments = Instrumentation()
+    instruments.begin_request()
+    with instruments.phase('resolve'):
+        pass
+    with instruments.phase('compute'):
+        with instruments.method('contributors'):
+            with instruments.phase('sql'):
+                pass
+            instruments.count_rows(42)
+    instruments.end_request('/<owner>/<repo>/contributors', 1024)
+    exposed = instruments.expose([('ghdata_cache_hits_total', 'counter', 'Hits', 3)])
+    assert 'ghdata_request_duration_seconds_count{route="/<owner>/<repo>/contributors",phase="compute"} 1' in exposed
+    assert 'ghdata_request_duration_seconds_count{route="/<owner>/<repo>/contributors",phase="total"} 1' in exposed
+    assert 'ghdata_method_duration_seconds_count{method="contributors",phase="sql"} 1' in exposed
+    assert 'ghdata_method_rows_count{method="contributors"} 1' in exposed
+    assert 'ghdata_response_bytes_count{route="/<owner>/<repo>/contributors"} 1' in exposed
+    assert 'ghdata_cache_hits_total 3' in exposed
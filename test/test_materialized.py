@@ -0,0 +1,47 @@
+import pytest
+import pandas as pd
+from ghdata import GHData, MetricCache, synthetic
+
+@pytest.fixture
+def gh(tmpdir):
+    dbstr = 'sqlite:///' + str(tmpdir.join('ghtorrent.db'))
+    synthetic.generate(dbstr, scale=0.02)
+    return GHData(dbstr, cache=MetricCache(), materialized_contributors=True)
+
+@pytest.fixture
+def repoid(gh):
+    return gh.repoid('user1', 'repo1')
+
+def test_materialized_contributors_match_the_live_query(gh, repoid):
+    live = gh.contributors.uncached(gh, repoid)
+    assert gh.refresh_contributors([repoid]) == [repoid]
+    assert gh.contributor_table.is_materialized(repoid)
+    queries = gh.capture_queries('contributors', repoid=repoid)
+    assert gh.contributor_table.TABLE in str(queries[0][0])
+    pd.testing.assert_frame_equal(gh.contributors(repoid), live, check_dtype=False)
+    first = gh.contributors(repoid, limit=2)
+    pd.testing.assert_frame_equal(first, live.iloc[:2], check_dtype=False)
+    pd.testing.assert_frame_equal(gh.contributors(repoid, limit=100, after=first.attrs['next_cursor']), live.iloc[2:], check_dtype=False)
+
+def test_watermark_is_the_newest_activity(gh, repoid):
+    gh.refresh_contributors([repoid])
+    newest = gh.db.execute("""SELECT MAX(created_at) FROM (
+        SELECT MAX(created_at) AS created_at FROM issues WHERE repo_id = :repoid UNION ALL
+        SELECT MAX(commits.created_at) FROM commits JOIN project_commits ON project_commits.commit_id = commits.id
+        WHERE project_commits.project_id = :repoid) AS newest""", repoid=repoid).scalar()
+    assert str(gh.contributor_table.watermark(repoid)) >= str(newest)
+    assert gh.contributor_table.stale() == []
+
+def test_activity_newer_than_the_watermark_is_stale(gh, repoid):
+    gh.refresh_contributors([repoid])
+    watermark = pd.Timestamp(gh.contributor_table.watermark(repoid))
+    # Still long before the wall clock of the refresh, as the rows of a dump imported later are
+    created_at = str((watermark + pd.Timedelta(days=1)).to_pydatetime())
+    assert created_at < '2020'
+    reporter = gh.db.execute('SELECT MIN(id) FROM users').scalar()
+    before = gh.contributors(repoid)['issues'].get(reporter)
+    gh.db.execute('INSERT INTO issues (repo_id, reporter_id, created_at) VALUES (?, ?, ?)', repoid, reporter, created_at)
+    assert gh.contributor_table.stale() == [repoid]
+    assert gh.refresh_contributors() == [repoid]
+    assert gh.contributor_table.stale() == []
+    assert gh.contributors(repoid)['issues'][reporter] == (before if pd.notnull(before) else 0) + 1
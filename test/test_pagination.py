@@ -0,0 +1,46 @@
+import json
+import pytest
+import pandas as pd
+from ghdata import GHData, server, synthetic
+from ghdata.pagination import encode_cursor, decode_cursor, keyset_condition
+
+@pytest.fixture(scope='module')
+def gh(tmpdir_factory):
+    dbstr = 'sqlite:///' + str(tmpdir_factory.mktemp('pagination').join('ghtorrent.db'))
+    synthetic.generate(dbstr, scale=0.02)
+    return GHData(dbstr)
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor([12, 'bonnie']), 2) == [12, 'bonnie']
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([12]), 2)
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor')
+
+def test_keyset_condition():
+    assert keyset_condition([('a', 'DESC'), ('b', 'ASC')]) == '(a < :after0 OR (a = :after0 AND b > :after1))'
+
+@pytest.mark.parametrize('method', sorted(GHData.PAGINATED))
+def test_pages_make_up_the_whole_result(gh, method):
+    repoid = gh.repoid('user1', 'repo1')
+    expected = getattr(gh, method)(repoid)
+    assert expected.attrs.get('next_cursor') is None
+    pages, after = [], None
+    while True:
+        page = getattr(gh, method)(repoid, limit=3, after=after)
+        assert len(page) <= 3
+        pages.append(page)
+        after = page.attrs['next_cursor']
+        if after is None:
+            break
+    # A page without NULLs may read a column as integers where the whole result has floats
+    pd.testing.assert_frame_equal(pd.concat(pages, ignore_index=True), expected.reset_index(drop=True), check_dtype=False)
+
+def test_route_pages(app):
+    url = '/{}/user1/repo1/commits/locations'.format(server.GHDATA_API_VERSION)
+    first = app.get(url + '?limit=2')
+    assert len(json.loads(first.data)) == 2
+    second = app.get(url + '?limit=2&after=' + first.headers['X-Next-Cursor'])
+    assert json.loads(second.data) == json.loads(app.get(url).data)[2:4]
+    assert app.get(url + '?limit=0').status_code == 400
+    assert app.get(url + '?after=' + encode_cursor([1])).status_code == 400
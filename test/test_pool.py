@@ -0,0 +1,30 @@
+import time
+import threading
+import pytest
+from ghdata import GHData
+
+@pytest.fixture
+def gh(ghtorrent):
+    return GHData(ghtorrent, pool_options={'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 10})
+
+def test_pool_counters(gh):
+    gh.db.execute('SELECT 1')
+    gh.db.execute('SELECT 1')
+    status = gh.pool_status()
+    assert status['checkouts'] == 2
+    assert status['connections_created'] == 1
+    assert status['waits'] == 0
+    assert status['size'] == 1
+    assert status['checked_out'] == 0
+
+def test_checkouts_that_wait_for_a_connection(gh):
+    held = gh.db.connect()
+    waiter = threading.Thread(target=lambda: gh.db.connect().close())
+    waiter.start()
+    time.sleep(0.1)
+    assert gh.pool_status()['checked_out'] == 1
+    held.close()
+    waiter.join()
+    status = gh.pool_status()
+    assert status['waits'] == 1
+    assert status['wait_time'] >= 0.05
@@ -0,0 +1,80 @@
+import pytest
+import pandas as pd
+import sqlalchemy as s
+from ghdata import GHData
+
+# The per-table subqueries relative_activity_pm and relative_activity_nonpm ran before they shared one pass
+MEMBERS = '(select user_id from project_members where repo_id = :repoid)'
+PM_SQL = """
+    select
+    (select count(user_id) from project_members where repo_id = :repoid) as total_pm_contributors
+    , ((select count(id) from commits where project_id = :repoid and author_id in {0}) +
+        (select count(id) from issues where repo_id = :repoid and reporter_id in {0}) +
+        (select count(ic.comment_id) from issue_comments as ic, issues as i
+            where ic.issue_id = i.id and i.repo_id = :repoid and ic.user_id in {0}) +
+        (select count(id) from pull_requests where (base_repo_id = :repoid or head_repo_id = :repoid)
+            and user_id in {0}) +
+        (select count(pc.comment_id) from pull_request_comments as pc, pull_requests as pr
+            where pc.pull_request_id = pr.id and (pr.base_repo_id = :repoid or pr.head_repo_id = :repoid)
+            and pc.user_id in {0})) as total_pm_contributions
+    , (select count(id) from commits where project_id = :repoid and author_id in {0}) as pm_commits
+    , (select count(id) from issues where repo_id = :repoid and reporter_id in {0}) as pm_issues
+    , (select count(ic.comment_id) from issue_comments as ic, issues as i
+        where ic.issue_id = i.id and i.repo_id = :repoid and ic.user_id in {0}) as pm_issue_cmnts
+    , (select count(id) from pull_requests where (base_repo_id = :repoid or head_repo_id = :repoid)
+        and user_id in {0}) as pm_pullreqs
+    , (select count(pc.comment_id) from pull_request_comments as pc, pull_requests as pr
+        where pc.pull_request_id = pr.id and (pr.base_repo_id = :repoid or pr.head_repo_id = :repoid)
+        and pc.user_id in {0}) as pm_pullreq_cmnts
+""".format(MEMBERS)
+NONPM_SQL = """
+    select
+    (select count(id) from commits where project_id = :repoid and not author_id in {0}) as nonpm_commits
+    , (select count(id) from issues where repo_id = :repoid and not reporter_id in {0}) as nonpm_issues
+    , (select count(ic.comment_id) from issue_comments as ic, issues as i
+        where ic.issue_id = i.id and i.repo_id = :repoid and not ic.user_id in {0}) as nonpm_issue_cmnts
+    , (select count(id) from pull_requests where (base_repo_id = :repoid or head_repo_id = :repoid)
+        and not user_id in {0}) as nonpm_pullreqs
+    , (select count(pc.comment_id) from pull_request_comments as pc, pull_requests as pr
+        where pc.pull_request_id = pr.id and (pr.base_repo_id = :repoid or pr.head_repo_id = :repoid)
+        and not pc.user_id in {0}) as nonpm_pullreq_cmnts
+""".format(MEMBERS)
+
+@pytest.fixture
+def gh(ghtorrent):
+    gh = GHData(ghtorrent)
+    # Users 10 and 11 are members of repo 1, 10 is listed twice; 10 is a member of repo 3 too, where only members contribute
+    gh.db.execute('INSERT INTO project_members (repo_id, user_id) VALUES (1, 10), (1, 10), (1, 11), (2, 12), (3, 10)')
+    gh.db.execute("""INSERT INTO commits (project_id, author_id) VALUES (1, 10), (1, 10), (1, 11), (1, 12), (1, 13), (1, 14), (1, NULL),
+                     (2, 10), (3, 10)""")
+    gh.db.execute('INSERT INTO issues (id, repo_id, reporter_id) VALUES (1, 1, 11), (2, 1, 12), (3, 1, 13), (4, 2, 11), (5, 3, 10)')
+    gh.db.execute("""INSERT INTO issue_comments (issue_id, user_id, comment_id) VALUES (1, 10, 1), (1, 12, 2), (2, 12, 3),
+                     (3, 11, 4), (4, 10, 5), (5, 10, 6)""")
+    gh.db.execute("""INSERT INTO pull_requests (id, base_repo_id, head_repo_id, user_id) VALUES (1, 1, 1, 10), (2, 1, 2, 12),
+                     (3, 2, 1, 13), (4, 2, 2, 10), (5, 3, 3, 10)""")
+    gh.db.execute("""INSERT INTO pull_request_comments (pull_request_id, user_id, comment_id) VALUES (1, 11, 1), (2, 13, 2),
+                     (3, 10, 3), (4, 12, 4), (5, 10, 5)""")
+    return gh
+
+def reference(gh, sql, repoid):
+    return pd.read_sql(s.sql.text(sql), gh.db, params={'repoid': repoid}).astype('int64')
+
+@pytest.mark.parametrize('repoid', [1, 2, 3])
+def test_single_pass_counts_what_the_subqueries_counted(gh, repoid):
+    pd.testing.assert_frame_equal(gh.relative_activity_pm(repoid), reference(gh, PM_SQL, repoid))
+    pd.testing.assert_frame_equal(gh.relative_activity_nonpm(repoid), reference(gh, NONPM_SQL, repoid))
+
+def test_members_and_non_members(gh):
+    activity = gh.relative_activity(1).iloc[0]
+    assert activity['total_contributors'] == 3
+    # 3 commits, 1 issue, 2 issue comments, 1 pull request and 2 pull request comments by 10 and 11
+    assert activity['total_pm_contributions'] == 9
+    # 3 commits, 2 issues, 2 issue comments, 2 pull requests and 1 pull request comment by everyone else
+    assert activity['total_nonpm_contributions'] == 10
+    assert activity['pm_over_nonpm_ratio'] == pytest.approx(0.9)
+
+def test_no_non_member_contributions(gh):
+    activity = gh.relative_activity(3).iloc[0]
+    assert activity['total_pm_contributions'] == 5
+    assert activity['total_nonpm_contributions'] == 0
+    assert activity['pm_over_nonpm_ratio'] is None
@@ -0,0 +1,72 @@
+import json
+import time
+import logging
+import threading
+import pytest
+from ghdata import GHData, SingleFlight, server
+
+URL = '/{}/rails/rails/report'.format(server.GHDATA_API_VERSION)
+
+@pytest.fixture
+def gh(ghtorrent):
+    gh = GHData(ghtorrent)
+    gh.db.execute("INSERT INTO commits (project_id, created_at) VALUES (1, '2017-01-02 00:00:00'), (1, '2017-01-03 00:00:00')")
+    gh.db.execute("INSERT INTO watchers VALUES (1, 1, '2017-01-04 00:00:00')")
+    return gh
+
+def test_report(app):
+    response = app.get(URL + '?metrics=commits,stargazers')
+    assert response.status_code == 200
+    report = json.loads(response.data)
+    assert report['repo'] == 'rails/rails'
+    assert report['repoid'] == 1
+    assert report['elapsed'] >= 0
+    assert sorted(report['metrics']) == ['commits', 'stargazers']
+    assert report['metrics']['commits']['data'][0]['commits'] == 2
+    assert report['metrics']['stargazers']['data'][0]['watchers'] == 1
+    assert 0 <= report['metrics']['commits']['finished'] <= report['elapsed']
+
+def test_unknown_metrics(app):
+    response = app.get(URL + '?metrics=commits,bogus')
+    assert response.status_code == 400
+    assert json.loads(response.data)['metrics'] == ['bogus']
+
+def test_unknown_repo(app):
+    assert app.get('/{}/rails/nothing/report'.format(server.GHDATA_API_VERSION)).status_code == 404
+
+def test_failures_are_isolated_and_not_leaked(app, gh, monkeypatch, caplog):
+    def fail(**args):
+        raise RuntimeError('connection to secret-host:3306 failed')
+    monkeypatch.setattr(gh, 'stargazers', fail)
+    with caplog.at_level(logging.ERROR):
+        response = app.get(URL + '?metrics=commits,stargazers')
+    assert response.status_code == 200
+    report = json.loads(response.data)
+    assert report['metrics']['commits']['data'][0]['commits'] == 2
+    assert report['metrics']['stargazers'] == {'finished': report['metrics']['stargazers']['finished'], 'error': 'Internal error'}
+    assert 'secret-host' not in response.data.decode('utf-8')
+    assert 'secret-host' in caplog.text
+
+def test_repeated_metrics_are_reported_once(app):
+    response = app.get(URL + '?metrics=commits,stargazers,commits')
+    # Every key of the payload, including repeated ones that json.loads would merge
+    metrics = json.loads(response.data, object_pairs_hook=lambda pairs: pairs)[3][1]
+    assert [name for name, value in metrics] == ['commits', 'stargazers']
+
+def test_metrics_in_flight_are_shared(gh, monkeypatch):
+    calls = []
+    def commits(repoid):
+        calls.append(repoid)
+        time.sleep(0.2)
+        return GHData.commits.uncached(gh, repoid)
+    monkeypatch.setattr(gh, 'commits', commits)
+    client = server.GHDataClient(ghdata=gh, workers=4, singleflight=SingleFlight())
+    monkeypatch.setattr(server, 'client', client)
+    # The route of the metric is already computing it when the report asks for it
+    route = threading.Thread(target=client.get_raw, args=('commits',), kwargs={'repoid': 1})
+    route.start()
+    time.sleep(0.05)
+    report = json.loads(server.app.test_client().get(URL + '?metrics=commits').data)
+    route.join()
+    assert calls == [1]
+    assert report['metrics']['commits']['data'][0]['commits'] == 2
@@ -0,0 +1,27 @@
+import pytest
+from ghdata import GHData, MetricCache
+
+@pytest.fixture
+def gh(tmpdir):
+    gh = GHData('sqlite:///' + str(tmpdir.join('ghtorrent.db')), cache=MetricCache())
+    gh.db.execute('CREATE TABLE watchers (repo_id INTEGER, user_id INTEGER, created_at DATETIME)')
+    gh.db.execute("""INSERT INTO watchers VALUES (1, 1, '2016-12-31 23:59:59'), (1, 2, '2017-01-01 00:00:00'),
+                     (1, 3, '2017-01-02 09:00:00'), (1, 4, '2017-01-08 10:00:00'), (1, 5, '2017-02-01 00:00:00'),
+                     (2, 6, '2017-01-03 00:00:00')""")
+    return gh
+
+@pytest.mark.parametrize('group_type,expected', [
+    ('week', [('2016-12-26', 2), ('2017-01-02', 2), ('2017-01-30', 1)]),
+    ('month', [('2016-12-01', 1), ('2017-01-01', 3), ('2017-02-01', 1)]),
+    ('year', [('2016-01-01', 1), ('2017-01-01', 4)])
+])
+def test_buckets_match_the_database(gh, group_type, expected):
+    df = gh.stargazers_grouped(1, group_type)
+    assert [(str(date), count) for date, count in zip(df['date'], df['watchers'])] == expected
+
+def test_group_types_share_the_daily_series(gh):
+    gh.stargazers_grouped([1, 2], 'week')
+    gh.db.execute('DROP TABLE watchers')
+    df = gh.stargazers_grouped([1, 2], 'month')
+    assert [(repoid, str(date), count) for repoid, date, count in df.values.tolist()] == \
+        [(1, '2016-12-01', 1), (1, '2017-01-01', 3), (1, '2017-02-01', 1), (2, '2017-01-01', 1)]
@@ -0,0 +1,45 @@
+import time
+import pytest
+from ghdata import GHData, IdResolver
+
+@pytest.fixture
+def gh():
+    gh = GHData('sqlite://')
+    gh.db.execute('CREATE TABLE users (id INTEGER, login TEXT)')
+    gh.db.execute('CREATE TABLE projects (id INTEGER, name TEXT, owner_id INTEGER)')
+    gh.db.execute("INSERT INTO users VALUES (1, 'rails'), (2, 'howderek')")
+    gh.db.execute("INSERT INTO projects VALUES (78852, 'rails', 1), (5, 'ghdata', 2)")
+    return gh
+
+def test_repoid_is_remembered(gh):
+    assert gh.repoid('rails', 'rails') == 78852
+    gh.db.execute('DELETE FROM projects')
+    assert gh.repoid('Rails', 'Rails') == 78852
+
+def test_userid_is_remembered(gh):
+    assert gh.userid('howderek') == 2
+    gh.db.execute('DELETE FROM users')
+    assert gh.userid('howderek') == 2
+
+def test_prefetch_repoids(gh):
+    assert gh.prefetch_repoids(['rails/rails', ('howderek', 'ghdata'), 'nobody/nothing']) == 2
+    gh.db.execute('DELETE FROM projects')
+    assert gh.repoid('howderek', 'ghdata') == 5
+    assert gh.resolver.get_repo('nobody', 'nothing') == (True, 0)
+
+def test_negative_cache_expires(gh):
+    gh.resolver.negative_ttl = 0.01
+    assert gh.repoid('howderek', 'new') == 0
+    gh.db.execute("INSERT INTO projects VALUES (6, 'new', 2)")
+    assert gh.repoid('howderek', 'new') == 0
+    time.sleep(0.02)
+    assert gh.repoid('howderek', 'new') == 6
+
+def test_resolver_is_bounded():
+    resolver = IdResolver(max_entries=2)
+    resolver.set_user('a', 1)
+    resolver.set_user('b', 2)
+    resolver.get_user('a')
+    resolver.set_user('c', 3)
+    assert resolver.get_user('b') == (False, None)
+    assert resolver.get_user('a') == (True, 1)
@@ -0,0 +1,49 @@
+import json
+import pytest
+from ghdata import GHData, MetricCache, server
+from ghdata.advisor import expand
+
+@pytest.fixture
+def gh(ghtorrent):
+    gh = GHData(ghtorrent, cache=MetricCache())
+    gh.db.execute("INSERT INTO users (id, login) VALUES (2, 'dhh'), (3, 'someone')")
+    gh.db.execute("""INSERT INTO commits (id, project_id, author_id, created_at) VALUES (1, 1, 2, '2015-01-01 00:00:00'),
+                     (2, 1, 2, '2015-01-02 00:00:00'), (3, 2, 3, '2015-01-02 00:00:00')""")
+    # Issues opened in January take 1, 2, 3 and 4 days to get a committer's response, the one in March 10
+    gh.db.execute("""INSERT INTO issues (id, repo_id, created_at) VALUES (1, 1, '2017-01-02 00:00:00'), (2, 1, '2017-01-03 00:00:00'),
+                     (3, 1, '2017-01-04 00:00:00'), (4, 1, '2017-01-05 00:00:00'), (5, 1, '2017-03-01 00:00:00'),
+                     (6, 1, '2017-03-02 00:00:00')""")
+    gh.db.execute("""INSERT INTO issue_comments (issue_id, user_id, created_at) VALUES (1, 3, '2017-01-02 12:00:00'), (1, 2, '2017-01-03 00:00:00'),
+                     (2, 2, '2017-01-05 00:00:00'), (3, 2, '2017-01-07 00:00:00'), (4, 2, '2017-01-09 00:00:00'),
+                     (4, 2, '2017-01-10 00:00:00'), (5, 2, '2017-03-11 00:00:00'), (6, 3, '2017-03-03 00:00:00')""")
+    return gh
+
+def test_only_committers_responses_count(gh):
+    df = gh.issue_response_time(1)
+    assert [str(date)[:10] for date in df['responded_at']] == ['2017-01-03', '2017-01-05', '2017-01-07', '2017-01-09', '2017-03-11']
+
+def test_committers_are_matched_in_the_query(gh):
+    queries = gh.capture_queries('issue_response_time', repoid=1, start='2017-02-01')
+    assert len(queries) == 1
+    assert 'EXISTS' in str(queries[0][0])
+    # However many committers a repo has, none of them is a bind parameter
+    assert sorted(queries[0][1]) == ['repoid', 'start']
+
+def test_percentiles_per_period(gh):
+    df = gh.issue_response_time_grouped(1, 'month')
+    assert [str(date) for date in df['date']] == ['2017-01-01', '2017-03-01']
+    assert list(df['issues']) == [4, 1]
+    assert list(df['p50_days']) == [2.5, 10.0]
+    assert df['p90_days'].iloc[0] == pytest.approx(3.7)
+    assert df['p99_days'].iloc[0] == pytest.approx(3.97)
+
+def test_explain_spells_out_lists():
+    assert expand('SELECT * FROM t WHERE a IN :ids AND b = :b', {'ids': [1, 2], 'b': 3}) == \
+        ('SELECT * FROM t WHERE a IN (:ids_0, :ids_1) AND b = :b', {'ids_0': 1, 'ids_1': 2, 'b': 3})
+
+def test_route(app):
+    url = '/{}/rails/rails/timeseries/issues/response_time'.format(server.GHDATA_API_VERSION)
+    assert [row['issues'] for row in json.loads(app.get(url + '/month?start=2017-02-01').data)] == [1]
+    response = app.get(url + '?limit=3')
+    assert len(json.loads(response.data)) == 3
+    assert len(json.loads(app.get(url + '?limit=3&after=' + response.headers['X-Next-Cursor']).data)) == 2
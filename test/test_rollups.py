@@ -0,0 +1,61 @@
+import pytest
+import pandas as pd
+from ghdata import GHData, synthetic
+
+METRICS = [
+    ('commits', {}),
+    ('issues', {}),
+    ('stargazers', {}),
+    ('forks_grouped', {'group_type': 'month'}),
+    ('pulls_grouped', {'group_type': 'day'}),
+    ('pulls_grouped', {'group_type': 'week'}),
+]
+
+@pytest.fixture
+def dbstr(tmpdir):
+    dbstr = 'sqlite:///' + str(tmpdir.join('ghtorrent.db'))
+    synthetic.generate(dbstr, scale=0.02)
+    return dbstr
+
+@pytest.fixture
+def live(dbstr):
+    return GHData(dbstr)
+
+@pytest.fixture
+def rolled(dbstr):
+    gh = GHData(dbstr, rollups=True)
+    gh.refresh_rollups()
+    return gh
+
+def assert_same_counts(rolled, live, repoid):
+    for method, args in METRICS:
+        expected = getattr(live, method)(repoid, **args)
+        actual = getattr(rolled, method)(repoid, **args)
+        assert len(expected), method
+        pd.testing.assert_frame_equal(actual.astype(float, errors='ignore').assign(date=actual['date'].astype(str)),
+                                      expected.astype(float, errors='ignore').assign(date=expected['date'].astype(str)),
+                                      check_dtype=False, obj=method)
+
+def head_repos(gh):
+    return [row[0] for row in gh.db.execute('SELECT DISTINCT head_repo_id FROM pull_requests ORDER BY head_repo_id LIMIT 3')]
+
+def test_rollups_count_what_the_live_queries_count(rolled, live):
+    assert rolled.rollups.available('commits', 'issues', 'stargazers', 'forks', 'pulls_merged', 'pull_comments')
+    for repoid in head_repos(live):
+        assert_same_counts(rolled, live, repoid)
+
+def test_refresh_picks_up_new_rows(rolled, live):
+    repoid = head_repos(live)[0]
+    newest = pd.Timestamp(rolled.rollups.latest_watermark())
+    later = str((newest + pd.Timedelta(days=3)).to_pydatetime())
+    live.db.execute('INSERT INTO commits (project_id, created_at) VALUES (?, ?)', repoid, later)
+    live.db.execute('INSERT INTO issues (repo_id, created_at) VALUES (?, ?)', repoid, later)
+    # A comment made now on the pull request merged first, which counts on the day it was merged
+    pull_request_id = live.db.execute("""SELECT pull_request_history.pull_request_id FROM pull_request_history
+        JOIN pull_requests ON pull_requests.id = pull_request_history.pull_request_id
+        WHERE pull_request_history.action = 'merged' AND pull_requests.head_repo_id = ?
+        ORDER BY pull_request_history.created_at LIMIT 1""", repoid).scalar()
+    live.db.execute('INSERT INTO pull_request_comments (pull_request_id, created_at) VALUES (?, ?)', pull_request_id, later)
+    rolled.refresh_rollups()
+    assert_same_counts(rolled, live, repoid)
+    assert str(pd.Timestamp(rolled.rollups.watermark('pull_comments'))) == str(pd.Timestamp(later))
@@ -0,0 +1,78 @@
+import time
+import threading
+import pandas
+import pytest
+from ghdata import SingleFlight
+from ghdata import singleflight
+
+def run_concurrently(flights, func, key='contributors'):
+    results = []
+    threads = [threading.Thread(target=lambda f=f: results.append(f.do(key, func))) for f in flights]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results
+
+def slow_query(calls):
+    def query():
+        calls.append(1)
+        time.sleep(0.2)
+        return pandas.DataFrame({'commits': [153, 192]})
+    return query
+
+def test_concurrent_calls_share_one_computation():
+    calls = []
+    flight = SingleFlight()
+    results = run_concurrently([flight] * 5, slow_query(calls))
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert all(r['commits'].tolist() == [153, 192] for r in results)
+    # Every caller gets its own copy
+    results[0]['commits'] = 0
+    assert results[1]['commits'].tolist() == [153, 192]
+    assert flight.stats() == {'leaders': 1, 'followers': 4, 'in_flight': 0}
+
+def test_errors_are_shared():
+    def failing():
+        time.sleep(0.1)
+        raise ValueError('Query failed')
+    flight = SingleFlight()
+    errors = []
+    def call():
+        try:
+            flight.do('contributors', failing)
+        except ValueError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+
+def test_coalesces_across_processes(tmpdir):
+    if singleflight.fcntl is None:
+        pytest.skip('needs fcntl')
+    calls = []
+    # Separate instances stand in for worker processes sharing the lock directory
+    flights = [SingleFlight(lock_dir=str(tmpdir)) for _ in range(3)]
+    results = run_concurrently(flights, slow_query(calls))
+    assert len(calls) == 1
+    assert all(r['commits'].tolist() == [153, 192] for r in results)
+
+def test_lock_directory_stays_bounded(tmpdir):
+    if singleflight.fcntl is None:
+        pytest.skip('needs fcntl')
+    flight = SingleFlight(lock_dir=str(tmpdir), result_ttl=0.1)
+    for repoid in range(20):
+        flight.do(('commits', repoid), lambda: pandas.DataFrame({'commits': [153]}))
+    assert len(tmpdir.listdir()) <= 40
+    time.sleep(0.15)
+    flight.do(('commits', 20), lambda: pandas.DataFrame({'commits': [153]}))
+    # Only the last call's lock and result are left
+    assert sorted(path.ext for path in tmpdir.listdir()) == ['.lock', '.pickle']
+    time.sleep(0.15)
+    assert SingleFlight(lock_dir=str(tmpdir), result_ttl=0.1).sweep() == 0
+    assert tmpdir.listdir() == []
@@ -0,0 +1,48 @@
+import json
+import time
+import pytest
+import pandas as pd
+from ghdata import GHData, QueryBudget, QueryTimeout, server, synthetic
+
+@pytest.fixture(scope='module')
+def gh(tmpdir_factory):
+    dbstr = 'sqlite:///' + str(tmpdir_factory.mktemp('streaming').join('ghtorrent.db'))
+    synthetic.generate(dbstr, scale=0.02)
+    return GHData(dbstr)
+
+@pytest.fixture
+def repoid(gh):
+    return gh.repoid('user1', 'repo1')
+
+def test_chunks_make_up_the_whole_result(gh, repoid):
+    chunks = list(gh.stream('forks', chunksize=2, repoid=repoid))
+    assert len(chunks) > 1
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), gh.forks.uncached(gh, repoid), check_dtype=False)
+
+def test_streams_are_not_paged(gh, repoid):
+    with pytest.raises(ValueError):
+        gh.stream('forks', repoid=repoid, limit=5)
+
+def test_streams_run_within_their_budget(gh, repoid):
+    budget = QueryBudget('forks', 0.01)
+    chunks = gh.stream('forks', chunksize=2, budget=budget, repoid=repoid)
+    time.sleep(0.02)
+    with pytest.raises(QueryTimeout):
+        list(chunks)
+
+def test_streams_hold_a_worker(gh, repoid):
+    client = server.GHDataClient(ghdata=gh, workers=1)
+    pieces = client.stream('forks', chunksize=2, repoid=repoid)
+    next(pieces)
+    future = client.submit('forks', repoid=repoid)
+    time.sleep(0.1)
+    assert not future.done()
+    pieces.close()
+    assert len(future.result(timeout=5)) == len(gh.forks(repoid))
+
+def test_route(app, gh, repoid):
+    url = '/{}/user1/repo1/forks'.format(server.GHDATA_API_VERSION)
+    lines = app.get(url + '?stream=ndjson').data.decode('utf-8').splitlines()
+    assert len(lines) == len(gh.forks(repoid))
+    assert app.get(url + '?stream=json&limit=2').status_code == 400
+    assert app.get(url + '?stream=ndjson&after=abc').status_code == 400
@@ -0,0 +1,62 @@
+import time
+import threading
+import pytest
+import sqlalchemy as s
+from ghdata import QueryBudget, QueryTimeout
+from ghdata.timeouts import hint_execution_time
+
+def test_budget_runs_out():
+    budget = QueryBudget('contributors', 0.05)
+    assert 0 < budget.remaining() <= 0.05
+    time.sleep(0.06)
+    assert budget.expired()
+    with pytest.raises(QueryTimeout) as error:
+        budget.remaining()
+    assert error.value.method == 'contributors'
+
+def test_cancel_kills_running_queries():
+    budget = QueryBudget('relative_activity', 60)
+    budget.running(12)
+    budget.running(13)
+    budget.finished(12)
+    killed = []
+    budget.cancel(killed.append)
+    assert killed == [13]
+    assert budget.expired()
+
+def test_kills_run_without_holding_the_budget():
+    budget = QueryBudget('contributors', 60)
+    budget.running(12)
+    budget.running(13)
+    killing = threading.Event()
+    release = threading.Event()
+    def kill(connection_id):
+        killing.set()
+        release.wait(5)
+    canceller = threading.Thread(target=budget.cancel, args=(kill,))
+    canceller.start()
+    killing.wait(5)
+    # Another query of the budget can finish while one is being killed
+    other = threading.Thread(target=budget.running, args=(14,))
+    other.start()
+    other.join(1)
+    assert not other.is_alive()
+    # The connection being killed isn't released until the kill is done
+    finishing = threading.Thread(target=budget.finished, args=(12,))
+    finishing.start()
+    finishing.join(0.1)
+    assert finishing.is_alive()
+    release.set()
+    canceller.join(5)
+    finishing.join(5)
+    assert not finishing.is_alive()
+
+def test_execution_time_hint(tmpdir):
+    db = s.create_engine('sqlite:///' + str(tmpdir.join('hint.db')))
+    hint_execution_time(db)
+    statements = []
+    s.event.listen(db, 'after_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    with db.connect() as conn:
+        assert conn.execution_options(max_execution_time=1500).execute(s.text('\n  SELECT 1')).scalar() == 1
+        conn.execute(s.text('SELECT 2'))
+    assert statements == ['SELECT /*+ MAX_EXECUTION_TIME(1500) */ 1', 'SELECT 2']
@@ -0,0 +1,43 @@
+import json
+import datetime
+import pandas as pd
+import pytest
+from ghdata import GHData, formats, server, timeseries
+
+@pytest.fixture
+def gh(ghtorrent):
+    gh = GHData(ghtorrent)
+    gh.db.execute("""INSERT INTO watchers VALUES (1, 1, '2016-12-30 10:00:00'), (1, 2, '2017-01-20 00:00:00'),
+                     (1, 3, '2017-01-21 00:00:00'), (2, 4, '2017-01-04 00:00:00')""")
+    return gh
+
+def test_bucket_starts():
+    dates = pd.Series(['2016-01-03', '2016-01-04', '2017-12-31'])
+    assert list(timeseries.bucket_starts(dates, 'WEEK')) == \
+        [datetime.date(2015, 12, 28), datetime.date(2016, 1, 4), datetime.date(2017, 12, 25)]
+
+def test_gaps_are_filled_with_zeros(gh):
+    df = gh.filled('stargazers', repoid=1)
+    assert [str(date) for date in df['date']] == ['2016-12-26', '2017-01-02', '2017-01-09', '2017-01-16']
+    assert list(df['watchers']) == [1, 0, 0, 2]
+    assert df.attrs['step'] == 'WEEK'
+
+def test_every_repo_spans_the_date_range(gh):
+    df = gh.filled('stargazers_grouped', repoid=[1, 2], group_type='month', start='2016-11-15', end='2017-02-01')
+    assert [(repoid, str(date), count) for repoid, date, count in df.values.tolist()] == [
+        (1, '2016-11-01', 0), (1, '2016-12-01', 1), (1, '2017-01-01', 2), (1, '2017-02-01', 0),
+        (2, '2016-11-01', 0), (2, '2016-12-01', 0), (2, '2017-01-01', 1), (2, '2017-02-01', 0)]
+
+def test_series_encoding(gh):
+    encoded = json.loads(formats.serialize(gh.filled('stargazers', repoid=1), 'series'))
+    assert encoded == {'start': '2016-12-26', 'step': 'week', 'values': {'watchers': [1, 0, 0, 2]}}
+    with pytest.raises(ValueError):
+        formats.serialize(gh.stargazers(1), 'series')
+
+def test_route_parameters(app):
+    url = '/{}/rails/rails/timeseries/stargazers'.format(server.GHDATA_API_VERSION)
+    assert len(json.loads(app.get(url).data)) == 2
+    assert len(json.loads(app.get(url + '?fill=true').data)) == 4
+    response = app.get(url + '/month', headers={'Accept': 'application/vnd.ghdata.series+json'})
+    assert json.loads(response.data)['values'] == {'watchers': [1, 2]}
+    assert app.get('/{}/rails/rails/forks?format=series'.format(server.GHDATA_API_VERSION)).status_code == 406